@@ -9,6 +9,16 @@ export type Normalization = {
   epsilon: number;
 };
 
+// onnxruntime-web SessionOptions picked by scripts/modeling/tune_onnx_session.py
+export type TunedSessionOptions = {
+  intraOpNumThreads: number;
+  interOpNumThreads: number;
+  executionMode: 'sequential' | 'parallel';
+  graphOptimizationLevel: 'disabled' | 'basic' | 'extended' | 'all';
+  enableCpuMemArena: boolean;
+  enableMemPattern: boolean;
+};
+
 export type ForecastModelConfig = {
   modelName: string;
   modelVer: string;
@@ -16,7 +26,16 @@ export type ForecastModelConfig = {
   quantPath?: string;
   onnxSha256: string;
   quantSha256?: string;
+  // close tail [N, T] (float64) -> delta, p50: featurizer + zscore + postprocess in the graph
+  e2ePath?: string;
+  e2eSha256?: string;
+  // validated optimized artifacts (opt / ort / fp16 / int8), see optimize_onnx_artifacts.py
+  variants?: Record<string, { path: string; sha256: string; bytes: number }>;
   inputShape: [number, number];
+  // the ONNX batch axis is symbolic; inputShape is still the per-forecast [1, n]
+  dynamicBatch?: boolean;
+  // tuned session options keyed by batch size ("1" is the worker's case)
+  sessionOptions?: Record<string, TunedSessionOptions>;
   horizonSteps: number;
   featureWindow: number;
   tailSize: number;
@@ -7,6 +7,7 @@ import {
   getModelConfig,
   resolveModelVersion,
   type ForecastModelConfig,
+  type TunedSessionOptions,
 } from '@/config/ml';
 
 import {
@@ -61,15 +62,31 @@ function shouldUseWebGpu(modelConfig: ForecastModelConfig): boolean {
   return Boolean((ctx as any).navigator?.gpu);
 }
 
+// The wasm backend ignores intra/inter-op thread counts (it runs on
+// ort.env.wasm.numThreads, 1 here) and has no thread pool for parallel
+// execution, so only the graph and memory options of a tuned entry apply.
+function wasmSessionOptions(
+  tuned?: TunedSessionOptions,
+): ort.InferenceSession.SessionOptions {
+  if (!tuned) return {};
+  return {
+    graphOptimizationLevel: tuned.graphOptimizationLevel,
+    enableCpuMemArena: tuned.enableCpuMemArena,
+    enableMemPattern: tuned.enableMemPattern,
+  };
+}
+
 async function tryCreateSession(
   provider: 'webgpu' | 'wasm',
   candidates: string[],
+  options: ort.InferenceSession.SessionOptions = {},
 ): Promise<ort.InferenceSession | null> {
   let lastError: unknown;
 
   for (const candidate of candidates) {
     try {
       return await ort.InferenceSession.create(candidate, {
+        ...options,
         executionProviders: [provider],
       });
     } catch (err) {
@@ -111,7 +128,12 @@ async function getSession(modelVer: string): Promise<SessionInfo> {
     }
 
     try {
-      const session = await tryCreateSession('wasm', candidates);
+      // options were tuned on the CPU provider, so only the wasm path uses them
+      const session = await tryCreateSession(
+        'wasm',
+        candidates,
+        wasmSessionOptions(modelConfig.sessionOptions?.['1']),
+      );
       if (session) {
         return { session, backend: 'wasm' } as const;
       }
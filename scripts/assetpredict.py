@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import argparse
+import runpy
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# command -> target -> script; nothing is imported until a target is picked
+COMMANDS: Dict[str, Dict[str, str]] = {
+    "fetch": {
+        "binance": "data/fetch_binance.py",
+        "moex": "data/fetch_moex.py",
+        "synthetic": "data/generate_synthetic_market.py",
+    },
+    "preprocess": {"timeseries": "data/preprocess_timeseries.py"},
+    "features": {"v1": "data/build_features.py"},
+    "train": {
+        "lgbm": "modeling/train_forecast_lgbm_v1.py",
+        "catboost": "modeling/train_forecast_catboost_v1.py",
+        "ridge": "modeling/train_forecast_ridge_v1.py",
+        "minimal": "train_forecast_minimal.py",
+        "fleet": "modeling/train_forecast_fleet_v1.py",
+        "distill": "modeling/distill_forecast_model_v1.py",
+        "search": "modeling/search_forecast_params.py",
+    },
+    "export": {
+        "models": "modeling/export_forecast_models_v1.py",
+        "e2e": "modeling/export_end_to_end_onnx.py",
+        "optimize": "modeling/optimize_onnx_artifacts.py",
+    },
+    "evaluate": {
+        "models": "modeling/evaluate_forecast_models_v1.py",
+        "parity": "modeling/onnx_parity.py",
+        "bench": "modeling/bench_onnx_models.py",
+        "batch": "modeling/check_onnx_batch.py",
+        "tune": "modeling/tune_onnx_session.py",
+    },
+}
+# target used when the first argument after the command is not a target name
+DEFAULT_TARGETS = {"preprocess": "timeseries", "features": "v1", "export": "models", "evaluate": "models"}
+
+
+def _commands_help() -> str:
+    lines = ["commands:"]
+    for command, targets in COMMANDS.items():
+        names = [f"[{t}]" if t == DEFAULT_TARGETS.get(command) else t for t in targets]
+        lines.append(f"  {command:<11} {' | '.join(names)}")
+    lines.append("")
+    lines.append("A bracketed target is the default. Arguments after the target go to its script;")
+    lines.append("'assetpredict <command> <target> --help' lists them.")
+    return "\n".join(lines)
+
+
+def resolve(command: str, argv: List[str]) -> Tuple[str, Path, List[str]]:
+    """Target name, script path and the script's own arguments for ``command``."""
+    targets = COMMANDS[command]
+    if argv and argv[0] in targets:
+        target, argv = argv[0], argv[1:]
+    elif command in DEFAULT_TARGETS:
+        target = DEFAULT_TARGETS[command]
+    else:
+        raise ValueError(f"{command} needs a target: {', '.join(targets)}")
+    return target, SCRIPTS_DIR / targets[target], argv
+
+
+def run_script(script: Path, argv: List[str]) -> None:
+    """Run ``script`` as ``__main__``, exactly as ``python script argv...`` would."""
+    # scripts import their siblings by module name
+    sys.path.insert(0, str(script.parent))
+    sys.argv = [str(script), *argv]
+    runpy.run_path(str(script), run_name="__main__")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="assetpredict",
+        description="Data and modeling pipeline: one entry point for the scripts under scripts/.",
+        epilog=_commands_help(),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("command", choices=list(COMMANDS), metavar="command")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Target and its arguments.")
+    args = parser.parse_args()
+
+    try:
+        _, script, argv = resolve(args.command, args.args)
+    except ValueError as exc:
+        if any(a in ("-h", "--help") for a in args.args):
+            print(_commands_help())
+            return
+        parser.error(str(exc))
+    run_script(script, argv)
+
+
+if __name__ == "__main__":
+    main()
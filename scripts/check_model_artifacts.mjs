@@ -59,6 +59,13 @@ function main() {
       ensureFile(quantPath, manifest.quantSha256);
     }
 
+    for (const variant of Object.values(manifest.variants ?? {})) {
+      ensureFile(
+        path.join('apps/web/public', variant.path.replace(/^\//, '')),
+        variant.sha256,
+      );
+    }
+
     const tvPath = entry.testVectors;
     const tvFull = path.join(rootDir, tvPath);
     if (!existsSync(tvFull)) {
@@ -8,6 +8,8 @@ from math import log, sqrt
 from pathlib import Path
 from typing import Iterable, List, Dict, Any, Optional, Tuple
 
+import numpy as np
+
 
 @dataclass
 class FeatureConfig:
@@ -152,6 +154,17 @@ def _write_csv(path: Path, rows: List[Dict[str, Any]]) -> None:
             writer.writerow(row)
 
 
+def _feature_moments(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-feature count/mean/M2, mergeable across series and splits."""
+    X = np.array([[row[col] for col in FEATURE_COLUMNS] for row in rows], dtype=np.float64)
+    X = X.reshape(len(rows), len(FEATURE_COLUMNS))
+    if not len(X):
+        zeros = [0.0] * len(FEATURE_COLUMNS)
+        return {"count": 0, "mean": zeros, "m2": list(zeros)}
+    mean = X.mean(axis=0)
+    return {"count": len(X), "mean": mean.tolist(), "m2": ((X - mean) ** 2).sum(axis=0).tolist()}
+
+
 def _split_rows(rows: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
     n = len(rows)
     train_end = int(n * 0.70)
@@ -170,10 +183,17 @@ def process_file(path: Path, out_dir: Path, cfg: FeatureConfig) -> None:
     _write_csv(out_dir / f"{stem}_val.csv", val)
     _write_csv(out_dir / f"{stem}_test.csv", test)
 
+    splits = {"train": train, "val": val, "test": test}
     meta_out = {
         **meta,
         "source": str(path),
-        "splits": {"train": len(train), "val": len(val), "test": len(test)},
+        "series": stem,
+        "splits": {name: len(part) for name, part in splits.items()},
+        # first/last ts per split lets readers skip files outside a date range
+        "ts_range": {
+            name: [part[0]["ts"], part[-1]["ts"]] for name, part in splits.items() if part
+        },
+        "moments": {name: _feature_moments(part) for name, part in splits.items()},
     }
     (out_dir / f"{stem}_meta.json").write_text(json.dumps(meta_out, ensure_ascii=True))
     print(f"[features] {path} -> {out_dir} ({meta_out['rows']} rows)")
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+DAY_MS = 86_400_000
+MSK_OFFSET_MS = 3 * 3_600_000
+# MOEX main stock session, MSK minutes of day [open, close)
+MOEX_SESSION = (10 * 60, 18 * 60 + 40)
+
+# name -> (drift in units of the bar volatility, volatility multiplier)
+REGIMES: Dict[str, Tuple[float, float]] = {
+    "calm": (0.0, 0.7),
+    "bull": (0.02, 1.0),
+    "bear": (-0.025, 1.4),
+    "turbulent": (0.0, 2.5),
+}
+
+
+@dataclass
+class MarketConfig:
+    steps: int
+    interval_ms: int
+    start_ms: int
+    start_price: float = 100.0
+    vol: float = 0.005
+    vol_persistence: float = 0.985
+    vol_of_vol: float = 0.06
+    regime_switch_prob: float = 0.002
+    jump_prob: float = 0.001
+    jump_scale: float = 8.0
+    gap_prob: float = 0.0005
+    gap_mean_bars: float = 8.0
+    session: Optional[str] = None
+    overnight_vol: float = 3.0
+    # pull of log price back to start_price per bar; keeps millions of bars in range
+    mean_reversion: float = 2e-4
+    base_volume: float = 1_000.0
+    price_decimals: int = 2
+
+
+def _session_timestamps(config: MarketConfig) -> Tuple[np.ndarray, np.ndarray]:
+    """Bar open times and a "first bar of the session" flag."""
+    if config.session is None:
+        ts = config.start_ms + config.interval_ms * np.arange(config.steps, dtype=np.int64)
+        first = np.zeros(config.steps, dtype=bool)
+        return ts, first
+    if config.session != "moex":
+        raise ValueError(f"unknown session {config.session!r}")
+
+    daily = config.interval_ms >= DAY_MS
+    if daily:
+        per_day = 1
+    else:
+        per_day = max(1, -(-(MOEX_SESSION[1] - MOEX_SESSION[0]) * 60_000 // config.interval_ms))
+    # candidate grid in MSK wall time; 5 of 7 days trade
+    days = config.steps // per_day * 7 // 5 + 8
+    day0 = (config.start_ms + MSK_OFFSET_MS) // DAY_MS
+    day_idx = day0 + np.arange(days, dtype=np.int64)
+    weekday = (day_idx + 3) % 7  # 1970-01-01 was a Thursday
+    day_idx = day_idx[weekday < 5]
+    if daily:
+        local = day_idx * DAY_MS
+        first = np.ones(len(local), dtype=bool)
+    else:
+        offsets = MOEX_SESSION[0] * 60_000 + config.interval_ms * np.arange(per_day)
+        local = (day_idx[:, None] * DAY_MS + offsets[None, :]).ravel()
+        first = np.zeros((len(day_idx), per_day), dtype=bool)
+        first[:, 0] = True
+        first = first.ravel()
+    ts = local - MSK_OFFSET_MS
+    keep = ts >= config.start_ms
+    return ts[keep][: config.steps], first[keep][: config.steps]
+
+
+def _regime_path(rng: np.random.Generator, steps: int, switch_prob: float) -> np.ndarray:
+    """Regime index per bar: geometric holding times, a new random regime after each."""
+    states: List[np.ndarray] = []
+    lengths: List[np.ndarray] = []
+    total = 0
+    while total < steps:
+        n = max(16, int((steps - total) * switch_prob * 1.5) + 16)
+        lengths.append(rng.geometric(max(switch_prob, 1.0 / steps), size=n))
+        states.append(rng.integers(0, len(REGIMES), size=n))
+        total += int(lengths[-1].sum())
+    return np.repeat(np.concatenate(states), np.concatenate(lengths))[:steps]
+
+
+def _gap_mask(rng: np.random.Generator, steps: int, prob: float, mean_bars: float) -> np.ndarray:
+    """Bars lost to exchange/API outages: runs starting with ``prob``, mean ``mean_bars`` long."""
+    starts = np.flatnonzero(rng.random(steps) < prob)
+    if len(starts) == 0:
+        return np.zeros(steps, dtype=bool)
+    ends = np.minimum(starts + rng.geometric(1.0 / max(mean_bars, 1.0), size=len(starts)), steps)
+    edges = np.zeros(steps + 1, dtype=np.int32)
+    np.add.at(edges, starts, 1)
+    np.add.at(edges, ends, -1)
+    return np.cumsum(edges[:-1]) > 0
+
+
+def generate_market(config: MarketConfig, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """One synthetic OHLCV series, fully vectorized over bars."""
+    # scipy takes seconds to import; only generation needs it, not --help
+    from scipy.signal import lfilter
+
+    ts, first = _session_timestamps(config)
+    steps = len(ts)
+    regime = _regime_path(rng, steps, config.regime_switch_prob)
+    drift = np.array([d for d, _ in REGIMES.values()])[regime]
+    level = np.array([m for _, m in REGIMES.values()])[regime]
+
+    log_vol = lfilter([config.vol_of_vol], [1.0, -config.vol_persistence], rng.standard_normal(steps))
+    sigma = config.vol * level * np.exp(log_vol)
+    jumps = (rng.random(steps) < config.jump_prob) * rng.standard_normal(steps) * config.jump_scale
+    intrabar = sigma * (drift + rng.standard_normal(steps) + jumps)
+    overnight = first * sigma * config.overnight_vol * rng.standard_normal(steps)
+
+    # log price deviation x_t = (1 - k) x_{t-1} + r_t; each bar opens at the
+    # previous close (plus the overnight move) and the pull lands intrabar
+    x = lfilter([1.0], [1.0, config.mean_reversion - 1.0], overnight + intrabar)
+    log_close = np.log(config.start_price) + x
+    log_open = np.log(config.start_price) + np.concatenate([[0.0], x[:-1]]) + overnight
+    wick = np.abs(rng.standard_normal((2, steps))) * sigma * 0.5
+    close = np.exp(log_close)
+    open_ = np.exp(log_open)
+    high = np.maximum(open_, close) * np.exp(wick[0])
+    low = np.minimum(open_, close) * np.exp(-wick[1])
+    volume = (
+        config.base_volume
+        * np.exp(0.4 * rng.standard_normal(steps))
+        * (1.0 + np.abs(log_close - log_open) / np.maximum(sigma, 1e-12))
+        * level
+    )
+
+    d = config.price_decimals
+    open_, close = np.round(open_, d), np.round(close, d)
+    high = np.maximum(np.round(high, d), np.maximum(open_, close))
+    low = np.minimum(np.round(low, d), np.minimum(open_, close))
+    return {
+        "ts": ts,
+        "open": open_,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": np.round(volume, 4),
+        "missing": _gap_mask(rng, steps, config.gap_prob, config.gap_mean_bars),
+    }
+
+
+def _present(market: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    keep = ~market["missing"]
+    return {k: v[keep] for k, v in market.items() if k != "missing"}
+
+
+def to_normalized_bars(market: Dict[str, np.ndarray], interval_ms: int) -> List[List[Any]]:
+    """What ``preprocess_timeseries`` produces from the raw payload: every
+    interval between the first and last bar, gaps filled flat from the
+    previous close with zero volume.
+    """
+    bars = _present(market)
+    ts = bars["ts"]
+    grid = np.arange(ts[0], ts[-1] + 1, interval_ms, dtype=np.int64)
+    pos = np.full(len(grid), -1, dtype=np.int64)
+    pos[(ts - ts[0]) // interval_ms] = np.arange(len(ts))
+    filled = pos < 0
+    src = np.maximum.accumulate(pos)
+    close = bars["close"][src]
+    values = np.column_stack(
+        [np.where(filled, close, bars[k][src]) for k in ("open", "high", "low")]
+        + [close, np.where(filled, 0.0, bars["volume"][src])]
+    )
+    return [[t, *row] for t, row in zip(grid.tolist(), values.tolist())]
+
+
+def to_binance_payload(
+    market: Dict[str, np.ndarray], symbol: str, interval: str, interval_ms: int
+) -> Dict[str, Any]:
+    """Kline payload as ``fetch_binance`` stores it (numbers as strings, like the API)."""
+    bars = _present(market)
+    quote = bars["volume"] * bars["close"]
+    columns = [
+        bars["ts"].tolist(),
+        *(np.char.mod("%.8f", bars[k]).tolist() for k in ("open", "high", "low", "close", "volume")),
+        (bars["ts"] + interval_ms - 1).tolist(),
+        np.char.mod("%.8f", quote).tolist(),
+        np.maximum(1, (bars["volume"] / 2).astype(np.int64)).tolist(),
+        np.char.mod("%.8f", bars["volume"] * 0.5).tolist(),
+        np.char.mod("%.8f", quote * 0.5).tolist(),
+        ["0"] * len(bars["ts"]),
+    ]
+    return {
+        "source": "BINANCE",
+        "symbol": symbol,
+        "interval": interval,
+        "from": _iso(int(bars["ts"][0])),
+        "till": _iso(int(bars["ts"][-1])),
+        "fetched_at": _iso(int(time.time() * 1000)),
+        "data": [list(row) for row in zip(*columns)],
+    }
+
+
+def to_moex_payload(
+    market: Dict[str, np.ndarray], ticker: str, interval: int
+) -> Dict[str, Any]:
+    """Candles payload as ``fetch_moex`` stores it (``begin`` in MSK wall time)."""
+    bars = _present(market)
+    begin = np.char.replace(
+        np.datetime_as_string((bars["ts"] + MSK_OFFSET_MS).astype("datetime64[ms]"), unit="s"),
+        "T",
+        " ",
+    ).tolist()
+    values = np.column_stack(
+        [bars[k] for k in ("open", "high", "low", "close", "volume")]
+    ).tolist()
+    return {
+        "source": "MOEX",
+        "ticker": ticker,
+        "timeframe": _moex_timeframe(interval),
+        "from": begin[0][:10],
+        "till": begin[-1][:10],
+        "interval": interval,
+        "fetched_at": _iso(int(time.time() * 1000)),
+        "data": [[b, *row] for b, row in zip(begin, values)],
+    }
+
+
+def _moex_timeframe(interval: int) -> str:
+    return "1d" if interval == 24 else f"{interval}m"
+
+
+def _iso(ts_ms: int) -> str:
+    return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).isoformat(timespec="seconds").replace(
+        "+00:00", "Z"
+    )
+
+
+def _parse_date(value: str) -> int:
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def _interval(source: str, value: str) -> Tuple[Any, int]:
+    """CLI interval -> (payload interval, bar length in ms), per source conventions."""
+    if source == "moex":
+        interval = int(value)
+        return interval, DAY_MS if interval == 24 else interval * 60_000
+    units = {"m": 60_000, "h": 3_600_000, "d": DAY_MS}
+    if value[-1:] not in units:
+        raise ValueError(f"Unsupported interval: {value}")
+    return value, int(value[:-1]) * units[value[-1]]
+
+
+def _asset_config(args: argparse.Namespace, interval_ms: int, rng: np.random.Generator) -> MarketConfig:
+    # assets differ in price level and volatility around the CLI values
+    return MarketConfig(
+        steps=args.steps,
+        interval_ms=interval_ms,
+        start_ms=_parse_date(args.date_from),
+        start_price=float(args.start_price * np.exp(rng.normal(0.0, 1.0))),
+        vol=float(args.vol * np.exp(rng.normal(0.0, 0.3))),
+        regime_switch_prob=args.regime_switch_prob,
+        jump_prob=args.jump_prob,
+        gap_prob=args.gap_prob,
+        session="moex" if args.source == "moex" else None,
+    )
+
+
+def generate_asset(
+    args: argparse.Namespace, symbol: str, seed: np.random.SeedSequence
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    interval, interval_ms = _interval(args.source, args.interval)
+    config = _asset_config(args, interval_ms, rng)
+    market = generate_market(config, rng)
+    generated = time.perf_counter() - started
+
+    label = interval if args.source == "binance" else _moex_timeframe(interval)
+    if args.format == "normalized":
+        payload: Any = to_normalized_bars(market, interval_ms)
+    elif args.source == "binance":
+        payload = to_binance_payload(market, symbol, interval, interval_ms)
+    else:
+        payload = to_moex_payload(market, symbol, interval)
+    dest = Path(args.out_dir) / f"{symbol}_{label}.json"
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    dest.write_text(json.dumps(payload, ensure_ascii=True))
+    return {
+        "symbol": symbol,
+        "bars": int(len(market["ts"])),
+        "dropped": int(market["missing"].sum()),
+        "config": asdict(config),
+        "path": str(dest),
+        "generate_sec": round(generated, 3),
+        "total_sec": round(time.perf_counter() - started, 3),
+    }
+
+
+def _parse_list(value: str) -> List[str]:
+    return [v.strip().upper() for v in value.split(",") if v.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic multi-asset candles as raw Binance/MOEX payloads or normalized bars."
+    )
+    parser.add_argument("--source", choices=("binance", "moex"), default="binance")
+    parser.add_argument("--format", choices=("raw", "normalized"), default="raw")
+    parser.add_argument("--assets", type=int, default=4)
+    parser.add_argument(
+        "--symbols",
+        type=_parse_list,
+        default=None,
+        help="Comma-separated names (default SYN1USDT.. for binance, SYN1.. for moex).",
+    )
+    parser.add_argument("--steps", type=int, default=100_000, help="Bars per asset.")
+    parser.add_argument(
+        "--interval",
+        default=None,
+        help="Binance interval (1h) or MOEX interval in minutes/24 (default 1h / 60).",
+    )
+    parser.add_argument("--from", dest="date_from", default="2019-01-01")
+    parser.add_argument("--start-price", type=float, default=100.0)
+    parser.add_argument("--vol", type=float, default=0.005, help="Base per-bar log-return volatility.")
+    parser.add_argument("--regime-switch-prob", type=float, default=0.002)
+    parser.add_argument("--jump-prob", type=float, default=0.001)
+    parser.add_argument("--gap-prob", type=float, default=0.0005)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--out-dir", default=None)
+    args = parser.parse_args()
+
+    args.interval = args.interval or ("1h" if args.source == "binance" else "60")
+    if args.out_dir is None:
+        stage = "raw" if args.format == "raw" else "normalized"
+        args.out_dir = f"data/{stage}/synthetic/{args.source}"
+    suffix = "USDT" if args.source == "binance" else ""
+    symbols = args.symbols or [f"SYN{i + 1}{suffix}" for i in range(args.assets)]
+    seeds = np.random.SeedSequence(args.seed).spawn(len(symbols))
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        results = list(pool.map(generate_asset, [args] * len(symbols), symbols, seeds))
+    for res in results:
+        print(
+            f"[synthetic] {res['symbol']}: {res['bars']} bars ({res['dropped']} dropped as gaps) "
+            f"in {res['total_sec']:.2f}s -> {res['path']}"
+        )
+    total = sum(r["bars"] for r in results)
+    elapsed = time.perf_counter() - started
+    print(f"[synthetic] {len(results)} assets, {total} bars in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from assetpredict import COMMANDS, SCRIPTS_DIR
+
+CLI = SCRIPTS_DIR / "assetpredict.py"
+# packages that take 0.3-4s each to import on a cold interpreter
+HEAVY_PACKAGES = (
+    "catboost",
+    "lightgbm",
+    "sklearn",
+    "skl2onnx",
+    "onnxmltools",
+    "onnx",
+    "onnxruntime",
+    "scipy",
+    "joblib",
+)
+
+
+def _heavy_imports(importtime_log: str) -> Dict[str, float]:
+    """Heavy top-level packages in a ``-X importtime`` log and their cumulative ms."""
+    found: Dict[str, float] = {}
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        if not cumulative.isdigit() or "." in name:
+            continue
+        if name in HEAVY_PACKAGES:
+            found[name] = max(found.get(name, 0.0), int(cumulative) / 1000)
+    return found
+
+
+def measure(argv: List[str], repeats: int) -> Dict[str, object]:
+    """Median wall time of ``python argv...`` in fresh interpreters, plus heavy imports."""
+    cmd = [sys.executable, *argv]
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        timings.append(time.perf_counter() - started)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{' '.join(argv)} exited {proc.returncode}: {proc.stderr.strip()[-500:]}")
+    # a separate run: -X importtime itself slows imports down
+    traced = subprocess.run([sys.executable, "-X", "importtime", *argv], capture_output=True, text=True)
+    return {
+        "argv": argv[1:] if argv[0] == str(CLI) else argv,
+        "median_sec": round(statistics.median(timings), 3),
+        "min_sec": round(min(timings), 3),
+        "heavy_imports_ms": _heavy_imports(traced.stderr),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure cold-start time of every assetpredict command (run with --help)."
+    )
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per command.")
+    parser.add_argument("--out", default=None, help="Optional JSON report path.")
+    parser.add_argument(
+        "--fail-on-heavy",
+        action="store_true",
+        help="Exit non-zero when any command's --help imports a heavy package.",
+    )
+    args = parser.parse_args()
+
+    # a bare interpreter is the floor every command starts from
+    runs = {"(python)": ["-c", "pass"], "(dispatcher)": [str(CLI), "--help"]}
+    for command, targets in COMMANDS.items():
+        for target in targets:
+            runs[f"{command} {target}"] = [str(CLI), command, target, "--help"]
+    results: Dict[str, Dict[str, object]] = {}
+    for name, argv in runs.items():
+        entry = measure(argv, args.repeats)
+        results[name] = entry
+        heavy = ", ".join(entry["heavy_imports_ms"]) or "-"
+        print(f"[startup] {name:<22} {entry['median_sec']:.3f}s  heavy: {heavy}")
+
+    heavy_commands = [name for name, entry in results.items() if entry["heavy_imports_ms"]]
+    if args.out:
+        report = {"python": sys.version.split()[0], "repeats": args.repeats, "commands": results}
+        Path(args.out).write_text(json.dumps(report, ensure_ascii=True, indent=2))
+        print(f"[startup] saved -> {args.out}")
+    if heavy_commands and args.fail_on_heavy:
+        raise SystemExit(f"--help imports heavy packages: {', '.join(heavy_commands)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List
+
+import numpy as np
+
+from check_onnx_batch import has_dynamic_batch
+from tune_onnx_session import create_session, session_options, tuned_config
+
+# onnxruntime loads in the benchmark processes and main(), not on --help
+if TYPE_CHECKING:
+    import onnxruntime as ort
+
+ROOT = Path(__file__).resolve().parents[2]
+PUBLIC_DIR = ROOT / "apps" / "web" / "public"
+DEFAULT_MANIFESTS = ",".join(
+    f"apps/web/src/config/{name}" for name in ("ml.manifest.json", "ml.lgbm_v1.json", "ml.catboost_v1.json")
+)
+DEFAULT_BATCHES = "1,8,64,512,4096"
+# p99 is the median of per-block p99s, so one stall moves a single block
+LATENCY_BLOCKS = 5
+
+# metric -> (direction, allowed ratio vs baseline, noise floor below which changes never flag)
+THRESHOLDS: Dict[str, tuple] = {
+    "session_create_ms": ("lower", 1.5, 2.0),
+    "latency_p50_ms": ("lower", 1.25, 0.01),
+    "latency_p99_ms": ("lower", 1.5, 0.1),
+    "peak_rss_mb": ("lower", 1.2, 8.0),
+    "max_rows_per_sec": ("higher", 0.8, 0.0),
+}
+
+
+def _parse_ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _rows_per_sec(session: ort.InferenceSession, X: np.ndarray, min_sec: float) -> float:
+    name = session.get_inputs()[0].name
+    session.run(None, {name: X})
+    runs, started = 0, time.perf_counter()
+    while True:
+        session.run(None, {name: X})
+        runs += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_sec:
+            return runs * len(X) / elapsed
+
+
+def bench_model(
+    path: str,
+    batches: List[int],
+    threads: List[int],
+    repeats: int,
+    min_sec: float,
+    seed: int,
+    tuned: Dict[str, Dict[str, object]] | None = None,
+) -> Dict[str, object]:
+    """Benchmark one ONNX file with its manifest's tuned ``sessionOptions``."""
+    import onnxruntime as ort
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    create_ms = []
+    for _ in range(5):
+        started = time.perf_counter()
+        session = create_session(path, tuned, batch=1)
+        create_ms.append((time.perf_counter() - started) * 1000)
+    inp = session.get_inputs()[0]
+    dynamic = has_dynamic_batch(session)
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((max(batches), inp.shape[1])).astype(np.float32)
+
+    for _ in range(10):
+        session.run(None, {inp.name: X[:1]})
+    timings = []
+    for i in range(repeats):
+        row = X[i % len(X) : i % len(X) + 1]
+        started = time.perf_counter()
+        session.run(None, {inp.name: row})
+        timings.append((time.perf_counter() - started) * 1000)
+
+    throughput = {}
+    for b in batches:
+        if dynamic or b == 1:
+            batch_session = create_session(path, tuned, batch=b) if tuned else session
+            throughput[str(b)] = _rows_per_sec(batch_session, X[:b], min_sec)
+    scaling_batch = max(batches) if dynamic else 1
+    scaling = {}
+    for n in threads:
+        config = {**tuned_config(tuned, scaling_batch), "intraOpNumThreads": n}
+        scaled = ort.InferenceSession(
+            path, sess_options=session_options(config), providers=["CPUExecutionProvider"]
+        )
+        scaling[str(n)] = _rows_per_sec(scaled, X[:scaling_batch], min_sec)
+
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "path": path,
+        "bytes": Path(path).stat().st_size,
+        "dynamic_batch": dynamic,
+        "session_create_ms": float(np.median(create_ms)),
+        "latency_p50_ms": float(np.percentile(timings, 50)),
+        "latency_p99_ms": float(
+            np.median([np.percentile(block, 99) for block in np.array_split(timings, LATENCY_BLOCKS)])
+        ),
+        "rows_per_sec": throughput,
+        "max_rows_per_sec": max(throughput.values()),
+        "thread_scaling": {"batch": scaling_batch, "rows_per_sec": scaling},
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": rss_after / 1024,
+        "peak_rss_delta_mb": (rss_after - rss_before) / 1024,
+    }
+
+
+def collect_models(manifests: List[Path]) -> Dict[str, Dict[str, str]]:
+    """Model name -> path/version for every manifest model and its quant variant."""
+    models: Dict[str, Dict[str, str]] = {}
+    for manifest_path in manifests:
+        manifest = json.loads(manifest_path.read_text())
+        for key in ("path", "quantPath"):
+            if key not in manifest:
+                continue
+            path = PUBLIC_DIR / manifest[key].lstrip("/")
+            name = path.name[: -len(".onnx")]
+            if path.exists():
+                models[name] = {
+                    "path": path.as_posix(),
+                    "model_ver": manifest.get("modelVer", ""),
+                    "session_options": manifest.get("sessionOptions", {}),
+                }
+            else:
+                print(f"[bench] {name}: {path} missing, skipped")
+    return models
+
+
+def compare(report: Dict[str, object], baseline: Dict[str, object]) -> List[str]:
+    """Regressions of ``report`` against ``baseline`` beyond ``THRESHOLDS``."""
+    regressions = []
+    for name, entry in report["models"].items():
+        base = baseline.get("models", {}).get(name)
+        if base is None:
+            continue
+        for metric, (direction, limit, floor) in THRESHOLDS.items():
+            ratio = entry[metric] / base[metric] if base[metric] else 1.0
+            worse = ratio > limit if direction == "lower" else ratio < limit
+            if worse and abs(entry[metric] - base[metric]) > floor:
+                regressions.append(
+                    f"{name} ({base['model_ver']} -> {entry['model_ver']}): {metric} "
+                    f"{base[metric]:.4g} -> {entry[metric]:.4g} (x{ratio:.2f}, limit x{limit})"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark exported ONNX forecasters on CPUExecutionProvider and flag regressions."
+    )
+    parser.add_argument(
+        "--manifests",
+        default=DEFAULT_MANIFESTS,
+        help="Comma-separated manifests; each model and its quantPath variant is benchmarked.",
+    )
+    parser.add_argument("--batches", default=DEFAULT_BATCHES, type=_parse_ints)
+    parser.add_argument(
+        "--threads",
+        default=None,
+        type=_parse_ints,
+        help="intra_op_num_threads values for the scaling curve (default: 1,2,4.. up to the core count).",
+    )
+    parser.add_argument("--repeats", type=int, default=2000, help="Single-row runs for p50/p99.")
+    parser.add_argument("--min-sec", type=float, default=0.5, help="Minimum timed seconds per throughput point.")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default="docs/modeling/onnx_bench_v1.json")
+    parser.add_argument("--baseline", default=None, help="Earlier report to compare against.")
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="Exit non-zero when a metric crosses its threshold.",
+    )
+    args = parser.parse_args()
+
+    import onnxruntime as ort
+
+    cores = os.cpu_count() or 1
+    threads = args.threads or [n for n in (1, 2, 4, 8, 16, 32) if n <= cores]
+    models = collect_models([Path(p.strip()) for p in args.manifests.split(",") if p.strip()])
+
+    results: Dict[str, Dict[str, object]] = {}
+    # one process per model, so peak RSS is per model
+    ctx = multiprocessing.get_context("spawn")
+    for name, info in models.items():
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            entry = pool.submit(
+                bench_model,
+                info["path"],
+                args.batches,
+                threads,
+                args.repeats,
+                args.min_sec,
+                args.seed,
+                info["session_options"],
+            ).result()
+        path = Path(entry["path"])
+        entry["path"] = path.relative_to(ROOT).as_posix() if path.is_relative_to(ROOT) else path.as_posix()
+        results[name] = {"model_ver": info["model_ver"], "tuned": bool(info["session_options"]), **entry}
+        print(
+            f"[bench] {name}: create={entry['session_create_ms']:.1f}ms "
+            f"p50={entry['latency_p50_ms']:.4f}ms p99={entry['latency_p99_ms']:.4f}ms "
+            f"max={entry['max_rows_per_sec']:.0f} rows/s rss={entry['peak_rss_mb']:.0f}MB"
+        )
+
+    report = {
+        "onnxruntime": ort.__version__,
+        "machine": {"cpu_count": cores, "platform": platform.platform(), "processor": platform.processor()},
+        "batches": args.batches,
+        "threads": threads,
+        "thresholds": {
+            k: {"direction": d, "ratio": r, "floor": f} for k, (d, r, f) in THRESHOLDS.items()
+        },
+        "models": results,
+    }
+    regressions: List[str] = []
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()))
+        report["baseline"] = args.baseline
+        report["regressions"] = regressions
+        for line in regressions:
+            print(f"[bench] REGRESSION {line}")
+        if not regressions:
+            print("[bench] no regressions against the baseline")
+
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(report, ensure_ascii=True, indent=2))
+    print(f"[bench] saved -> {out_path}")
+    if regressions and args.fail_on_regression:
+        raise SystemExit(f"{len(regressions)} benchmark regression(s)")
+
+
+if __name__ == "__main__":
+    main()
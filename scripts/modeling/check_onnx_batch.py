@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List
+
+import numpy as np
+
+# onnxruntime loads in main(), so --help and importers of has_dynamic_batch stay fast
+if TYPE_CHECKING:
+    import onnxruntime as ort
+
+def _parse_paths(value: str) -> List[Path]:
+    return [Path(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def has_dynamic_batch(session: ort.InferenceSession) -> bool:
+    """True when the first input's batch axis is symbolic (``None``/``"N"``)."""
+    return not isinstance(session.get_inputs()[0].shape[0], int)
+
+
+def batch_vs_loop(
+    session: ort.InferenceSession, X: np.ndarray, repeats: int = 3
+) -> Dict[str, float]:
+    """Score ``X`` row by row and as one batch; outputs must agree."""
+    input_name = session.get_inputs()[0].name
+    loop = np.concatenate([session.run(None, {input_name: X[i : i + 1]})[0] for i in range(len(X))])
+    batched = session.run(None, {input_name: X})[0]
+    loop_sec = batch_sec = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for i in range(len(X)):
+            session.run(None, {input_name: X[i : i + 1]})
+        loop_sec = min(loop_sec, time.perf_counter() - started)
+        started = time.perf_counter()
+        session.run(None, {input_name: X})
+        batch_sec = min(batch_sec, time.perf_counter() - started)
+    return {
+        "rows": len(X),
+        "max_abs_diff": float(np.abs(batched - loop).max()),
+        "loop_rows_per_sec": len(X) / loop_sec,
+        "batch_rows_per_sec": len(X) / batch_sec,
+        "speedup": loop_sec / batch_sec,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check that ONNX forecasters accept any batch size and measure batched vs per-row throughput."
+    )
+    parser.add_argument(
+        "--models",
+        default="apps/web/public/models/forecast_minimal.onnx",
+        type=_parse_paths,
+        help="Comma-separated ONNX files.",
+    )
+    parser.add_argument("--rows", type=int, default=4096)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--atol", type=float, default=1e-5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=None, help="Optional JSON report path.")
+    args = parser.parse_args()
+
+    import onnxruntime as ort
+
+    rng = np.random.default_rng(args.seed)
+    report: Dict[str, object] = {}
+    failed = []
+    for path in args.models:
+        options = ort.SessionOptions()
+        # catboost declares a 1-D output but returns [N, 1]; ORT warns on every run
+        options.log_severity_level = 3
+        session = ort.InferenceSession(
+            str(path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        if not has_dynamic_batch(session):
+            print(f"[batch] {path}: fixed batch axis {session.get_inputs()[0].shape}, re-export it")
+            failed.append(str(path))
+            continue
+        X = rng.standard_normal((args.rows, session.get_inputs()[0].shape[1])).astype(np.float32)
+        result = batch_vs_loop(session, X, args.repeats)
+        report[str(path)] = result
+        if result["max_abs_diff"] > args.atol:
+            failed.append(str(path))
+        print(
+            f"[batch] {path}: diff={result['max_abs_diff']:.2e} "
+            f"loop={result['loop_rows_per_sec']:.0f} rows/s "
+            f"batch={result['batch_rows_per_sec']:.0f} rows/s (x{result['speedup']:.1f})"
+        )
+
+    if args.out:
+        out_path = Path(args.out)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(json.dumps(report, ensure_ascii=True, indent=2))
+        print(f"[batch] saved -> {out_path}")
+    if failed:
+        raise SystemExit(f"batch check failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import onnxruntime as ort
+from catboost import CatBoostRegressor
+
+from feature_dataset import (
+    add_split_filter_args,
+    load_split,
+    split_filters,
+    zscore_apply,
+    zscore_stats,
+    zscore_stats_from_meta,
+)
+from train_forecast_catboost_v1 import evaluate
+from tree_onnx import catboost_to_onnx
+
+
+def _parse_dirs(value: str) -> List[Path]:
+    return [Path(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def _new_model(args: argparse.Namespace, loss_function: str) -> CatBoostRegressor:
+    return CatBoostRegressor(
+        loss_function=loss_function,
+        iterations=args.iterations,
+        depth=args.depth,
+        learning_rate=args.learning_rate,
+        random_seed=args.random_state,
+        verbose=0,
+        allow_writing_files=False,
+    )
+
+
+def _latency_ms(sessions: List[ort.InferenceSession], X: np.ndarray, repeats: int) -> Dict[str, float]:
+    """Batch-1 latency of producing every horizon, i.e. one run per session."""
+    names = [s.get_inputs()[0].name for s in sessions]
+    timings = []
+    for i in range(repeats):
+        row = X[i % len(X) : i % len(X) + 1]
+        started = time.perf_counter()
+        for session, name in zip(sessions, names):
+            session.run(None, {name: row})
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+    }
+
+
+def _measure(
+    models: List[CatBoostRegressor],
+    fit_sec: float,
+    X_val: np.ndarray,
+    y_val: np.ndarray,
+    last_close: np.ndarray,
+    work_dir: Path,
+    repeats: int,
+) -> Dict[str, object]:
+    cbm_bytes = 0
+    onnx_bytes = 0
+    sessions = []
+    for i, model in enumerate(models):
+        cbm_path = work_dir / f"model_{i}.cbm"
+        model.save_model(str(cbm_path))
+        cbm_bytes += cbm_path.stat().st_size
+        onnx_blob = catboost_to_onnx(model).SerializeToString()
+        onnx_bytes += len(onnx_blob)
+        sessions.append(ort.InferenceSession(onnx_blob, providers=["CPUExecutionProvider"]))
+    pred = np.column_stack([m.predict(X_val).reshape(len(X_val), -1) for m in models])
+    return {
+        "models": len(models),
+        "fit_sec": round(fit_sec, 3),
+        "cbm_bytes": cbm_bytes,
+        "onnx_bytes": onnx_bytes,
+        "latency": _latency_ms(sessions, X_val, repeats),
+        "metrics": evaluate(y_val, pred, last_close),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare per-target CatBoost models with one MultiRMSE model."
+    )
+    parser.add_argument(
+        "--data-dirs",
+        default="data/features/v1/binance",
+        type=_parse_dirs,
+        help="Comma-separated feature directories.",
+    )
+    parser.add_argument("--horizons", type=int, default=24)
+    parser.add_argument("--random-state", type=int, default=7)
+    parser.add_argument("--iterations", type=int, default=600)
+    parser.add_argument("--depth", type=int, default=7)
+    parser.add_argument("--learning-rate", type=float, default=0.05)
+    parser.add_argument("--max-rows", type=int, default=None)
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--out", default="docs/modeling/catboost_multitarget_v1.json")
+    add_split_filter_args(parser)
+    args = parser.parse_args()
+
+    targets = [f"target_{k}" for k in range(1, args.horizons + 1)]
+    read = {"target_columns": targets, **split_filters(args)}
+    train = load_split(args.data_dirs, "train", max_rows=args.max_rows, **read)
+    val = load_split(args.data_dirs, "val", max_rows=args.max_rows, **read)
+    stats = zscore_stats_from_meta(
+        args.data_dirs, "train", max_rows=args.max_rows, **split_filters(args)
+    )
+    mean, std = stats if stats is not None else zscore_stats(train.X)
+    X_train = zscore_apply(train.X, mean, std, out=train.X)
+    X_val = zscore_apply(val.X, mean, std, out=val.X)
+
+    started = time.perf_counter()
+    per_target = [
+        _new_model(args, "RMSE").fit(X_train, train.y[:, k]) for k in range(len(targets))
+    ]
+    per_target_sec = time.perf_counter() - started
+    print(f"[compare] per-target: {len(per_target)} models in {per_target_sec:.2f}s")
+
+    started = time.perf_counter()
+    multi = _new_model(args, "MultiRMSE").fit(X_train, train.y)
+    multi_sec = time.perf_counter() - started
+    print(f"[compare] MultiRMSE: 1 model in {multi_sec:.2f}s")
+
+    with tempfile.TemporaryDirectory(prefix="catboost-compare-") as tmp:
+        work_dir = Path(tmp)
+        report = {
+            "targets": targets,
+            "splits": {"train": len(X_train), "val": len(X_val)},
+            "filters": split_filters(args),
+            "params": {
+                "iterations": args.iterations,
+                "depth": args.depth,
+                "learning_rate": args.learning_rate,
+                "random_state": args.random_state,
+            },
+            "per_target": _measure(
+                per_target, per_target_sec, X_val, val.y, val.last_close, work_dir, args.repeats
+            ),
+            "multi_target": _measure(
+                [multi], multi_sec, X_val, val.y, val.last_close, work_dir, args.repeats
+            ),
+        }
+
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(report, ensure_ascii=True, indent=2))
+    print(f"[compare] saved -> {out_path}")
+    for name in ("per_target", "multi_target"):
+        entry = report[name]
+        print(
+            f"[compare] {name}: fit={entry['fit_sec']:.2f}s onnx={entry['onnx_bytes']}B "
+            f"p50={entry['latency']['p50_ms']:.3f}ms mae={entry['metrics']['mae_delta']:.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
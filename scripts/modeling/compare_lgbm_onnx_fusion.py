@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import onnx
+import onnxruntime as ort
+
+from export_forecast_models_v1 import lgbm_per_horizon_onnx
+from feature_dataset import add_split_filter_args, load_split, split_filters, zscore_apply
+from lgbm_model import load_lgbm
+from tree_onnx import lgbm_to_onnx
+
+
+def _parse_dirs(value: str) -> List[Path]:
+    return [Path(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def _latency_ms(
+    session: ort.InferenceSession, X: np.ndarray, batch: int, repeats: int
+) -> Dict[str, float]:
+    timings = []
+    for i in range(repeats):
+        start = (i * batch) % max(1, len(X) - batch + 1)
+        rows = X[start : start + batch]
+        started = time.perf_counter()
+        session.run(None, {"input": rows})
+        timings.append((time.perf_counter() - started) * 1000)
+    p50 = float(np.percentile(timings, 50))
+    return {
+        "p50_ms": p50,
+        "p95_ms": float(np.percentile(timings, 95)),
+        "rows_per_sec": batch / p50 * 1000 if p50 > 0 else float("inf"),
+    }
+
+
+def _measure(
+    onnx_model: onnx.ModelProto,
+    native: np.ndarray,
+    X: np.ndarray,
+    batch: int,
+    repeats: int,
+) -> Dict[str, object]:
+    blob = onnx_model.SerializeToString()
+    session = ort.InferenceSession(blob, providers=["CPUExecutionProvider"])
+    pred = session.run(None, {"input": X})[0]
+    return {
+        "onnx_bytes": len(blob),
+        "nodes": [n.op_type for n in onnx_model.graph.node],
+        "max_abs_diff": float(np.abs(pred - native).max()),
+        "batch_1": _latency_ms(session, X, 1, repeats),
+        f"batch_{batch}": _latency_ms(session, X, batch, max(5, repeats // 20)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the per-horizon skl2onnx LGBM graph with the fused TreeEnsemble graph."
+    )
+    parser.add_argument("--model", default="data/models/v1/lgbm/forecast_lgbm_v1.joblib")
+    parser.add_argument(
+        "--data-dirs",
+        default="data/features/v1/binance",
+        type=_parse_dirs,
+        help="Comma-separated feature directories (val rows are the inputs).",
+    )
+    parser.add_argument("--max-rows", type=int, default=None)
+    parser.add_argument("--batch", type=int, default=1024)
+    parser.add_argument("--repeats", type=int, default=500)
+    parser.add_argument("--out", default="docs/modeling/lgbm_onnx_fusion_v1.json")
+    add_split_filter_args(parser)
+    args = parser.parse_args()
+
+    model_path = Path(args.model)
+    model = load_lgbm(model_path)
+    meta = json.loads(model_path.with_suffix(".meta.json").read_text())
+    norm = meta["normalization"]
+    val = load_split(
+        args.data_dirs,
+        "val",
+        max_rows=args.max_rows,
+        target_columns=meta["target_columns"],
+        **split_filters(args),
+    )
+    X = zscore_apply(
+        val.X,
+        np.asarray(norm["mean"], dtype=np.float32),
+        np.asarray(norm["std"], dtype=np.float32),
+        out=val.X,
+    )
+    batch = min(args.batch, len(X))
+    native = model.predict(X)
+
+    # both graphs get a symbolic batch axis so the batched run is comparable
+    graphs = {
+        "per_horizon": lgbm_per_horizon_onnx(model, batch=None),
+        "fused": lgbm_to_onnx(model.boosters),
+    }
+    report = {
+        "model": str(model_path),
+        "horizons": len(model.boosters),
+        "trees": sum(booster.num_trees() for booster in model.boosters),
+        "rows": len(X),
+        "batch": batch,
+        **{name: _measure(g, native, X, batch, args.repeats) for name, g in graphs.items()},
+    }
+
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(report, ensure_ascii=True, indent=2))
+    for name in graphs:
+        entry = report[name]
+        print(
+            f"[fusion] {name}: {len(entry['nodes'])} nodes, {entry['onnx_bytes']}B, "
+            f"diff={entry['max_abs_diff']:.2e}, batch1 p50={entry['batch_1']['p50_ms']:.3f}ms, "
+            f"batch{batch} p50={entry[f'batch_{batch}']['p50_ms']:.3f}ms"
+        )
+    print(f"[fusion] saved -> {out_path}")
+
+
+if __name__ == "__main__":
+    main()
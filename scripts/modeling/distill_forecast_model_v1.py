@@ -0,0 +1,386 @@
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List
+
+import numpy as np
+
+from export_forecast_models_v1 import (
+    DOCS_DIR,
+    EPS,
+    FEATURE_WINDOW,
+    MODEL_DIR,
+    TAIL_SIZE,
+    _load_bars,
+    _pick_tails,
+    _write_sha,
+    build_test_vectors,
+    export_lgbm,
+)
+from feature_dataset import (
+    FEATURE_COLUMNS,
+    add_split_filter_args,
+    load_split,
+    split_filters,
+    zscore_apply,
+)
+from lgbm_model import load_lgbm
+from train_forecast_lgbm_v1 import evaluate
+
+# sklearn, skl2onnx and the ONNX runtime load where they are used
+if TYPE_CHECKING:
+    import onnx
+    import onnxruntime as ort
+
+ROOT = Path(__file__).resolve().parents[2]
+CONFIG_DIR = ROOT / "apps" / "web" / "src" / "config"
+
+
+def _parse_dirs(value: str) -> List[Path]:
+    return [Path(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def _parse_list(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+@dataclass
+class Student:
+    """One student spec: ``ridge`` or ``mlp:<width>[x<width>...]``."""
+
+    name: str
+
+    def build(self, args: argparse.Namespace):
+        from sklearn.linear_model import Ridge
+        from sklearn.neural_network import MLPRegressor
+
+        if self.name == "ridge":
+            return Ridge(alpha=args.ridge_alpha)
+        kind, _, layers = self.name.partition(":")
+        if kind != "mlp" or not layers:
+            raise ValueError(f"unknown student {self.name!r} (use ridge or mlp:32x16)")
+        return MLPRegressor(
+            hidden_layer_sizes=tuple(int(w) for w in layers.split("x")),
+            learning_rate_init=args.mlp_learning_rate,
+            max_iter=args.mlp_epochs,
+            early_stopping=True,
+            n_iter_no_change=10,
+            random_state=args.random_state,
+        )
+
+
+def _output_reshape(graph: onnx.GraphProto) -> onnx.NodeProto:
+    # walk back from the graph output through the trailing Cast to its Reshape
+    producers = {out: node for node in graph.node for out in node.output}
+    node = producers.get(graph.output[0].name)
+    while node is not None and node.op_type != "Reshape":
+        node = producers.get(node.input[0])
+    if node is None:
+        raise ValueError(f"no Reshape feeds graph output {graph.output[0].name!r}")
+    return node
+
+
+def student_to_onnx(
+    model,
+    horizon: int,
+    X: np.ndarray,
+    rtol: float = 1e-3,
+    atol: float = 1e-4,
+) -> onnx.ModelProto:
+    """ONNX graph of a student, checked against ``model.predict`` on ``X``."""
+    import onnx
+    import onnxruntime as ort
+    from onnx import numpy_helper
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    from sklearn.neural_network import MLPRegressor
+
+    onnx_model = convert_sklearn(
+        model,
+        initial_types=[("input", FloatTensorType([None, len(FEATURE_COLUMNS)]))],
+        target_opset=17,
+        final_types=[("delta", FloatTensorType([None, horizon]))],
+    )
+    if isinstance(model, MLPRegressor):
+        # skl2onnx reshapes MLPRegressor scores to (-1, 1) even with several outputs
+        reshape = _output_reshape(onnx_model.graph)
+        shape = numpy_helper.from_array(
+            np.array([-1, horizon], dtype=np.int64), f"{reshape.name}_shape"
+        )
+        old, reshape.input[1] = reshape.input[1], shape.name
+        onnx_model.graph.initializer.append(shape)
+        if not any(old in node.input for node in onnx_model.graph.node):
+            inits = onnx_model.graph.initializer
+            inits.remove(next(init for init in inits if init.name == old))
+    onnx.checker.check_model(onnx_model)
+
+    session = ort.InferenceSession(
+        onnx_model.SerializeToString(), providers=["CPUExecutionProvider"]
+    )
+    got = session.run(None, {"input": X})[0]
+    native = model.predict(X)
+    if not np.allclose(got, native, rtol=rtol, atol=atol):
+        raise ValueError(f"ONNX/native mismatch: max abs diff {np.abs(got - native).max():.3g}")
+    return onnx_model
+
+
+def _latency_ms(session: ort.InferenceSession, X: np.ndarray, repeats: int) -> Dict[str, float]:
+    name = session.get_inputs()[0].name
+    timings = []
+    for i in range(repeats):
+        row = X[i % len(X) : i % len(X) + 1]
+        started = time.perf_counter()
+        session.run(None, {name: row})
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+    }
+
+
+def _measure(
+    onnx_bytes: bytes,
+    fit_sec: float,
+    pred: np.ndarray,
+    teacher_pred: np.ndarray,
+    y_val: np.ndarray,
+    last_close: np.ndarray,
+    X_val: np.ndarray,
+    repeats: int,
+) -> Dict[str, object]:
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(onnx_bytes, providers=["CPUExecutionProvider"])
+    return {
+        "fit_sec": round(fit_sec, 3),
+        "onnx_bytes": len(onnx_bytes),
+        "latency": _latency_ms(session, X_val, repeats),
+        "metrics": evaluate(y_val, pred, last_close),
+        # how closely the student reproduces the teacher on val
+        "fidelity_mae": float(np.mean(np.abs(pred - teacher_pred))),
+    }
+
+
+def mark_frontier(entries: Dict[str, Dict[str, object]]) -> List[str]:
+    """Names not dominated on (mae_delta, p50 latency, onnx bytes), best mae first."""
+
+    def _point(entry: Dict[str, object]) -> tuple:
+        return (entry["metrics"]["mae_delta"], entry["latency"]["p50_ms"], entry["onnx_bytes"])
+
+    frontier = []
+    for name, entry in entries.items():
+        point = _point(entry)
+        dominated = any(
+            all(o <= p for o, p in zip(_point(other), point)) and _point(other) != point
+            for other_name, other in entries.items()
+            if other_name != name
+        )
+        entry["frontier"] = not dominated
+        if not dominated:
+            frontier.append(name)
+    return sorted(frontier, key=lambda n: entries[n]["metrics"]["mae_delta"])
+
+
+def export_student(
+    args: argparse.Namespace,
+    onnx_model: onnx.ModelProto,
+    entry: Dict[str, object],
+    mean: np.ndarray,
+    std: np.ndarray,
+) -> None:
+    """Write the student like the other browser models: ONNX + sha, test vectors, manifest."""
+    import onnxruntime as ort
+
+    onnx_path = MODEL_DIR / f"{args.model_name}.onnx"
+    onnx_path.parent.mkdir(parents=True, exist_ok=True)
+    onnx_path.write_bytes(onnx_model.SerializeToString())
+    digest = _write_sha(onnx_path)
+
+    session = ort.InferenceSession(onnx_path.as_posix(), providers=["CPUExecutionProvider"])
+    horizon = session.get_outputs()[0].shape[1]
+    tails = _pick_tails(_load_bars(Path(args.data_bars)), horizon, count=2)
+    vectors = build_test_vectors(
+        session, mean.tolist(), std.tolist(), tails, args.model_ver, horizon, "input"
+    )
+    stem = args.model_name.removeprefix("forecast_")
+    tv_path = DOCS_DIR / f"test_vectors_{stem}.json"
+    tv_path.parent.mkdir(parents=True, exist_ok=True)
+    tv_path.write_text(json.dumps(vectors, ensure_ascii=True, indent=2))
+
+    manifest = {
+        "modelName": args.model_name,
+        "modelVer": args.model_ver,
+        "path": f"/models/{args.model_name}.onnx",
+        "onnxSha256": digest,
+        "inputShape": [1, len(FEATURE_COLUMNS)],
+        "dynamicBatch": vectors["dynamic_batch"],
+        "horizonSteps": horizon,
+        "featureWindow": FEATURE_WINDOW,
+        "tailSize": TAIL_SIZE,
+        "normalization": {
+            "type": "zscore",
+            "mean": mean.tolist(),
+            "std": std.tolist(),
+            "epsilon": EPS,
+        },
+        "features": [{"name": n} for n in FEATURE_COLUMNS],
+        "outputs": ["delta"],
+        "postprocess": "last_close_plus_delta",
+        "rtol": 1e-3,
+        "atol": 1e-4,
+        "val_metrics": entry["metrics"],
+    }
+    manifest_path = CONFIG_DIR / f"ml.{stem}.json"
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=True, indent=2))
+    print(f"[distill] exported {args.export} -> {onnx_path}")
+    print(f"[distill] test vectors -> {tv_path}")
+    print(f"[distill] manifest -> {manifest_path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Distill the LGBM multi-horizon teacher into small ONNX students."
+    )
+    parser.add_argument(
+        "--data-dirs",
+        default="data/features/v1/binance",
+        type=_parse_dirs,
+        help="Comma-separated feature directories.",
+    )
+    parser.add_argument("--teacher", default="data/models/v1/lgbm/forecast_lgbm_v1.joblib")
+    parser.add_argument(
+        "--students",
+        default="ridge,mlp:16,mlp:32,mlp:64x32",
+        type=_parse_list,
+        help="Comma-separated students: ridge or mlp:<hidden widths joined by x>.",
+    )
+    parser.add_argument(
+        "--truth-weight",
+        type=float,
+        default=0.0,
+        help="Blend of true targets into the teacher labels (0 = pure distillation).",
+    )
+    parser.add_argument("--ridge-alpha", type=float, default=1.0)
+    parser.add_argument("--mlp-epochs", type=int, default=200)
+    parser.add_argument("--mlp-learning-rate", type=float, default=1e-3)
+    parser.add_argument("--random-state", type=int, default=7)
+    parser.add_argument("--max-rows", type=int, default=None)
+    parser.add_argument("--repeats", type=int, default=200)
+    add_split_filter_args(parser)
+    parser.add_argument("--out-dir", default="data/models/v1/distill")
+    parser.add_argument("--report", default="docs/modeling/distill_frontier_v1.json")
+    parser.add_argument(
+        "--export",
+        default=None,
+        help="Student to export to the web app (a --students entry, or 'frontier' for "
+        "the most accurate frontier student).",
+    )
+    parser.add_argument("--model-name", default="forecast_distill_v1")
+    parser.add_argument("--model-ver", default="distill-0-1-0")
+    parser.add_argument("--data-bars", default="data/normalized/binance/BTCUSDT_1h.json")
+    args = parser.parse_args()
+    from joblib import dump
+
+    teacher_path = Path(args.teacher)
+    teacher = load_lgbm(teacher_path)
+    teacher_meta = json.loads(teacher_path.with_suffix(".meta.json").read_text())
+    if teacher_meta["features"] != FEATURE_COLUMNS:
+        raise ValueError(f"{teacher_path} was trained on different features")
+    norm = teacher_meta["normalization"]
+    mean = np.asarray(norm["mean"], dtype=np.float32)
+    std = np.asarray(norm["std"], dtype=np.float32)
+
+    # students reuse the teacher's inputs, so the manifest normalization carries over
+    read = {"target_columns": teacher_meta["target_columns"], **split_filters(args)}
+    train = load_split(args.data_dirs, "train", max_rows=args.max_rows, **read)
+    val = load_split(args.data_dirs, "val", max_rows=args.max_rows, **read)
+    X_train = zscore_apply(train.X, mean, std, out=train.X)
+    X_val = zscore_apply(val.X, mean, std, out=val.X)
+
+    started = time.perf_counter()
+    soft = teacher.predict(X_train).astype(np.float32)
+    labels = (1 - args.truth_weight) * soft + args.truth_weight * train.y
+    teacher_val = teacher.predict(X_val)
+    print(
+        f"[distill] teacher labels for {len(X_train)} rows in "
+        f"{time.perf_counter() - started:.2f}s"
+    )
+
+    entries: Dict[str, Dict[str, object]] = {}
+    onnx_models: Dict[str, onnx.ModelProto] = {}
+    with tempfile.TemporaryDirectory(prefix="distill-") as tmp:
+        teacher_onnx = Path(tmp) / "teacher.onnx"
+        export_lgbm(teacher_path, teacher_onnx)
+        entries["teacher"] = _measure(
+            teacher_onnx.read_bytes(),
+            float(teacher_meta.get("lineage", {}).get("fit_sec", 0.0)),
+            teacher_val,
+            teacher_val,
+            val.y,
+            val.last_close,
+            X_val,
+            args.repeats,
+        )
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for spec in args.students:
+        student = Student(spec).build(args)
+        started = time.perf_counter()
+        student.fit(X_train, labels)
+        fit_sec = time.perf_counter() - started
+        onnx_models[spec] = student_to_onnx(student, labels.shape[1], X_val[:2048])
+        entries[spec] = _measure(
+            onnx_models[spec].SerializeToString(),
+            fit_sec,
+            student.predict(X_val),
+            teacher_val,
+            val.y,
+            val.last_close,
+            X_val,
+            args.repeats,
+        )
+        dump(student, out_dir / f"{args.model_name}_{spec.replace(':', '_')}.joblib")
+        entry = entries[spec]
+        print(
+            f"[distill] {spec}: fit={fit_sec:.2f}s onnx={entry['onnx_bytes']}B "
+            f"p50={entry['latency']['p50_ms']:.3f}ms mae={entry['metrics']['mae_delta']:.4f} "
+            f"fidelity={entry['fidelity_mae']:.4f}"
+        )
+
+    frontier = mark_frontier(entries)
+    report = {
+        "teacher": str(teacher_path),
+        "target_columns": teacher_meta["target_columns"],
+        "splits": {"train": len(X_train), "val": len(X_val)},
+        "filters": split_filters(args),
+        "truth_weight": args.truth_weight,
+        "frontier": frontier,
+        "models": entries,
+    }
+    report_path = Path(args.report)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, ensure_ascii=True, indent=2))
+    print(f"[distill] frontier: {', '.join(frontier)}")
+    print(f"[distill] report -> {report_path}")
+
+    if args.export:
+        choice = args.export
+        if choice == "frontier":
+            choice = next((n for n in frontier if n != "teacher"), None)
+            if choice is None:
+                raise ValueError("no student is on the frontier")
+            args.export = choice
+        if choice not in onnx_models:
+            raise ValueError(f"--export {choice!r} is not one of --students")
+        export_student(args, onnx_models[choice], entries[choice], mean, std)
+
+
+if __name__ == "__main__":
+    main()
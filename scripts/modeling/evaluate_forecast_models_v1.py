@@ -6,11 +6,14 @@ from pathlib import Path
 from typing import Dict, Iterable, List, Tuple
 
 import numpy as np
-from catboost import CatBoostRegressor
-from joblib import load
-from sklearn.metrics import mean_absolute_error, mean_squared_error
 
-from feature_dataset import load_split, zscore_apply
+from feature_dataset import (
+    add_split_filter_args,
+    load_split,
+    split_filters,
+    zscore_apply,
+)
+from lgbm_model import load_lgbm
 
 
 def _parse_dirs(value: str) -> List[Path]:
@@ -55,6 +58,8 @@ def _metrics(
     y_pred: np.ndarray,
     last_close: np.ndarray,
 ) -> Dict[str, object]:
+    from sklearn.metrics import mean_absolute_error, mean_squared_error
+
     mae = float(mean_absolute_error(y_true, y_pred))
     rmse = float(np.sqrt(mean_squared_error(y_true, y_pred)))
 
@@ -104,7 +109,7 @@ def evaluate_lgbm(
 ) -> Dict[str, object]:
     meta = _load_meta(meta_path)
     Xn = _normalize(X, meta)
-    model = load(model_path)
+    model = load_lgbm(model_path)
     pred = model.predict(Xn)
     pred = np.asarray(pred, dtype=np.float32)
 
@@ -126,19 +131,23 @@ def evaluate_catboost(
     last_close: np.ndarray,
     split_targets: List[str],
 ) -> Dict[str, object]:
+    from catboost import CatBoostRegressor
+
     meta = _load_meta(meta_path)
     wanted = meta.get("target_columns") or []
     if not wanted:
         raise ValueError("CatBoost meta has no target_columns")
 
+    # single-target models score on a 1-D column, MultiRMSE ones per horizon
     y_sel, target_columns = _select_targets(split_targets, wanted, y)
-    y_sel = y_sel[:, 0]
+    if y_sel.shape[1] == 1:
+        y_sel = y_sel[:, 0]
     Xn = _normalize(X, meta)
 
     model = CatBoostRegressor()
     model.load_model(model_path)
     pred = model.predict(Xn)
-    pred = np.asarray(pred, dtype=np.float32).reshape(-1)
+    pred = np.asarray(pred, dtype=np.float32).reshape(y_sel.shape)
 
     metrics = _metrics(y_sel, pred, last_close)
     baseline = _metrics(y_sel, _baseline(y_sel.shape), last_close)
@@ -187,16 +196,18 @@ def main() -> None:
     )
     parser.add_argument("--skip-lgbm", action="store_true")
     parser.add_argument("--skip-cat", action="store_true")
+    add_split_filter_args(parser)
     args = parser.parse_args()
 
     print(f"[metrics] loading split={args.split} from {args.data_dirs}")
-    split = load_split(args.data_dirs, args.split)
+    split = load_split(args.data_dirs, args.split, **split_filters(args))
     print(
         f"[metrics] loaded rows={split.X.shape[0]} targets={len(split.target_columns)}"
     )
     results: Dict[str, object] = {
         "split": args.split,
         "rows": int(split.X.shape[0]),
+        "filters": split_filters(args),
         "targets": split.target_columns,
         "models": [],
     }
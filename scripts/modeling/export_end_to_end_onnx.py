@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+
+from export_forecast_models_v1 import MODEL_DIR, TAIL_SIZE, _load_bars, _pick_tails, _write_sha
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Wrap an exported forecaster with its featurizer, z-score constants and "
+            "last_close_plus_delta postprocess: close tail [N, T] -> p50 in one run."
+        )
+    )
+    parser.add_argument(
+        "--manifest",
+        default="apps/web/src/config/ml.manifest.json",
+        help="Manifest of the model to wrap (path, normalization).",
+    )
+    parser.add_argument("--model", default=None, help="ONNX file (default: the manifest path).")
+    parser.add_argument("--out", default=None, help="Output file (default: <model>.e2e.onnx).")
+    parser.add_argument("--data-bars", default="data/normalized/binance/BTCUSDT_1h.json")
+    parser.add_argument("--cases", type=int, default=256, help="Tails checked against the Python featurizer.")
+    parser.add_argument(
+        "--update-manifest",
+        action="store_true",
+        help="Record e2ePath/e2eSha256 in the manifest.",
+    )
+    args = parser.parse_args()
+
+    # the graph builder pulls in onnx and onnxruntime; --help does not need them
+    import onnx
+
+    from pipeline_onnx import check_end_to_end_parity, end_to_end_onnx
+
+    manifest_path = Path(args.manifest)
+    manifest = json.loads(manifest_path.read_text())
+    model_path = Path(args.model) if args.model else MODEL_DIR / Path(manifest["path"]).name
+    out_path = Path(args.out) if args.out else model_path.with_name(model_path.stem + ".e2e.onnx")
+    norm = manifest["normalization"]
+
+    model = onnx.load(model_path.as_posix())
+    e2e = end_to_end_onnx(model, norm["mean"], norm["std"], norm.get("epsilon", 1e-6))
+
+    tails = _pick_tails(_load_bars(Path(args.data_bars)), 0, count=args.cases)
+    closes = np.asarray([[float(p[1]) for p in tail] for tail in tails], dtype=np.float64)
+    parity = check_end_to_end_parity(e2e, model, closes[:, -TAIL_SIZE:], norm["mean"], norm["std"])
+    print(
+        f"[e2e] parity on {parity['cases']} tails: max abs delta diff "
+        f"{parity['max_abs_delta_diff']:.3g}, p50 diff {parity['max_abs_p50_diff']:.3g}"
+    )
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_bytes(e2e.SerializeToString())
+    digest = _write_sha(out_path)
+    if args.update_manifest:
+        manifest["e2ePath"] = f"/models/{out_path.name}"
+        manifest["e2eSha256"] = digest
+        manifest_path.write_text(json.dumps(manifest, ensure_ascii=True, indent=2) + "\n")
+        print(f"[e2e] manifest -> {manifest_path}")
+    print(f"[e2e] saved -> {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,34 +4,27 @@ import argparse
 import hashlib
 import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple
-
-ROOT = Path(__file__).resolve().parents[2]
-MPL_DIR = ROOT / ".mplconfig"
-MPL_DIR.mkdir(parents=True, exist_ok=True)
-os.environ.setdefault("MPLCONFIGDIR", str(MPL_DIR))
+from typing import TYPE_CHECKING, Dict, List, Tuple
 
 import numpy as np
-import onnx
-import onnxruntime as ort
-from catboost import CatBoostRegressor
-from lightgbm import LGBMRegressor
-from joblib import load
-from onnxmltools.convert.lightgbm.operator_converters.LightGbm import (
-    convert_lightgbm,
-)
-from onnxruntime.quantization import QuantType, quantize_dynamic
-from skl2onnx import convert_sklearn, update_registered_converter
-from skl2onnx.common.data_types import FloatTensorType
-from skl2onnx.common.shape_calculator import (
-    calculate_linear_regressor_output_shapes,
-)
 
+from export_registry import ExportRegistry, converter_versions, export_key
 from feature_dataset import FEATURE_COLUMNS
+from lgbm_model import HorizonBoosters, load_lgbm
+
+# converters and runtimes load inside the functions that use them, not on import
+if TYPE_CHECKING:
+    import onnx
+    import onnxruntime as ort
 
+ROOT = Path(__file__).resolve().parents[2]
+MPL_DIR = ROOT / ".mplconfig"
 MODEL_DIR = ROOT / "apps" / "web" / "public" / "models"
 DOCS_DIR = ROOT / "docs" / "modeling"
+CONFIG_DIR = ROOT / "apps" / "web" / "src" / "config"
 
 FEATURE_WINDOW = 64
 TAIL_SIZE = 128
@@ -111,21 +104,93 @@ def _write_sha(path: Path) -> str:
     return digest
 
 
-def export_lgbm(model_path: Path, out_path: Path) -> None:
-    model = load(model_path)
-    update_registered_converter(
-        LGBMRegressor,
-        "LgbmRegressor",
-        calculate_linear_regressor_output_shapes,
-        convert_lightgbm,
+def lgbm_per_horizon_onnx(model: HorizonBoosters, batch: int | None = None) -> onnx.ModelProto:
+    """onnxmltools graph: one tree-ensemble node per horizon, then a concat."""
+    from onnx import TensorProto, helper
+    from onnxmltools import convert_lightgbm
+    from onnxmltools.convert.common.data_types import FloatTensorType
+
+    from tree_onnx import ONNX_IR_VERSION, ONNX_ML_OPSET, ONNX_OPSET
+
+    nodes, initializers, outputs = [], [], []
+    for idx, booster in enumerate(model.boosters):
+        graph = convert_lightgbm(
+            booster,
+            initial_types=[("input", FloatTensorType([batch, len(FEATURE_COLUMNS)]))],
+            target_opset=15,
+        ).graph
+        # every horizon graph names its tensors alike; prefix all but the shared input
+        local = {name for node in graph.node for name in node.output}
+        local |= {init.name for init in graph.initializer}
+        for node in graph.node:
+            node.name = f"h{idx}_{node.name}"
+            node.input[:] = [f"h{idx}_{n}" if n in local else n for n in node.input]
+            node.output[:] = [f"h{idx}_{n}" for n in node.output]
+            nodes.append(node)
+        for init in graph.initializer:
+            init.name = f"h{idx}_{init.name}"
+            initializers.append(init)
+        outputs.append(f"h{idx}_{graph.output[0].name}")
+    nodes.append(helper.make_node("Concat", outputs, ["delta"], axis=1))
+    graph = helper.make_graph(
+        nodes,
+        "lgbm_per_horizon",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, [batch, len(FEATURE_COLUMNS)])],
+        [helper.make_tensor_value_info("delta", TensorProto.FLOAT, [batch, len(model.boosters)])],
+        initializers,
     )
-    onnx_model = convert_sklearn(
-        model,
-        initial_types=[("input", FloatTensorType([1, len(FEATURE_COLUMNS)]))],
-        target_opset={"": 17, "ai.onnx.ml": 3},
-        final_types=[("delta", FloatTensorType([1, HORIZON]))],
+    return helper.make_model(
+        graph,
+        opset_imports=[
+            helper.make_opsetid("", ONNX_OPSET),
+            helper.make_opsetid("ai.onnx.ml", ONNX_ML_OPSET),
+        ],
+        ir_version=ONNX_IR_VERSION,
     )
+
+
+def check_lgbm_parity(
+    model: HorizonBoosters,
+    onnx_model: onnx.ModelProto,
+    rows: int = 2048,
+    rtol: float = 1e-3,
+    atol: float = 1e-4,
+) -> float:
+    """Max abs difference between the ONNX graph and the native model on
+    z-scored inputs; raises when it exceeds the test-vector tolerances."""
+    import onnxruntime as ort
+
+    X = np.random.default_rng(0).standard_normal((rows, len(FEATURE_COLUMNS))).astype(np.float32)
+    session = ort.InferenceSession(
+        onnx_model.SerializeToString(), providers=["CPUExecutionProvider"]
+    )
+    batch = session.get_inputs()[0].shape[0]
+    if isinstance(batch, int):
+        onnx_pred = np.vstack([session.run(None, {"input": X[i : i + 1]})[0] for i in range(rows)])
+    else:
+        onnx_pred = session.run(None, {"input": X})[0]
+    native = model.predict(X)
+    if not np.allclose(onnx_pred, native, rtol=rtol, atol=atol):
+        raise ValueError(
+            f"ONNX/native mismatch: max abs diff {np.abs(onnx_pred - native).max():.3g}"
+        )
+    return float(np.abs(onnx_pred - native).max())
+
+
+def export_lgbm(model_path: Path, out_path: Path, fused: bool = True) -> None:
+    import onnx
+
+    from tree_onnx import lgbm_to_onnx
+
+    model = load_lgbm(model_path)
+    if fused:
+        # one TreeEnsembleRegressor with n_targets=HORIZON instead of 24 + Concat
+        onnx_model = lgbm_to_onnx(model.boosters)
+    else:
+        onnx_model = lgbm_per_horizon_onnx(model)
     onnx.checker.check_model(onnx_model)
+    diff = check_lgbm_parity(model, onnx_model)
+    print(f"[export] LGBM {'fused' if fused else 'per-horizon'} graph parity: max abs diff {diff:.3g}")
     out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_bytes(onnx_model.SerializeToString())
 
@@ -136,6 +201,8 @@ def maybe_quantize(path: Path) -> Path | None:
     size_mb = path.stat().st_size / (1024 * 1024)
     if size_mb <= 5:
         return None
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
     quant_path = path.with_name(path.stem + ".quant.onnx")
     quantize_dynamic(
         model_input=path.as_posix(),
@@ -147,9 +214,17 @@ def maybe_quantize(path: Path) -> Path | None:
 
 
 def export_catboost(model_path: Path, out_path: Path) -> None:
+    from catboost import CatBoostRegressor
+
+    from tree_onnx import catboost_to_onnx
+
     model = CatBoostRegressor()
     model.load_model(model_path)
     out_path.parent.mkdir(parents=True, exist_ok=True)
+    if model.get_all_params()["loss_function"] == "MultiRMSE":
+        # CatBoost exports MultiRMSE as a classifier graph; build the trees ourselves
+        out_path.write_bytes(catboost_to_onnx(model).SerializeToString())
+        return
     model.save_model(out_path, format="onnx", export_parameters={"onnx_opset_version": 17})
 
 
@@ -163,6 +238,7 @@ def build_test_vectors(
     input_name: str,
 ) -> Dict[str, object]:
     cases = []
+    batch_dim = session.get_inputs()[0].shape[0]
     for idx, tail in enumerate(tails):
         closes = [float(p[1]) for p in tail]
         features = _build_features(closes[-FEATURE_WINDOW:])
@@ -188,12 +264,159 @@ def build_test_vectors(
         "horizon": horizon,
         "window": FEATURE_WINDOW,
         "feature_count": len(FEATURE_COLUMNS),
+        "dynamic_batch": not isinstance(batch_dim, int),
         "rtol": 1e-3,
         "atol": 1e-4,
         "cases": cases,
     }
 
 
+def _remove_artifact(path: Path) -> None:
+    for p in (path, path.with_suffix(path.suffix + ".sha256")):
+        if p.exists():
+            p.unlink()
+
+
+def _write_test_vectors(tv: Dict[str, object], name: str) -> Path:
+    DOCS_DIR.mkdir(parents=True, exist_ok=True)
+    path = DOCS_DIR / name
+    path.write_text(json.dumps(tv, ensure_ascii=True, indent=2))
+    return path
+
+
+def _update_manifest(name: str, dynamic_batch: bool) -> None:
+    # not an export output: tune/optimize rewrite the same file
+    path = CONFIG_DIR / name
+    if not path.exists():
+        print(f"[export] {path} missing, dynamicBatch not recorded")
+        return
+    manifest = json.loads(path.read_text())
+    manifest["dynamicBatch"] = dynamic_batch
+    path.write_text(json.dumps(manifest, ensure_ascii=True, indent=2) + "\n")
+    print(f"[export] manifest {path.name}: dynamicBatch={dynamic_batch}")
+
+
+def _split_parity(
+    model_path: str,
+    meta: Dict[str, object],
+    artifacts: List[Path],
+    parity_dirs: List[str],
+    parity_split: str,
+) -> Path:
+    """Full-split native/ONNX parity of ``artifacts``; raises ``ValueError`` on a violation."""
+    from onnx_parity import check_parity, full_split_parity, load_native
+
+    report = full_split_parity(
+        load_native(Path(model_path)),
+        {p.name: p for p in artifacts},
+        meta,
+        [Path(d) for d in parity_dirs],
+        parity_split,
+    )
+    report_path = Path(model_path).with_suffix(".parity.json")
+    report_path.write_text(json.dumps(report, ensure_ascii=True, indent=2))
+    for name, entry in report["artifacts"].items():
+        print(
+            f"[export] {name}: {parity_split} parity on {entry['rows']} rows, "
+            f"max abs {max(entry['per_horizon']['max_abs']):.3g}, violations {entry['violations']}"
+        )
+    check_parity(report)
+    return report_path
+
+
+def export_lgbm_job(
+    model_path: str,
+    meta_path: str,
+    bars_path: str,
+    model_ver: str,
+    fused: bool,
+    parity_dirs: List[str],
+    parity_split: str,
+) -> List[str]:
+    """Convert, quantize and validate LGBM; a failed export leaves no artifact behind."""
+    import onnxruntime as ort
+
+    meta = json.loads(Path(meta_path).read_text())
+    tails = _pick_tails(_load_bars(Path(bars_path)), HORIZON, count=2)
+    out = MODEL_DIR / "forecast_lgbm_v1.onnx"
+    try:
+        export_lgbm(Path(model_path), out, fused=fused)
+        _write_sha(out)
+        session = ort.InferenceSession(out.as_posix(), providers=["CPUExecutionProvider"])
+        quant = maybe_quantize(out)
+        parity = []
+        if parity_dirs:
+            artifacts = [out] if quant is None else [out, quant]
+            parity = [_split_parity(model_path, meta, artifacts, parity_dirs, parity_split)]
+        tv = build_test_vectors(
+            session,
+            meta["normalization"]["mean"],
+            meta["normalization"]["std"],
+            tails,
+            model_ver,
+            HORIZON,
+            "input",
+        )
+    except Exception:
+        # the quantized file may exist even if maybe_quantize did not return
+        _remove_artifact(out)
+        _remove_artifact(out.with_name(out.stem + ".quant.onnx"))
+        raise
+    written = [out, out.with_suffix(".onnx.sha256"), _write_test_vectors(tv, "test_vectors_lgbm.json")]
+    _update_manifest("ml.lgbm_v1.json", tv["dynamic_batch"])
+    if quant is not None:
+        written += [quant, quant.with_suffix(".onnx.sha256")]
+    written += parity
+    print(f"[export] LGBM -> {out}")
+    return [p.as_posix() for p in written]
+
+
+def export_catboost_job(
+    model_path: str,
+    meta_path: str,
+    bars_path: str,
+    model_ver: str,
+    parity_dirs: List[str],
+    parity_split: str,
+) -> List[str]:
+    """Convert and validate CatBoost; a failed export leaves no artifact behind."""
+    import onnxruntime as ort
+
+    meta = json.loads(Path(meta_path).read_text())
+    out = MODEL_DIR / "forecast_catboost_v1.onnx"
+    try:
+        export_catboost(Path(model_path), out)
+        _write_sha(out)
+        horizon = max(1, len(meta.get("target_columns", [])))
+        tails = _pick_tails(_load_bars(Path(bars_path)), horizon, count=2)
+        session = ort.InferenceSession(out.as_posix(), providers=["CPUExecutionProvider"])
+        tv = build_test_vectors(
+            session,
+            meta["normalization"]["mean"],
+            meta["normalization"]["std"],
+            tails,
+            model_ver,
+            horizon,
+            session.get_inputs()[0].name,
+        )
+        parity = _split_parity(model_path, meta, [out], parity_dirs, parity_split) if parity_dirs else None
+    except Exception:
+        _remove_artifact(out)
+        raise
+    written = [out, out.with_suffix(".onnx.sha256"), _write_test_vectors(tv, "test_vectors_catboost.json")]
+    _update_manifest("ml.catboost_v1.json", tv["dynamic_batch"])
+    if parity is not None:
+        written.append(parity)
+    print(f"[export] CatBoost -> {out}")
+    return [p.as_posix() for p in written]
+
+
+def _timed_job(job, kwargs: Dict[str, object]) -> Tuple[List[str], float]:
+    started = time.perf_counter()
+    outputs = job(**kwargs)
+    return outputs, time.perf_counter() - started
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Export LGBM/CatBoost to ONNX.")
     parser.add_argument("--data-bars", default="data/normalized/binance/BTCUSDT_1h.json")
@@ -203,83 +426,133 @@ def main() -> None:
     parser.add_argument("--cat-ver", default="cat-0-1-0")
     parser.add_argument("--lgbm-meta", default="data/models/v1/lgbm/forecast_lgbm_v1.meta.json")
     parser.add_argument("--cat-meta", default="data/models/v1/catboost/forecast_catboost_v1.meta.json")
-    args = parser.parse_args()
-
-    bars = _load_bars(Path(args.data_bars))
-    lgbm_horizon = HORIZON
-    tails = _pick_tails(bars, lgbm_horizon, count=2)
-
-    lgbm_meta = json.loads(Path(args.lgbm_meta).read_text())
-    cat_meta = json.loads(Path(args.cat_meta).read_text())
-
-    lgbm_out = MODEL_DIR / "forecast_lgbm_v1.onnx"
-    export_lgbm(Path(args.lgbm_model), lgbm_out)
-    _write_sha(lgbm_out)
-
-    cat_out = MODEL_DIR / "forecast_catboost_v1.onnx"
-    cat_exported = False
-    try:
-        export_catboost(Path(args.cat_model), cat_out)
-        _write_sha(cat_out)
-        cat_exported = True
-    except Exception as exc:
-        if cat_out.exists():
-            cat_out.unlink()
-        cat_sha = cat_out.with_suffix(cat_out.suffix + ".sha256")
-        if cat_sha.exists():
-            cat_sha.unlink()
-        print(f"[export] CatBoost ONNX failed: {exc}")
-
-    lgbm_sess = ort.InferenceSession(lgbm_out.as_posix(), providers=["CPUExecutionProvider"])
-    maybe_quantize(lgbm_out)
-
-    lgbm_tv = build_test_vectors(
-        lgbm_sess,
-        lgbm_meta["normalization"]["mean"],
-        lgbm_meta["normalization"]["std"],
-        tails,
-        args.lgbm_ver,
-        lgbm_horizon,
-        "input",
+    parser.add_argument(
+        "--lgbm-per-horizon",
+        action="store_true",
+        help="Export the onnxmltools graph (one ensemble per horizon) instead of the fused one.",
     )
-    cat_tv = None
-    if cat_exported:
-        try:
-            cat_horizon = max(1, len(cat_meta.get("target_columns", [])))
-            cat_tails = _pick_tails(bars, cat_horizon, count=2)
-            cat_sess = ort.InferenceSession(
-                cat_out.as_posix(), providers=["CPUExecutionProvider"]
-            )
-            cat_tv = build_test_vectors(
-                cat_sess,
-                cat_meta["normalization"]["mean"],
-                cat_meta["normalization"]["std"],
-                cat_tails,
-                args.cat_ver,
-                cat_horizon,
-                cat_sess.get_inputs()[0].name,
-            )
-        except Exception as exc:
-            print(f"[export] CatBoost ONNX validation failed: {exc}")
-            cat_exported = False
-            if cat_out.exists():
-                cat_out.unlink()
-            cat_sha = cat_out.with_suffix(cat_out.suffix + ".sha256")
-            if cat_sha.exists():
-                cat_sha.unlink()
-
-    DOCS_DIR.mkdir(parents=True, exist_ok=True)
-    (DOCS_DIR / "test_vectors_lgbm.json").write_text(
-        json.dumps(lgbm_tv, ensure_ascii=True, indent=2)
+    parser.add_argument(
+        "--registry",
+        default="data/models/v1/export_registry.json",
+        help="Hashes of each export's inputs, converters and outputs; unchanged exports are skipped.",
     )
-    if cat_tv:
-        (DOCS_DIR / "test_vectors_catboost.json").write_text(
-            json.dumps(cat_tv, ensure_ascii=True, indent=2)
-        )
+    parser.add_argument(
+        "--rebuild-manifest",
+        default="data/models/v1/export_rebuild.json",
+        help="What this run rebuilt or skipped, and why.",
+    )
+    parser.add_argument(
+        "--parity-data-dirs",
+        default="",
+        help=(
+            "Comma-separated feature directories whose --parity-split is streamed through the "
+            "native model and every ONNX artifact; an export fails on any value outside the "
+            "test-vector tolerances. Off by default."
+        ),
+    )
+    parser.add_argument("--parity-split", default="test")
+    parser.add_argument(
+        "--jobs",
+        default="lgbm,catboost",
+        help="Comma-separated exports to consider; the others are not loaded or touched.",
+    )
+    parser.add_argument("--force", action="store_true", help="Rebuild every export.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Exports converted concurrently (one process each).",
+    )
+    args = parser.parse_args()
+    selected = [j.strip() for j in args.jobs.split(",") if j.strip()]
+    unknown = sorted(set(selected) - {"lgbm", "catboost"})
+    if unknown:
+        parser.error(f"unknown --jobs {', '.join(unknown)}; choose from lgbm, catboost")
+    parity_dirs = [d.strip() for d in args.parity_data_dirs.split(",") if d.strip()]
+    missing = [d for d in parity_dirs if not Path(d).is_dir()]
+    if missing:
+        parser.error(f"--parity-data-dirs not found: {', '.join(missing)}")
+    # after argument parsing so --help has no side effects; workers inherit it
+    MPL_DIR.mkdir(parents=True, exist_ok=True)
+    os.environ.setdefault("MPLCONFIGDIR", str(MPL_DIR))
+
+    parity = {
+        "parity_dirs": parity_dirs,
+        "parity_split": args.parity_split,
+    }
+    jobs = {
+        "lgbm": (
+            export_lgbm_job,
+            {
+                "model_path": args.lgbm_model,
+                "meta_path": args.lgbm_meta,
+                "bars_path": args.data_bars,
+                "model_ver": args.lgbm_ver,
+                "fused": not args.lgbm_per_horizon,
+                **parity,
+            },
+        ),
+        "catboost": (
+            export_catboost_job,
+            {
+                "model_path": args.cat_model,
+                "meta_path": args.cat_meta,
+                "bars_path": args.data_bars,
+                "model_ver": args.cat_ver,
+                **parity,
+            },
+        ),
+    }
 
-    print(f"[export] LGBM -> {lgbm_out}")
-    if cat_exported:
-        print(f"[export] CatBoost -> {cat_out}")
+    converters = converter_versions()
+    registry = ExportRegistry(Path(args.registry), ROOT)
+    report: Dict[str, Dict[str, object]] = {}
+    pending = {}
+    for name, (job, kwargs) in jobs.items():
+        if name not in selected:
+            continue
+        # file contents, not paths, decide freshness
+        inputs = {k[: -len("_path")]: Path(v) for k, v in kwargs.items() if k.endswith("_path")}
+        params = {k: v for k, v in kwargs.items() if not k.endswith("_path")}
+        key = export_key(inputs, params, converters)
+        reasons = ["--force"] if args.force else registry.stale_reasons(name, key)
+        if reasons:
+            pending[name] = (job, kwargs, key, reasons)
+        else:
+            report[name] = {"status": "skipped", "reasons": [], "outputs": registry.outputs(name)}
+            print(f"[export] {name}: unchanged, skipped")
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(pending)))) as pool:
+            futures = {
+                name: pool.submit(_timed_job, job, kwargs) for name, (job, kwargs, _, _) in pending.items()
+            }
+            for name, future in futures.items():
+                _, _, key, reasons = pending[name]
+                try:
+                    outputs, seconds = future.result()
+                except Exception as exc:
+                    print(f"[export] {name} failed: {exc}")
+                    report[name] = {"status": "failed", "reasons": reasons, "error": str(exc)}
+                    continue
+                report[name] = {
+                    "status": "rebuilt",
+                    "reasons": reasons,
+                    "seconds": round(seconds, 3),
+                    "outputs": registry.record(name, key, [Path(p) for p in outputs]),
+                }
+                print(f"[export] {name}: rebuilt in {seconds:.2f}s ({'; '.join(reasons)})")
+    registry.save()
+
+    rebuild_path = Path(args.rebuild_manifest)
+    rebuild_path.parent.mkdir(parents=True, exist_ok=True)
+    rebuild_path.write_text(
+        json.dumps({"converters": converters, "jobs": report}, ensure_ascii=True, indent=2)
+    )
+    print(f"[export] rebuild manifest -> {rebuild_path}")
+    failed = [name for name, entry in report.items() if entry.get("status") == "failed"]
+    if failed:
+        raise SystemExit(f"[export] failed jobs: {', '.join(failed)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+# packages whose version changes what an export writes
+CONVERTER_PACKAGES = (
+    "numpy",
+    "onnx",
+    "onnxruntime",
+    "skl2onnx",
+    "onnxmltools",
+    "lightgbm",
+    "catboost",
+    "scikit-learn",
+)
+# our own converter code: a change here must rebuild too
+CONVERTER_SOURCES = ("export_forecast_models_v1.py", "lgbm_model.py", "tree_onnx.py")
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def converter_versions() -> Dict[str, str]:
+    versions: Dict[str, str] = {}
+    for name in CONVERTER_PACKAGES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = "missing"
+    here = Path(__file__).resolve().parent
+    for name in CONVERTER_SOURCES:
+        versions[name] = file_sha256(here / name)
+    return versions
+
+
+def export_key(
+    inputs: Dict[str, Path], params: Dict[str, object], converters: Dict[str, str]
+) -> Dict[str, object]:
+    """What an export depends on: input file hashes, parameters, converter versions."""
+    return {
+        "inputs": {name: file_sha256(path) for name, path in sorted(inputs.items())},
+        "params": params,
+        "converters": converters,
+    }
+
+
+def _rel(path: Path, root: Path) -> str:
+    path = path.resolve()
+    return path.relative_to(root).as_posix() if path.is_relative_to(root) else path.as_posix()
+
+
+class ExportRegistry:
+    """JSON record of each export job's key and the hashes of what it wrote."""
+
+    def __init__(self, path: Path, root: Path) -> None:
+        self.path = path
+        self.root = root.resolve()
+        self.entries: Dict[str, Dict[str, object]] = {}
+        if path.exists():
+            self.entries = json.loads(path.read_text()).get("jobs", {})
+
+    def stale_reasons(self, name: str, key: Dict[str, object]) -> List[str]:
+        """Why ``name`` must be rebuilt; empty when it is fresh."""
+        entry = self.entries.get(name)
+        if entry is None:
+            return ["not in registry"]
+        reasons: List[str] = []
+        for section in ("inputs", "params", "converters"):
+            before, after = entry["key"].get(section) or {}, key[section]
+            if before == after:
+                continue
+            changed = sorted(k for k in set(before) | set(after) if before.get(k) != after.get(k))
+            reasons.append(f"{section} changed: {', '.join(changed)}")
+        for rel, digest in entry["outputs"].items():
+            path = self.root / rel
+            if not path.exists():
+                reasons.append(f"missing {rel}")
+            elif file_sha256(path) != digest:
+                reasons.append(f"modified {rel}")
+        return reasons
+
+    def record(self, name: str, key: Dict[str, object], outputs: Sequence[Path]) -> Dict[str, str]:
+        hashed = {_rel(p, self.root): file_sha256(p) for p in outputs}
+        self.entries[name] = {"key": key, "outputs": hashed}
+        return hashed
+
+    def outputs(self, name: str) -> Dict[str, str]:
+        return dict(self.entries.get(name, {}).get("outputs", {}))
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({"jobs": self.entries}, ensure_ascii=True, indent=2))
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
-import csv
-from dataclasses import dataclass
+import argparse
+import itertools
+import json
+import os
+import warnings
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable, List, Sequence, Tuple
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
 
 import numpy as np
 
@@ -20,6 +25,9 @@ FEATURE_COLUMNS = [
     "ret_std_20",
 ]
 
+DEFAULT_BATCH_ROWS = 65_536
+_PARSE_CHUNK_ROWS = 65_536
+
 
 @dataclass
 class DatasetSplit:
@@ -27,6 +35,7 @@ class DatasetSplit:
     y: np.ndarray
     last_close: np.ndarray
     target_columns: List[str]
+    feature_columns: List[str] = field(default_factory=lambda: list(FEATURE_COLUMNS))
 
 
 def _parse_target_columns(columns: Sequence[str]) -> List[str]:
@@ -48,65 +57,636 @@ def _iter_feature_files(data_dirs: Iterable[Path], split: str) -> Iterable[Path]
                 yield path
 
 
-def _load_csv(path: Path) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+def _read_header(path: Path) -> List[str]:
     with path.open() as f:
-        reader = csv.DictReader(f)
-        if reader.fieldnames is None:
-            raise ValueError(f"Missing header in {path}")
-        target_columns = _parse_target_columns(reader.fieldnames)
-
-        X_rows: List[List[float]] = []
-        y_rows: List[List[float]] = []
-        last_close: List[float] = []
-        for row in reader:
-            X_rows.append([float(row[col]) for col in FEATURE_COLUMNS])
-            y_rows.append([float(row[col]) for col in target_columns])
-            last_close.append(float(row.get("last_close") or row.get("close") or 0.0))
-
-    return (
-        np.asarray(X_rows, dtype=np.float32),
-        np.asarray(y_rows, dtype=np.float32),
-        np.asarray(last_close, dtype=np.float32),
-        target_columns,
+        line = f.readline()
+    if not line.strip():
+        raise ValueError(f"Missing header in {path}")
+    return [c.strip() for c in line.rstrip("\r\n").split(",")]
+
+
+@dataclass
+class _CsvLayout:
+    """Column positions of a feature CSV, resolved once from its header."""
+
+    columns: List[str]
+    usecols: List[int]
+    ts_col: int | None
+    feature_columns: List[str]
+    target_columns: List[str]
+    features: List[int] = field(init=False)
+    targets: List[int] = field(init=False)
+    last_close: int | None = field(init=False)
+
+    def __post_init__(self) -> None:
+        index = {name: pos for pos, name in enumerate(self.columns)}
+        self.features = [index[c] for c in self.feature_columns]
+        self.targets = [index[c] for c in self.target_columns]
+        self.last_close = index.get("last_close", index.get("close"))
+
+    def select(
+        self,
+        path: Path,
+        feature_columns: Sequence[str] | None = None,
+        target_columns: Sequence[str] | None = None,
+    ) -> "_CsvLayout":
+        features = list(feature_columns) if feature_columns is not None else self.feature_columns
+        targets = list(target_columns) if target_columns is not None else self.target_columns
+        missing = [c for c in features + targets if c not in self.columns]
+        if missing:
+            raise ValueError(f"Missing columns {missing} in {path}")
+        return _CsvLayout(self.columns, self.usecols, self.ts_col, features, targets)
+
+    def narrow(self) -> "_CsvLayout":
+        """Layout of a matrix parsed with only the selected columns."""
+        keep = set(self.feature_columns) | set(self.target_columns)
+        if self.last_close is not None:
+            keep.add(self.columns[self.last_close])
+        pairs = [(c, u) for c, u in zip(self.columns, self.usecols) if c in keep]
+        return _CsvLayout(
+            [c for c, _ in pairs],
+            [u for _, u in pairs],
+            self.ts_col,
+            self.feature_columns,
+            self.target_columns,
+        )
+
+
+def _csv_layout(path: Path, header: Sequence[str]) -> _CsvLayout:
+    missing = [c for c in FEATURE_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"Missing feature columns {missing} in {path}")
+    return _CsvLayout(
+        columns=[c for c in header if c != "ts"],
+        usecols=[pos for pos, name in enumerate(header) if name != "ts"],
+        ts_col=header.index("ts") if "ts" in header else None,
+        feature_columns=list(FEATURE_COLUMNS),
+        target_columns=_parse_target_columns(header),
     )
 
 
-def load_split(
-    data_dirs: Iterable[Path], split: str, max_rows: int | None = None
-) -> DatasetSplit:
-    X_list: List[np.ndarray] = []
-    y_list: List[np.ndarray] = []
-    last_close_list: List[np.ndarray] = []
-    target_columns: List[str] | None = None
+def _cache_path(path: Path) -> Path:
+    return path.with_suffix(".npy")
+
+
+def _ts_path(path: Path) -> Path:
+    return path.with_suffix(".ts.npy")
+
+
+def _open_fresh(path: Path, cache_path: Path) -> np.ndarray | None:
+    try:
+        if cache_path.stat().st_mtime_ns < path.stat().st_mtime_ns:
+            return None
+        return np.load(cache_path, mmap_mode="r", allow_pickle=False)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_cache(path: Path, cache_path: Path, width: int) -> np.ndarray | None:
+    values = _open_fresh(path, cache_path)
+    if values is None:
+        return None
+    if values.ndim != 2 or values.shape[1] != width or values.dtype != np.float32:
+        return None
+    return values
+
+
+def _read_ts(path: Path) -> np.ndarray | None:
+    ts = _open_fresh(path, _ts_path(path))
+    if ts is None or ts.ndim != 1 or ts.dtype != np.int64:
+        return None
+    return ts
+
+
+def _save_atomic(dest: Path, values: np.ndarray) -> None:
+    tmp_path = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open("wb") as f:
+            np.save(f, values, allow_pickle=False)
+        os.replace(tmp_path, dest)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _parse_values(
+    source: Path | Sequence[str],
+    usecols: Sequence[int],
+    skiprows: int = 0,
+    max_rows: int | None = None,
+    dtype: type = np.float32,
+) -> np.ndarray:
+    with warnings.catch_warnings():
+        # header-only split files are valid for short series
+        warnings.simplefilter("ignore", UserWarning)
+        values = np.loadtxt(
+            source,
+            delimiter=",",
+            skiprows=skiprows,
+            usecols=usecols,
+            dtype=dtype,
+            ndmin=2,
+            max_rows=max_rows,
+        )
+    if values.size == 0:
+        return np.empty((0, len(usecols)), dtype=dtype)
+    return values
+
+
+def _count_lines(path: Path) -> int:
+    # blank lines (e.g. a trailing one) are skipped by the parser, so skip them here too
+    with path.open("rb") as f:
+        return sum(1 for line in f if line.strip())
 
+
+def _build_cache(path: Path, cache_path: Path, layout: _CsvLayout) -> np.ndarray:
+    """Parse ``path`` chunk by chunk straight into memory-mapped sidecars."""
+    rows = max(0, _count_lines(path) - 1)
+    with_ts = layout.ts_col is not None
+    # ts needs float64 to stay exact; values are rounded to float32 on store
+    usecols = ([layout.ts_col] if with_ts else []) + layout.usecols
+    tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        out = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.float32, shape=(rows, len(layout.usecols))
+        )
+        ts = np.empty(rows if with_ts else 0, dtype=np.int64)
+        offset = 0
+        with path.open() as f:
+            f.readline()
+            while True:
+                lines = list(itertools.islice(f, _PARSE_CHUNK_ROWS))
+                if not lines:
+                    break
+                chunk = _parse_values(lines, usecols, dtype=np.float64)
+                end = offset + len(chunk)
+                if with_ts:
+                    ts[offset:end] = chunk[:, 0]
+                    chunk = chunk[:, 1:]
+                out[offset:end] = chunk
+                offset = end
+        if offset != rows:
+            raise ValueError(f"Expected {rows} rows in {path}, parsed {offset}")
+        out.flush()
+        del out
+        if with_ts:
+            _save_atomic(_ts_path(path), ts)
+        os.replace(tmp_path, cache_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return np.load(cache_path, mmap_mode="r", allow_pickle=False)
+
+
+def _load_ts(path: Path, layout: _CsvLayout, use_cache: bool = True) -> np.ndarray:
+    """``ts`` column of a feature CSV, from its ``.ts.npy`` index when fresh."""
+    if layout.ts_col is None:
+        raise ValueError(f"No ts column in {path}")
+    if use_cache:
+        ts = _read_ts(path)
+        if ts is not None:
+            return ts
+    ts = _parse_values(path, [layout.ts_col], skiprows=1, dtype=np.int64)[:, 0]
+    if use_cache:
+        try:
+            _save_atomic(_ts_path(path), ts)
+        except OSError as exc:
+            print(f"[features] cache write skipped for {_ts_path(path)}: {exc}")
+    return ts
+
+
+def _load_values(
+    path: Path,
+    layout: _CsvLayout,
+    start: int,
+    stop: int,
+    use_cache: bool = True,
+    whole_file: bool = False,
+) -> Tuple[np.ndarray, _CsvLayout]:
+    """Float32 values of rows ``[start, stop)`` and the layout indexing them."""
+    cache_path = _cache_path(path)
+    if use_cache:
+        cached = _read_cache(path, cache_path, len(layout.usecols))
+        if cached is None and whole_file:
+            try:
+                cached = _build_cache(path, cache_path, layout)
+            except OSError as exc:
+                print(f"[features] cache write skipped for {cache_path}: {exc}")
+        if cached is not None:
+            return cached[start:stop], layout
+
+    narrow = layout.narrow()
+    values = _parse_values(
+        path, narrow.usecols, skiprows=1 + start, max_rows=max(0, stop - start)
+    )
+    return values, narrow
+
+
+def _series_name(path: Path, split: str) -> str:
+    return path.name[: -len(f"_{split}.csv")]
+
+
+def _read_split_meta(path: Path, split: str) -> Dict[str, object]:
+    meta_path = path.with_name(f"{_series_name(path, split)}_meta.json")
+    if not meta_path.is_file():
+        return {}
+    return json.loads(meta_path.read_text())
+
+
+def _count_rows(path: Path, split: str, meta: Dict[str, object]) -> int:
+    """Row count of a split file, from the ``_meta.json`` written by build_features."""
+    splits = meta.get("splits") or {}
+    if split in splits:
+        return int(splits[split])
+    # no meta next to the CSV: count data lines without parsing them
+    return max(0, _count_lines(path) - 1)
+
+
+def _matches_symbols(path: Path, split: str, symbols: Sequence[str]) -> bool:
+    # series files are named {SYMBOL}_{TF}; accept either form
+    series = _series_name(path, split).upper()
+    symbol = series.rsplit("_", 1)[0]
+    wanted = {s.upper() for s in symbols}
+    return series in wanted or symbol in wanted
+
+
+def _ts_overlaps(
+    meta: Dict[str, object], split: str, ts_range: Tuple[int | None, int | None]
+) -> bool:
+    bounds = (meta.get("ts_range") or {}).get(split)
+    if not bounds:
+        return True
+    first, last = bounds
+    start, end = ts_range
+    if start is not None and last < start:
+        return False
+    if end is not None and first >= end:
+        return False
+    return True
+
+
+@dataclass
+class _FilePlan:
+    path: Path
+    layout: _CsvLayout
+    start: int
+    stop: int
+    whole_file: bool
+
+    @property
+    def rows(self) -> int:
+        return self.stop - self.start
+
+
+def _plan_split(
+    data_dirs: Iterable[Path],
+    split: str,
+    max_rows: int | None,
+    use_cache: bool,
+    feature_columns: Sequence[str] | None,
+    target_columns: Sequence[str] | None,
+    ts_range: Tuple[int | None, int | None] | None,
+    symbols: Sequence[str] | None,
+) -> List[_FilePlan]:
+    """Decide which files and row ranges a read needs, without parsing values."""
+    plans: List[_FilePlan] = []
     for path in _iter_feature_files(data_dirs, split):
-        X, y, last_close, targets = _load_csv(path)
-        if target_columns is None:
-            target_columns = targets
-        elif target_columns != targets:
+        if symbols and not _matches_symbols(path, split, symbols):
+            continue
+        meta = _read_split_meta(path, split)
+        if ts_range and not _ts_overlaps(meta, split, ts_range):
+            continue
+        full = _csv_layout(path, _read_header(path))
+        layout = full.select(path, feature_columns, target_columns)
+        if plans and plans[0].layout.target_columns != layout.target_columns:
             raise ValueError(f"Target columns mismatch in {path}")
 
-        if max_rows is not None and len(X) > max_rows:
-            X = X[:max_rows]
-            y = y[:max_rows]
-            last_close = last_close[:max_rows]
+        if ts_range:
+            ts = _load_ts(path, layout, use_cache=use_cache)
+            start_ts, end_ts = ts_range
+            start = 0 if start_ts is None else int(np.searchsorted(ts, start_ts, "left"))
+            stop = len(ts) if end_ts is None else int(np.searchsorted(ts, end_ts, "left"))
+        else:
+            start, stop = 0, _count_rows(path, split, meta)
+        if max_rows is not None:
+            stop = min(stop, start + max_rows)
+        if stop <= start:
+            continue
+        whole_file = (
+            not ts_range
+            and max_rows is None
+            and layout.narrow().usecols == full.narrow().usecols
+        )
+        plans.append(_FilePlan(path, layout, start, stop, whole_file))
+    return plans
+
 
-        X_list.append(X)
-        y_list.append(y)
-        last_close_list.append(last_close)
+def load_split(
+    data_dirs: Iterable[Path],
+    split: str,
+    max_rows: int | None = None,
+    use_cache: bool = True,
+    feature_columns: Sequence[str] | None = None,
+    target_columns: Sequence[str] | None = None,
+    ts_range: Tuple[int | None, int | None] | None = None,
+    symbols: Sequence[str] | None = None,
+) -> DatasetSplit:
+    """Load all ``*_{split}.csv`` files into one preallocated float32 split."""
+    plans = _plan_split(
+        data_dirs,
+        split,
+        max_rows,
+        use_cache,
+        feature_columns,
+        target_columns,
+        ts_range,
+        symbols,
+    )
+    if not plans:
+        raise FileNotFoundError(f"No feature rows found for split={split}")
 
-    if not X_list:
-        raise FileNotFoundError(f"No feature files found for split={split}")
+    first = plans[0].layout
+    total = sum(plan.rows for plan in plans)
+    X = np.empty((total, len(first.feature_columns)), dtype=np.float32)
+    y = np.empty((total, len(first.target_columns)), dtype=np.float32)
+    last_close = np.empty(total, dtype=np.float32)
+
+    offset = 0
+    for plan in plans:
+        values, layout = _load_values(
+            plan.path,
+            plan.layout,
+            plan.start,
+            plan.stop,
+            use_cache=use_cache,
+            whole_file=plan.whole_file,
+        )
+        # a stale meta can only shrink what we copy, never overrun the buffer
+        n = min(plan.rows, len(values))
+        values = values[:n]
+        end = offset + n
+        np.take(values, layout.features, axis=1, out=X[offset:end])
+        np.take(values, layout.targets, axis=1, out=y[offset:end])
+        if layout.last_close is None:
+            last_close[offset:end] = 0.0
+        else:
+            last_close[offset:end] = values[:, layout.last_close]
+        offset = end
 
-    X_all = np.concatenate(X_list, axis=0)
-    y_all = np.concatenate(y_list, axis=0)
-    last_close_all = np.concatenate(last_close_list, axis=0)
     return DatasetSplit(
-        X=X_all,
-        y=y_all,
-        last_close=last_close_all,
-        target_columns=target_columns or [],
+        X=X[:offset],
+        y=y[:offset],
+        last_close=last_close[:offset],
+        target_columns=first.target_columns,
+        feature_columns=first.feature_columns,
+    )
+
+
+@dataclass
+class SplitFile:
+    """One feature file of a split, backed by its memory-mapped ``.npy`` sidecar."""
+
+    path: Path
+    values: np.ndarray
+    layout: _CsvLayout
+
+    @property
+    def rows(self) -> int:
+        return len(self.values)
+
+    @property
+    def target_columns(self) -> List[str]:
+        return self.layout.target_columns
+
+    def features(self, idx: int | slice = slice(None)) -> np.ndarray:
+        return np.take(self.values[idx], self.layout.features, axis=-1)
+
+    def target(self, target_idx: int) -> np.ndarray:
+        return np.array(self.values[:, self.layout.targets[target_idx]], dtype=np.float32)
+
+
+def open_split(
+    data_dirs: Iterable[Path],
+    split: str,
+    max_rows: int | None = None,
+    feature_columns: Sequence[str] | None = None,
+    target_columns: Sequence[str] | None = None,
+    ts_range: Tuple[int | None, int | None] | None = None,
+    symbols: Sequence[str] | None = None,
+) -> List[SplitFile]:
+    """Open every ``*_{split}.csv`` without loading it, building sidecars as needed."""
+    plans = _plan_split(
+        data_dirs,
+        split,
+        max_rows,
+        True,
+        feature_columns,
+        target_columns,
+        ts_range,
+        symbols,
     )
+    if not plans:
+        raise FileNotFoundError(f"No feature rows found for split={split}")
+
+    files: List[SplitFile] = []
+    for plan in plans:
+        cache_path = _cache_path(plan.path)
+        values = _read_cache(plan.path, cache_path, len(plan.layout.usecols))
+        if values is None:
+            values = _build_cache(plan.path, cache_path, plan.layout)
+        files.append(
+            SplitFile(path=plan.path, values=values[plan.start : plan.stop], layout=plan.layout)
+        )
+    return files
+
+
+def iter_batches(
+    files: Sequence[SplitFile],
+    batch_size: int = DEFAULT_BATCH_ROWS,
+    shuffle_blocks: bool = False,
+    block_rows: int | None = None,
+    seed: int | None = None,
+) -> Iterator[DatasetSplit]:
+    """Yield fixed-size float32 batches across ``files``; the last may be short."""
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    block_rows = block_rows or batch_size
+    blocks = [
+        (file_idx, start, min(start + block_rows, f.rows))
+        for file_idx, f in enumerate(files)
+        for start in range(0, f.rows, block_rows)
+    ]
+    rng = np.random.default_rng(seed)
+    if shuffle_blocks:
+        blocks = [blocks[i] for i in rng.permutation(len(blocks))]
+
+    target_columns = files[0].target_columns if files else []
+    feature_columns = files[0].layout.feature_columns if files else list(FEATURE_COLUMNS)
+
+    def _new_batch() -> DatasetSplit:
+        return DatasetSplit(
+            X=np.empty((batch_size, len(feature_columns)), dtype=np.float32),
+            y=np.empty((batch_size, len(target_columns)), dtype=np.float32),
+            last_close=np.empty(batch_size, dtype=np.float32),
+            target_columns=target_columns,
+            feature_columns=feature_columns,
+        )
+
+    batch = _new_batch()
+    filled = 0
+    for file_idx, start, stop in blocks:
+        f = files[file_idx]
+        block = f.values[start:stop]
+        if shuffle_blocks:
+            block = block[rng.permutation(len(block))]
+        pos = 0
+        while pos < len(block):
+            n = min(batch_size - filled, len(block) - pos)
+            part = block[pos : pos + n]
+            end = filled + n
+            np.take(part, f.layout.features, axis=1, out=batch.X[filled:end])
+            np.take(part, f.layout.targets, axis=1, out=batch.y[filled:end])
+            if f.layout.last_close is None:
+                batch.last_close[filled:end] = 0.0
+            else:
+                batch.last_close[filled:end] = part[:, f.layout.last_close]
+            filled = end
+            pos += n
+            if filled == batch_size:
+                yield batch
+                batch = _new_batch()
+                filled = 0
+
+    if filled:
+        yield DatasetSplit(
+            X=batch.X[:filled],
+            y=batch.y[:filled],
+            last_close=batch.last_close[:filled],
+            target_columns=target_columns,
+            feature_columns=feature_columns,
+        )
+
+
+@dataclass
+class SeriesInfo:
+    name: str
+    data_dir: Path
+    rows: Dict[str, int]
+
+
+def list_series(
+    data_dirs: Iterable[Path], symbols: Sequence[str] | None = None
+) -> List[SeriesInfo]:
+    """Series (``{SYMBOL}_{TF}``) with a train split under ``data_dirs``."""
+    found = []
+    for path in sorted(_iter_feature_files(data_dirs, "train")):
+        if symbols and not _matches_symbols(path, "train", symbols):
+            continue
+        name = _series_name(path, "train")
+        meta = _read_split_meta(path, "train")
+        rows = {}
+        for split in ("train", "val", "test"):
+            split_path = path.with_name(f"{name}_{split}.csv")
+            if split_path.is_file():
+                rows[split] = _count_rows(split_path, split, meta)
+        found.append(SeriesInfo(name=name, data_dir=path.parent, rows=rows))
+    return found
+
+
+def split_ts_end(
+    data_dirs: Iterable[Path],
+    split: str,
+    ts_range: Tuple[int | None, int | None] | None = None,
+    symbols: Sequence[str] | None = None,
+) -> int | None:
+    """Exclusive end (epoch ms) of the rows a filtered split covers."""
+    end = None
+    for path in _iter_feature_files(data_dirs, split):
+        if symbols and not _matches_symbols(path, split, symbols):
+            continue
+        bounds = (_read_split_meta(path, split).get("ts_range") or {}).get(split)
+        if not bounds:
+            continue
+        last = int(bounds[1]) + 1
+        if ts_range is not None and ts_range[1] is not None:
+            last = min(last, ts_range[1])
+        end = last if end is None else max(end, last)
+    return end
+
+
+def _merge_moments(
+    count: int,
+    mean: np.ndarray,
+    m2: np.ndarray,
+    other_count: int,
+    other_mean: np.ndarray,
+    other_m2: np.ndarray,
+) -> Tuple[int, np.ndarray, np.ndarray]:
+    """Chan et al. pairwise merge of (count, mean, sum of squared deviations)."""
+    total = count + other_count
+    if total == 0:
+        return 0, mean, m2
+    delta = other_mean - mean
+    merged_mean = mean + delta * (other_count / total)
+    merged_m2 = m2 + other_m2 + delta**2 * (count * other_count / total)
+    return total, merged_mean, merged_m2
+
+
+def zscore_stats_from_meta(
+    data_dirs: Iterable[Path],
+    split: str = "train",
+    max_rows: int | None = None,
+    feature_columns: Sequence[str] | None = None,
+    ts_range: Tuple[int | None, int | None] | None = None,
+    symbols: Sequence[str] | None = None,
+    epsilon: float = 1e-6,
+) -> Tuple[np.ndarray, np.ndarray] | None:
+    """Global z-score stats from ``_meta.json`` moments, or None when they miss the rows."""
+    if max_rows is not None or ts_range is not None:
+        return None
+    columns = list(feature_columns) if feature_columns is not None else list(FEATURE_COLUMNS)
+    count, mean, m2 = 0, np.zeros(len(columns)), np.zeros(len(columns))
+    seen = False
+    for path in _iter_feature_files(data_dirs, split):
+        if symbols and not _matches_symbols(path, split, symbols):
+            continue
+        meta = _read_split_meta(path, split)
+        moments = (meta.get("moments") or {}).get(split)
+        names = meta.get("features") or []
+        if not moments or any(c not in names for c in columns):
+            return None
+        idx = [names.index(c) for c in columns]
+        count, mean, m2 = _merge_moments(
+            count,
+            mean,
+            m2,
+            int(moments["count"]),
+            np.asarray(moments["mean"], dtype=np.float64)[idx],
+            np.asarray(moments["m2"], dtype=np.float64)[idx],
+        )
+        seen = True
+    if not seen or count == 0:
+        return None
+    std = np.sqrt(m2 / count) + epsilon
+    return mean.astype(np.float32), std.astype(np.float32)
+
+
+def zscore_stats_batches(
+    batches: Iterable[DatasetSplit], epsilon: float = 1e-6
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Same result as :func:`zscore_stats`, computed in one pass over batches."""
+    count, mean, m2 = 0, None, None
+    for batch in batches:
+        if len(batch.X) == 0:
+            continue
+        if mean is None:
+            mean = np.zeros(batch.X.shape[1])
+            m2 = np.zeros(batch.X.shape[1])
+        b_mean = batch.X.mean(axis=0, dtype=np.float64)
+        b_m2 = ((batch.X - b_mean) ** 2).sum(axis=0)
+        count, mean, m2 = _merge_moments(count, mean, m2, len(batch.X), b_mean, b_m2)
+    if count == 0 or mean is None or m2 is None:
+        raise ValueError("Cannot compute z-score stats of an empty split")
+    std = np.sqrt(m2 / count) + epsilon
+    return mean.astype(np.float32), std.astype(np.float32)
 
 
 def zscore_stats(X: np.ndarray, epsilon: float = 1e-6) -> Tuple[np.ndarray, np.ndarray]:
@@ -115,5 +695,49 @@ def zscore_stats(X: np.ndarray, epsilon: float = 1e-6) -> Tuple[np.ndarray, np.n
     return mean.astype(np.float32), std.astype(np.float32)
 
 
-def zscore_apply(X: np.ndarray, mean: np.ndarray, std: np.ndarray) -> np.ndarray:
-    return ((X - mean) / std).astype(np.float32)
+def zscore_apply(
+    X: np.ndarray,
+    mean: np.ndarray,
+    std: np.ndarray,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Z-score ``X``; pass ``out=X`` to normalize a float32 buffer in place."""
+    if out is None:
+        return ((X - mean) / std).astype(np.float32)
+    np.subtract(X, mean, out=out)
+    np.divide(out, std, out=out)
+    return out
+
+
+def parse_ts(value: str) -> int:
+    """Epoch milliseconds from digits or an ISO-8601 date/datetime (UTC if naive)."""
+    value = value.strip()
+    if value.lstrip("-").isdigit():
+        return int(value)
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def add_split_filter_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--symbols",
+        default=None,
+        type=lambda v: [s.strip() for s in v.split(",") if s.strip()],
+        help="Comma-separated symbols or series (BTCUSDT or BTCUSDT_1h) to keep.",
+    )
+    parser.add_argument(
+        "--ts-from", type=parse_ts, default=None, help="Inclusive start (ISO or epoch ms)."
+    )
+    parser.add_argument(
+        "--ts-till", type=parse_ts, default=None, help="Exclusive end (ISO or epoch ms)."
+    )
+
+
+def split_filters(args: argparse.Namespace) -> Dict[str, object]:
+    """load_split/open_split keyword filters from :func:`add_split_filter_args`."""
+    ts_range = None
+    if args.ts_from is not None or args.ts_till is not None:
+        ts_range = (args.ts_from, args.ts_till)
+    return {"symbols": args.symbols, "ts_range": ts_range}
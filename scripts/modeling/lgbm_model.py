@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Sequence
+
+import numpy as np
+
+# lightgbm loads when a model is unpickled or built, not on import
+if TYPE_CHECKING:
+    import lightgbm as lgb
+
+
+class HorizonBoosters:
+    """One single-output LightGBM booster per horizon, predicting ``(n, horizons)``."""
+
+    def __init__(self, boosters: Sequence[lgb.Booster]) -> None:
+        self.boosters = list(boosters)
+
+    @property
+    def n_features_in_(self) -> int:
+        return self.boosters[0].num_feature()
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return np.column_stack([booster.predict(X) for booster in self.boosters])
+
+    def __getstate__(self) -> Dict[str, object]:
+        # the text model Booster.save_model writes, not LightGBM/sklearn internals
+        return {"models": [booster.model_to_string() for booster in self.boosters]}
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        import lightgbm as lgb
+
+        self.boosters = [lgb.Booster(model_str=model) for model in state["models"]]
+
+
+def load_lgbm(path: Path) -> HorizonBoosters:
+    """Load an LGBM ``.joblib``, including ones saved as a ``MultiOutputRegressor``."""
+    from joblib import load
+
+    model = load(path)
+    if isinstance(model, HorizonBoosters):
+        return model
+    boosters: List[lgb.Booster] = [est.booster_ for est in model.estimators_]
+    return HorizonBoosters(boosters)
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from feature_dataset import DEFAULT_BATCH_ROWS, DatasetSplit, iter_batches, open_split, zscore_apply
+from lgbm_model import load_lgbm
+from tune_onnx_session import create_session
+
+# error histogram edges: 0, then 1e-12 .. 1e3 at 20 bins per decade
+ERROR_EDGES = np.concatenate([[0.0], np.logspace(-12, 3, 301)])
+PERCENTILES = (50.0, 99.0, 99.9)
+
+
+def _histogram(err: np.ndarray) -> np.ndarray:
+    """Per-column counts of ``err`` over ``ERROR_EDGES``, shaped (columns, bins)."""
+    bins = len(ERROR_EDGES) + 1
+    idx = np.searchsorted(ERROR_EDGES, err, side="right")
+    idx += np.arange(err.shape[1]) * bins
+    return np.bincount(idx.ravel(), minlength=err.shape[1] * bins).reshape(err.shape[1], bins)
+
+
+def _percentile(hist: np.ndarray, q: float) -> List[float]:
+    """Upper bin edge holding the ``q``-th percentile, per column (histogram resolution ~12%)."""
+    cdf = np.cumsum(hist, axis=1)
+    target = cdf[:, -1:] * (q / 100.0)
+    idx = np.minimum((cdf < target).sum(axis=1), len(ERROR_EDGES) - 1)
+    return ERROR_EDGES[idx].tolist()
+
+
+@dataclass
+class ErrorStats:
+    """Streaming per-horizon absolute/relative error of an artifact vs native."""
+
+    horizons: int
+    rows: int = 0
+    max_abs: np.ndarray = field(init=False)
+    max_rel: np.ndarray = field(init=False)
+    violations: np.ndarray = field(init=False)
+    abs_hist: np.ndarray = field(init=False)
+    rel_hist: np.ndarray = field(init=False)
+
+    def __post_init__(self) -> None:
+        bins = len(ERROR_EDGES) + 1
+        self.max_abs = np.zeros(self.horizons)
+        self.max_rel = np.zeros(self.horizons)
+        self.violations = np.zeros(self.horizons, dtype=np.int64)
+        self.abs_hist = np.zeros((self.horizons, bins), dtype=np.int64)
+        self.rel_hist = np.zeros((self.horizons, bins), dtype=np.int64)
+
+    def update(self, pred: np.ndarray, ref: np.ndarray, rtol: float, atol: float) -> None:
+        abs_err = np.abs(pred.astype(np.float64) - ref)
+        scale = np.abs(ref)
+        rel_err = abs_err / np.maximum(scale, atol)
+        self.rows += len(pred)
+        self.max_abs = np.maximum(self.max_abs, abs_err.max(axis=0))
+        self.max_rel = np.maximum(self.max_rel, rel_err.max(axis=0))
+        # np.isclose semantics, the same check as the test vectors
+        self.violations += (abs_err > atol + rtol * scale).sum(axis=0)
+        self.abs_hist += _histogram(abs_err)
+        self.rel_hist += _histogram(rel_err)
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "rows": self.rows,
+            "violations": int(self.violations.sum()),
+            "per_horizon": {
+                "max_abs": self.max_abs.tolist(),
+                "max_rel": self.max_rel.tolist(),
+                "violations": self.violations.tolist(),
+                **{f"p{q:g}_abs": _percentile(self.abs_hist, q) for q in PERCENTILES},
+                **{f"p{q:g}_rel": _percentile(self.rel_hist, q) for q in PERCENTILES},
+            },
+        }
+
+
+def stream_parity(
+    native: Callable[[np.ndarray], np.ndarray],
+    artifacts: Dict[str, Path],
+    batches: Iterable[DatasetSplit],
+    mean: np.ndarray,
+    std: np.ndarray,
+    rtol: float = 1e-3,
+    atol: float = 1e-4,
+    tuned: Dict[str, Dict[str, object]] | None = None,
+    batch_size: int = DEFAULT_BATCH_ROWS,
+) -> Dict[str, object]:
+    """Run every batch through ``native`` and each ONNX artifact and compare."""
+    sessions = {name: create_session(path, tuned, batch_size) for name, path in artifacts.items()}
+    stats: Dict[str, ErrorStats] = {}
+    seconds = {"native": 0.0, **{name: 0.0 for name in sessions}}
+    for batch in batches:
+        X = zscore_apply(batch.X, mean, std, out=batch.X)
+        started = time.perf_counter()
+        ref = np.asarray(native(X), dtype=np.float64).reshape(len(X), -1)
+        seconds["native"] += time.perf_counter() - started
+        for name, session in sessions.items():
+            started = time.perf_counter()
+            pred = session.run(None, {session.get_inputs()[0].name: X})[0]
+            seconds[name] += time.perf_counter() - started
+            stats.setdefault(name, ErrorStats(ref.shape[1])).update(
+                np.asarray(pred).reshape(ref.shape), ref, rtol, atol
+            )
+    return {
+        "rtol": rtol,
+        "atol": atol,
+        "seconds": {k: round(v, 3) for k, v in seconds.items()},
+        "artifacts": {name: s.summary() for name, s in stats.items()},
+    }
+
+
+def full_split_parity(
+    native: Callable[[np.ndarray], np.ndarray],
+    artifacts: Dict[str, Path],
+    meta: Dict[str, object],
+    data_dirs: Sequence[Path],
+    split: str = "test",
+    batch_size: int = DEFAULT_BATCH_ROWS,
+    max_rows: int | None = None,
+    tuned: Dict[str, Dict[str, object]] | None = None,
+) -> Dict[str, object]:
+    """Stream a whole feature split through native and every ONNX artifact."""
+    files = open_split(data_dirs, split, max_rows=max_rows, target_columns=meta["target_columns"])
+    norm = meta["normalization"]
+    report = stream_parity(
+        native,
+        artifacts,
+        iter_batches(files, batch_size),
+        np.asarray(norm["mean"], dtype=np.float32),
+        np.asarray(norm["std"], dtype=np.float32),
+        tuned=tuned,
+        batch_size=batch_size,
+    )
+    report["split"] = split
+    return report
+
+
+def check_parity(report: Dict[str, object]) -> None:
+    """Raise when any artifact has a value outside ``rtol``/``atol``."""
+    failed = [
+        f"{name}: {entry['violations']} values over {entry['rows']} rows"
+        for name, entry in report["artifacts"].items()
+        if entry["violations"]
+    ]
+    if failed:
+        raise ValueError(f"{report['split']} split parity failed ({'; '.join(failed)})")
+
+
+def load_native(path: Path) -> Callable[[np.ndarray], np.ndarray]:
+    """``predict`` of a saved LGBM (joblib) or CatBoost (.cbm) model, all cores."""
+    if path.suffix == ".cbm":
+        from catboost import CatBoostRegressor
+
+        model = CatBoostRegressor()
+        model.load_model(path)
+        return lambda X: model.predict(X, thread_count=-1)
+    return load_lgbm(path).predict
+
+
+def _parse_paths(value: str) -> List[Path]:
+    return [Path(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Stream a whole feature split through a native model and its ONNX artifacts."
+    )
+    parser.add_argument("--native", required=True, help="LGBM .joblib or CatBoost .cbm.")
+    parser.add_argument("--meta", required=True, help="Training meta (normalization, target columns).")
+    parser.add_argument("--artifacts", required=True, type=_parse_paths, help="Comma-separated ONNX files.")
+    parser.add_argument("--data-dirs", default="data/features/v1/binance", type=_parse_paths)
+    parser.add_argument("--split", default="test")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_ROWS)
+    parser.add_argument("--max-rows", type=int, default=None)
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        help="Web manifest whose tuned sessionOptions the ONNX sessions use (default: ORT defaults).",
+    )
+    parser.add_argument("--out", default=None, help="Optional JSON report path.")
+    args = parser.parse_args()
+
+    meta = json.loads(Path(args.meta).read_text())
+    tuned = json.loads(Path(args.manifest).read_text()).get("sessionOptions") if args.manifest else None
+    artifacts = {p.name: p for p in args.artifacts}
+    started = time.perf_counter()
+    report = full_split_parity(
+        load_native(Path(args.native)),
+        artifacts,
+        meta,
+        args.data_dirs,
+        args.split,
+        args.batch_size,
+        args.max_rows,
+        tuned,
+    )
+    for name, entry in report["artifacts"].items():
+        per = entry["per_horizon"]
+        print(
+            f"[parity] {name}: {entry['rows']} rows, max abs {max(per['max_abs']):.3g}, "
+            f"p99 abs {max(per['p99_abs']):.3g}, max rel {max(per['max_rel']):.3g}, "
+            f"violations {entry['violations']}"
+        )
+    print(f"[parity] seconds {report['seconds']}, total {time.perf_counter() - started:.2f}s")
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, ensure_ascii=True, indent=2))
+        print(f"[parity] saved -> {args.out}")
+    try:
+        check_parity(report)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List
+
+import numpy as np
+
+from export_forecast_models_v1 import (
+    FEATURE_WINDOW,
+    MODEL_DIR,
+    _build_features,
+    _normalize,
+    _remove_artifact,
+    _write_sha,
+)
+from tune_onnx_session import create_session
+
+# onnx and onnxruntime load inside the builders and checks, not on --help
+if TYPE_CHECKING:
+    import onnx
+    import onnxruntime as ort
+
+VARIANTS = ("opt", "ort", "fp16", "int8")
+PROVIDERS = ["CPUExecutionProvider"]
+
+
+def _offline_optimize(src: Path, dest: Path, ort_format: bool = False) -> None:
+    """Save ORT's extended graph optimizations (constant folding, fusions)."""
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.log_severity_level = 3
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    options.optimized_model_filepath = dest.as_posix()
+    if ort_format:
+        options.add_session_config_entry("session.save_model_format", "ORT")
+    ort.InferenceSession(src.as_posix(), sess_options=options, providers=PROVIDERS)
+
+
+def _has_initializers(model: onnx.ModelProto, types: set) -> bool:
+    return any(init.data_type in types for init in model.graph.initializer)
+
+
+def build_opt(src: Path, dest: Path) -> bool:
+    _offline_optimize(src, dest)
+    return True
+
+
+def build_ort(src: Path, dest: Path) -> bool:
+    _offline_optimize(src, dest, ort_format=True)
+    return True
+
+
+def build_fp16(src: Path, dest: Path) -> bool:
+    import onnx
+    from onnx import TensorProto
+    from onnxruntime.transformers.float16 import convert_float_to_float16
+
+    # tree/linear ai.onnx.ml ops stay float32 (default block list); I/O stays float32
+    model = convert_float_to_float16(onnx.load(src.as_posix()), keep_io_types=True)
+    if not _has_initializers(model, {TensorProto.FLOAT16}):
+        return False
+    onnx.save(model, dest.as_posix())
+    return True
+
+
+def build_int8(src: Path, dest: Path) -> bool:
+    import onnx
+    from onnx import TensorProto
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    # tree-only graphs (ai.onnx.ml ensembles) have no MatMul/Gemm weights to quantize
+    if not any(
+        node.op_type in ("MatMul", "Gemm") and node.domain in ("", "ai.onnx")
+        for node in onnx.load(src.as_posix()).graph.node
+    ):
+        return False
+    quantize_dynamic(
+        model_input=src.as_posix(),
+        model_output=dest.as_posix(),
+        weight_type=QuantType.QInt8,
+    )
+    if not _has_initializers(onnx.load(dest.as_posix()), {TensorProto.INT8, TensorProto.UINT8}):
+        dest.unlink()
+        return False
+    return True
+
+
+BUILDERS: Dict[str, Callable[[Path, Path], bool]] = {
+    "opt": build_opt,
+    "ort": build_ort,
+    "fp16": build_fp16,
+    "int8": build_int8,
+}
+SUFFIXES = {"opt": ".opt.onnx", "ort": ".ort", "fp16": ".fp16.onnx", "int8": ".int8.onnx"}
+
+
+def _run(session: ort.InferenceSession, X: np.ndarray) -> np.ndarray:
+    out = session.run(None, {session.get_inputs()[0].name: X})[0]
+    return np.asarray(out, dtype=np.float32).reshape(len(X), -1)
+
+
+def _case_inputs(test_vectors: Dict[str, object], mean: List[float], std: List[float]) -> np.ndarray:
+    rows = []
+    for case in test_vectors["cases"]:
+        closes = [float(p[1]) for p in case["tail"]]
+        rows.append(_normalize(_build_features(closes[-FEATURE_WINDOW:]), mean, std))
+    return np.vstack(rows)
+
+
+def check_base(
+    base: ort.InferenceSession,
+    test_vectors: Dict[str, object],
+    mean: List[float],
+    std: List[float],
+) -> float:
+    """Max abs diff of the base model on the committed cases, each matched
+    with its own ``rtol``/``atol`` like the web test. Raises on a mismatch."""
+    worst = 0.0
+    for case, x in zip(test_vectors["cases"], _case_inputs(test_vectors, mean, std)):
+        expected = np.asarray(case["expected"]["delta"], dtype=np.float32)
+        got = _run(base, x.reshape(1, -1))[0][: len(expected)]
+        if not np.allclose(got, expected, rtol=case["rtol"], atol=case["atol"]):
+            raise ValueError(f"{case['id']}: max abs diff {np.abs(got - expected).max():.3g}")
+        worst = max(worst, float(np.abs(got - expected).max()))
+    return worst
+
+
+def validate(
+    session: ort.InferenceSession,
+    base: ort.InferenceSession,
+    test_vectors: Dict[str, object],
+    mean: List[float],
+    std: List[float],
+    rows: int = 1024,
+) -> Dict[str, float]:
+    """Check a variant against the base model."""
+    case_diff = 0.0
+    for case, x in zip(test_vectors["cases"], _case_inputs(test_vectors, mean, std)):
+        got, ref = _run(session, x.reshape(1, -1))[0], _run(base, x.reshape(1, -1))[0]
+        if not np.allclose(got, ref, rtol=case["rtol"], atol=case["atol"]):
+            raise ValueError(f"{case['id']}: max abs diff from base {np.abs(got - ref).max():.3g}")
+        case_diff = max(case_diff, float(np.abs(got - ref).max()))
+
+    X = np.random.default_rng(0).standard_normal((rows, len(mean))).astype(np.float32)
+    got, ref = _run(session, X), _run(base, X)
+    if not np.allclose(got, ref, rtol=test_vectors["rtol"], atol=test_vectors["atol"]):
+        raise ValueError(f"random rows: max abs diff {np.abs(got - ref).max():.3g}")
+    return {"max_abs_case_diff": case_diff, "max_abs_base_diff": float(np.abs(got - ref).max())}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Build optimized variants of an exported model (offline graph optimization, "
+            "ORT format, fp16, int8), validate them and record them in the manifest."
+        )
+    )
+    parser.add_argument("--manifest", default="apps/web/src/config/ml.manifest.json")
+    parser.add_argument("--test-vectors", default="docs/modeling/test_vectors.json")
+    parser.add_argument("--model", default=None, help="ONNX file (default: the manifest path).")
+    parser.add_argument(
+        "--variants",
+        default=",".join(VARIANTS),
+        help=f"Comma-separated subset of {', '.join(VARIANTS)}.",
+    )
+    parser.add_argument("--rows", type=int, default=1024, help="Random rows compared with the base model.")
+    args = parser.parse_args()
+
+    manifest_path = Path(args.manifest)
+    manifest = json.loads(manifest_path.read_text())
+    test_vectors = json.loads(Path(args.test_vectors).read_text())
+    model_path = Path(args.model) if args.model else MODEL_DIR / Path(manifest["path"]).name
+    mean, std = manifest["normalization"]["mean"], manifest["normalization"]["std"]
+    # variants are checked under the options the manifest was tuned with
+    tuned = manifest.get("sessionOptions")
+    base = create_session(model_path, tuned)
+    try:
+        base_diff = check_base(base, test_vectors, mean, std)
+    except ValueError as exc:
+        raise SystemExit(
+            f"[optimize] {model_path.name} does not match {args.test_vectors} ({exc}); "
+            "re-export the model and its test vectors before building variants"
+        )
+    print(f"[optimize] base {model_path.name}: test vectors ok, max abs diff {base_diff:.2e}")
+    stem = model_path.name[: -len(".onnx")] if model_path.name.endswith(".onnx") else model_path.stem
+    public_dir = Path(manifest["path"]).parent.as_posix()
+
+    recorded: Dict[str, object] = dict(manifest.get("variants", {}))
+    for name in [v.strip() for v in args.variants.split(",") if v.strip()]:
+        if name not in BUILDERS:
+            raise ValueError(f"unknown variant {name!r}; choose from {', '.join(VARIANTS)}")
+        dest = model_path.with_name(stem + SUFFIXES[name])
+        with tempfile.TemporaryDirectory() as tmp:
+            # builders write to a scratch file so a failed variant never replaces a good one
+            scratch = Path(tmp) / dest.name
+            if not BUILDERS[name](model_path, scratch):
+                print(f"[optimize] {name}: no supported ops in {model_path.name}, skipped")
+                recorded.pop(name, None)
+                _remove_artifact(dest)
+                continue
+            try:
+                checks = validate(create_session(scratch, tuned), base, test_vectors, mean, std, args.rows)
+            except ValueError as exc:
+                print(f"[optimize] {name}: validation failed ({exc}), not recorded")
+                recorded.pop(name, None)
+                # an earlier run's file would otherwise ship without a manifest entry
+                _remove_artifact(dest)
+                continue
+            shutil.move(scratch.as_posix(), dest.as_posix())
+        digest = _write_sha(dest)
+        recorded[name] = {
+            "path": f"{public_dir}/{dest.name}",
+            "sha256": digest,
+            "bytes": dest.stat().st_size,
+            **checks,
+        }
+        print(
+            f"[optimize] {name}: {dest.name} {dest.stat().st_size}B "
+            f"(base {model_path.stat().st_size}B), case diff from base {checks['max_abs_case_diff']:.2e}"
+        )
+
+    manifest["variants"] = recorded
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=True, indent=2) + "\n")
+    print(f"[optimize] manifest -> {manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import onnx
+import onnxruntime as ort
+from onnx import TensorProto, helper, numpy_helper
+
+from export_forecast_models_v1 import EPS, FEATURE_WINDOW, _build_features, _normalize
+from tree_onnx import ONNX_IR_VERSION, ONNX_OPSET
+
+CLOSE_INPUT = "close"
+MODEL_PREFIX = "model/"
+
+
+class _GraphBuilder:
+    """Accumulates nodes/initializers with unique names for the featurizer."""
+
+    def __init__(self) -> None:
+        self.nodes: List[onnx.NodeProto] = []
+        self.initializers: List[onnx.TensorProto] = []
+        self._count = 0
+
+    def _name(self, hint: str) -> str:
+        self._count += 1
+        return f"feat/{hint}_{self._count}"
+
+    def const(self, value, hint: str = "c", dtype=np.float64) -> str:
+        name = self._name(hint)
+        self.initializers.append(numpy_helper.from_array(np.asarray(value, dtype=dtype), name))
+        return name
+
+    def op(self, op_type: str, inputs: Sequence[str], hint: str = "", **attrs) -> str:
+        out = self._name(hint or op_type.lower())
+        self.nodes.append(helper.make_node(op_type, list(inputs), [out], **attrs))
+        return out
+
+    def last(self, x: str, count: int, drop: int = 0) -> str:
+        """``x[:, -count - drop : -drop or None]`` along the time axis."""
+        starts = self.const([-count - drop], dtype=np.int64)
+        ends = self.const([-drop if drop else np.iinfo(np.int64).max], dtype=np.int64)
+        axes = self.const([1], dtype=np.int64)
+        return self.op("Slice", [x, starts, ends, axes], "last")
+
+    def mean(self, x: str, count: int) -> str:
+        # a MatMul keeps the row mean independent of ReduceMean's opset-dependent axes
+        return self.op("MatMul", [x, self.const(np.full((count, 1), 1.0 / count))], "mean")
+
+    def std(self, x: str, count: int) -> str:
+        centered = self.op("Sub", [x, self.mean(x, count)])
+        var = self.mean(self.op("Mul", [centered, centered]), count)
+        return self.op("Sqrt", [var], "std")
+
+
+def _ema_weights(span: int) -> np.ndarray:
+    """Weights of ``_ema`` over exactly ``span`` values (seeded with the first)."""
+    alpha = 2 / (span + 1)
+    decay = (1 - alpha) ** np.arange(span - 1, -1, -1, dtype=np.float64)
+    weights = alpha * decay
+    weights[0] = decay[0]
+    return weights.reshape(span, 1)
+
+
+def featurizer_nodes(
+    g: _GraphBuilder, close: str, mean: Sequence[float], std: Sequence[float], epsilon: float
+) -> str:
+    """The 10 ``_build_features`` columns, z-scored, as float32 ``[N, 10]``."""
+    last = g.last(close, 1)
+    last20 = g.last(close, 20)
+    prev = g.last(close, 20, drop=1)
+    diff = g.op("Sub", [last20, prev])
+    # returns are 0 where the previous close is 0, as in _build_features
+    zero = g.const(0.0)
+    returns = g.op(
+        "Where", [g.op("Equal", [prev, zero]), zero, g.op("Div", [diff, prev])], "returns"
+    )
+    columns = [
+        last,
+        g.mean(g.last(close, 5), 5),
+        g.mean(last20, 20),
+        g.std(last20, 20),
+        g.op("Sub", [last, g.last(close, 1, drop=2)]),
+        g.op("Sub", [last, g.last(close, 1, drop=7)]),
+        g.op("MatMul", [g.last(close, 5), g.const(_ema_weights(5))], "ema5"),
+        g.op("MatMul", [g.last(close, 10), g.const(_ema_weights(10))], "ema10"),
+        g.mean(g.last(returns, 5), 5),
+        g.std(returns, 20),
+    ]
+    features = g.op("Concat", columns, "features", axis=1)
+    scale = np.asarray(std, dtype=np.float64) + epsilon
+    normed = g.op(
+        "Div", [g.op("Sub", [features, g.const(mean)]), g.const(scale)], "normalized"
+    )
+    return g.op("Cast", [normed], "input", to=TensorProto.FLOAT)
+
+
+def model_horizon(model: onnx.ModelProto) -> int:
+    """Output width of ``model``, by running one zero row (CatBoost declares ``[N]``)."""
+    session = ort.InferenceSession(model.SerializeToString(), providers=["CPUExecutionProvider"])
+    inp = session.get_inputs()[0]
+    out = session.run(None, {inp.name: np.zeros((1, inp.shape[1]), dtype=np.float32)})[0]
+    return int(np.asarray(out).size)
+
+
+def _opsets(*models: onnx.ModelProto) -> List[onnx.OperatorSetIdProto]:
+    versions: Dict[str, int] = {"": ONNX_OPSET}
+    for model in models:
+        for opset in model.opset_import:
+            versions[opset.domain] = max(versions.get(opset.domain, 0), opset.version)
+    return [helper.make_opsetid(domain, version) for domain, version in versions.items()]
+
+
+def end_to_end_onnx(
+    model: onnx.ModelProto,
+    mean: Sequence[float],
+    std: Sequence[float],
+    epsilon: float = EPS,
+    horizon: int | None = None,
+) -> onnx.ModelProto:
+    """Wrap a ``[N, 10] -> delta`` model into ``close [N, T] -> delta, p50``."""
+    horizon = horizon or model_horizon(model)
+    inner = onnx.compose.add_prefix(model, MODEL_PREFIX)
+    g = _GraphBuilder()
+    g.nodes.append(
+        helper.make_node(
+            "Identity",
+            [featurizer_nodes(g, CLOSE_INPUT, mean, std, epsilon)],
+            [inner.graph.input[0].name],
+        )
+    )
+    g.nodes.extend(inner.graph.node)
+    g.initializers.extend(inner.graph.initializer)
+
+    shape = g.const([-1, horizon], dtype=np.int64)
+    g.nodes.append(helper.make_node("Reshape", [inner.graph.output[0].name, shape], ["delta"]))
+    last = g.last(CLOSE_INPUT, 1)
+    delta64 = g.op("Cast", ["delta"], "delta64", to=TensorProto.DOUBLE)
+    g.nodes.append(helper.make_node("Add", [last, delta64], ["p50"]))
+
+    graph = helper.make_graph(
+        g.nodes,
+        "forecast_end_to_end",
+        [helper.make_tensor_value_info(CLOSE_INPUT, TensorProto.DOUBLE, ["N", "T"])],
+        [
+            helper.make_tensor_value_info("delta", TensorProto.FLOAT, ["N", horizon]),
+            helper.make_tensor_value_info("p50", TensorProto.DOUBLE, ["N", horizon]),
+        ],
+        initializer=g.initializers,
+    )
+    out = helper.make_model(graph, opset_imports=_opsets(model), producer_name="assetpredict")
+    out.ir_version = max(model.ir_version, ONNX_IR_VERSION)
+    onnx.checker.check_model(out)
+    return out
+
+
+def python_p50(
+    model_session: ort.InferenceSession,
+    closes: np.ndarray,
+    mean: Sequence[float],
+    std: Sequence[float],
+    horizon: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Reference path of ``build_test_vectors``: featurize, normalize, run, add last close."""
+    X = np.stack([_normalize(_build_features(list(row[-FEATURE_WINDOW:])), mean, std) for row in closes])
+    name = model_session.get_inputs()[0].name
+    delta = np.asarray(model_session.run(None, {name: X})[0], dtype=np.float32).reshape(len(X), horizon)
+    return delta, delta + closes[:, -1:]
+
+
+def check_end_to_end_parity(
+    e2e: onnx.ModelProto,
+    model: onnx.ModelProto,
+    closes: np.ndarray,
+    mean: Sequence[float],
+    std: Sequence[float],
+    rtol: float = 1e-3,
+    atol: float = 1e-4,
+) -> Dict[str, float]:
+    """Compare one batched end-to-end run with the Python featurizer + model."""
+    providers = ["CPUExecutionProvider"]
+    e2e_session = ort.InferenceSession(e2e.SerializeToString(), providers=providers)
+    model_session = ort.InferenceSession(model.SerializeToString(), providers=providers)
+    horizon = e2e_session.get_outputs()[0].shape[1]
+    delta, p50 = e2e_session.run(None, {CLOSE_INPUT: np.asarray(closes, dtype=np.float64)})
+    ref_delta, ref_p50 = python_p50(model_session, closes, mean, std, horizon)
+    if not np.allclose(p50, ref_p50, rtol=rtol, atol=atol):
+        raise ValueError(
+            f"end-to-end/python mismatch: max abs p50 diff {np.abs(p50 - ref_p50).max():.3g}"
+        )
+    return {
+        "cases": len(closes),
+        "max_abs_delta_diff": float(np.abs(delta - ref_delta).max()),
+        "max_abs_p50_diff": float(np.abs(p50 - ref_p50).max()),
+    }
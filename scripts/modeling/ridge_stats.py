@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from feature_dataset import DEFAULT_BATCH_ROWS, SplitFile, iter_batches
+
+if TYPE_CHECKING:
+    from sklearn.linear_model import LinearRegression
+
+
+@dataclass
+class RidgeStats:
+    """Sufficient statistics of a linear least-squares fit."""
+
+    count: int
+    mean_x: np.ndarray
+    mean_y: np.ndarray
+    cxx: np.ndarray
+    cxy: np.ndarray
+    cyy: np.ndarray
+
+    @classmethod
+    def empty(cls, n_features: int, n_targets: int) -> "RidgeStats":
+        return cls(
+            0,
+            np.zeros(n_features),
+            np.zeros(n_targets),
+            np.zeros((n_features, n_features)),
+            np.zeros((n_features, n_targets)),
+            np.zeros(n_targets),
+        )
+
+    @classmethod
+    def from_batch(cls, X: np.ndarray, y: np.ndarray) -> "RidgeStats":
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64).reshape(len(X), -1)
+        mean_x = X.mean(axis=0)
+        mean_y = y.mean(axis=0)
+        Xc = X - mean_x
+        yc = y - mean_y
+        return cls(len(X), mean_x, mean_y, Xc.T @ Xc, Xc.T @ yc, (yc**2).sum(axis=0))
+
+    def merge(self, other: "RidgeStats") -> "RidgeStats":
+        """Pairwise (Chan et al.) merge, the matrix form of ``_merge_moments``."""
+        total = self.count + other.count
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            return other
+        dx = other.mean_x - self.mean_x
+        dy = other.mean_y - self.mean_y
+        w = self.count * other.count / total
+        return RidgeStats(
+            total,
+            self.mean_x + dx * (other.count / total),
+            self.mean_y + dy * (other.count / total),
+            self.cxx + other.cxx + w * np.outer(dx, dx),
+            self.cxy + other.cxy + w * np.outer(dx, dy),
+            self.cyy + other.cyy + w * dy**2,
+        )
+
+    def normalization(self, epsilon: float = 1e-6) -> Tuple[np.ndarray, np.ndarray]:
+        """Same z-score stats as ``zscore_stats`` over the accumulated rows."""
+        std = np.sqrt(np.diag(self.cxx) / self.count) + epsilon
+        return self.mean_x.astype(np.float32), std.astype(np.float32)
+
+    def solve(
+        self, alpha: float, mean: np.ndarray, std: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Ridge (OLS for ``alpha=0``) on z-scored features, unpenalized intercept."""
+        if self.count == 0:
+            raise ValueError("Cannot solve from empty stats")
+        scale = 1.0 / np.asarray(std, dtype=np.float64)
+        czz = self.cxx * np.outer(scale, scale)
+        czy = self.cxy * scale[:, None]
+        # the normalization mean need not be this run's, so shift rather than assume 0
+        shift = (self.mean_x - mean) * scale
+        lhs = czz + alpha * np.eye(len(czz))
+        try:
+            coef = np.linalg.solve(lhs, czy)
+        except np.linalg.LinAlgError:
+            coef = np.linalg.lstsq(lhs, czy, rcond=None)[0]
+        intercept = self.mean_y - shift @ coef
+        return coef.T, intercept
+
+    def mse(
+        self, coef: np.ndarray, intercept: np.ndarray, mean: np.ndarray, std: np.ndarray
+    ) -> np.ndarray:
+        """Per-target mean squared error of a linear model over these rows, with no data pass."""
+        scale = 1.0 / np.asarray(std, dtype=np.float64)
+        beta = coef.T * scale[:, None]  # per raw feature
+        bias = self.mean_y - intercept - ((self.mean_x - mean) * scale) @ coef.T
+        sse = (
+            self.cyy
+            - 2 * np.einsum("ft,ft->t", beta, self.cxy)
+            + np.einsum("ft,fg,gt->t", beta, self.cxx, beta)
+            + self.count * bias**2
+        )
+        return np.maximum(sse, 0.0) / self.count
+
+    def arrays(self, prefix: str = "") -> Dict[str, np.ndarray]:
+        return {
+            f"{prefix}count": np.asarray(self.count),
+            f"{prefix}mean_x": self.mean_x,
+            f"{prefix}mean_y": self.mean_y,
+            f"{prefix}cxx": self.cxx,
+            f"{prefix}cxy": self.cxy,
+            f"{prefix}cyy": self.cyy,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], prefix: str = "") -> "RidgeStats":
+        return cls(
+            int(arrays[f"{prefix}count"]),
+            *(arrays[f"{prefix}{k}"] for k in ("mean_x", "mean_y", "cxx", "cxy", "cyy")),
+        )
+
+
+def save_stats(path: Path, stats: Dict[str, RidgeStats], meta: Dict[str, object]) -> None:
+    arrays: Dict[str, np.ndarray] = {}
+    for name, s in stats.items():
+        arrays.update(s.arrays(prefix=f"{name}/"))
+    arrays["meta"] = np.asarray(json.dumps(meta))
+    tmp_path = path.with_name(path.name + ".tmp.npz")
+    np.savez(tmp_path, **arrays)
+    tmp_path.replace(path)
+
+
+def load_stats(path: Path, names: Sequence[str]) -> Tuple[Dict[str, RidgeStats], Dict[str, object]]:
+    with np.load(path) as arrays:
+        data = dict(arrays)
+    stats = {name: RidgeStats.from_arrays(data, prefix=f"{name}/") for name in names}
+    return stats, json.loads(str(data["meta"]))
+
+
+def accumulate(
+    files: Sequence[SplitFile],
+    workers: int = 1,
+    batch_size: int = DEFAULT_BATCH_ROWS,
+    chunk_rows: int | None = None,
+) -> RidgeStats:
+    """One streaming pass over ``files``, ``workers`` chunks at a time."""
+    chunk_rows = chunk_rows or 4 * batch_size
+    chunks: List[SplitFile] = [
+        SplitFile(path=f.path, values=f.values[start : start + chunk_rows], layout=f.layout)
+        for f in files
+        for start in range(0, f.rows, chunk_rows)
+    ]
+    if not chunks:
+        raise ValueError("Cannot accumulate stats of an empty split")
+    n_features = len(chunks[0].layout.features)
+    n_targets = len(chunks[0].target_columns)
+
+    def _reduce(chunk: SplitFile) -> RidgeStats:
+        stats = RidgeStats.empty(n_features, n_targets)
+        for batch in iter_batches([chunk], batch_size=batch_size):
+            stats = stats.merge(RidgeStats.from_batch(batch.X, batch.y))
+        return stats
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        partial = list(pool.map(_reduce, chunks))
+    total = RidgeStats.empty(n_features, n_targets)
+    for stats in partial:
+        total = total.merge(stats)
+    return total
+
+
+def to_linear_regression(coef: np.ndarray, intercept: np.ndarray) -> LinearRegression:
+    """A fitted ``LinearRegression`` carrying a closed-form solution, for joblib/skl2onnx."""
+    from sklearn.linear_model import LinearRegression
+
+    model = LinearRegression()
+    model.coef_ = coef.astype(np.float64)
+    model.intercept_ = intercept.astype(np.float64)
+    model.n_features_in_ = coef.shape[1]
+    return model
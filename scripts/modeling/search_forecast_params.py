@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+from feature_dataset import (
+    FEATURE_COLUMNS,
+    add_split_filter_args,
+    load_split,
+    split_filters,
+    zscore_apply,
+    zscore_stats,
+    zscore_stats_from_meta,
+)
+from train_forecast_lgbm_v1 import evaluate
+
+# Boosting rounds are the successive-halving resource; the rest is sampled.
+RESOURCE_PARAM = {"lgbm": "n_estimators", "catboost": "iterations"}
+DEFAULT_TARGETS = {"lgbm": "target_1,target_12,target_24", "catboost": "target_1"}
+
+
+def _parse_dirs(value: str) -> List[Path]:
+    return [Path(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def _parse_list(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def sample_params(model: str, rng: random.Random) -> Dict[str, object]:
+    learning_rate = round(math.exp(rng.uniform(math.log(0.01), math.log(0.2))), 5)
+    if model == "lgbm":
+        max_depth = rng.randint(3, 12)
+        return {
+            "learning_rate": learning_rate,
+            "max_depth": max_depth,
+            "num_leaves": rng.randint(7, min(255, 2**max_depth - 1)),
+        }
+    return {"learning_rate": learning_rate, "depth": rng.randint(4, 10)}
+
+
+_DATA: Dict[str, np.ndarray] = {}
+# keeps worker-side mappings alive for the lifetime of the process
+_SEGMENTS: List[shared_memory.SharedMemory] = []
+
+
+def _share(arrays: Dict[str, np.ndarray]) -> Tuple[List[shared_memory.SharedMemory], Dict]:
+    """Copy ``arrays`` into shared memory; returns segments and attach specs."""
+    segments = []
+    specs = {}
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+        segments.append(shm)
+        specs[name] = (shm.name, arr.shape, arr.dtype.str)
+    return segments, specs
+
+
+def _attach(specs: Dict) -> None:
+    # worker initializer: map the parent's arrays without copying them
+    for name, (shm_name, shape, dtype) in specs.items():
+        # the parent's resource tracker owns the segments and unlinks them
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _SEGMENTS.append(shm)
+        _DATA[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _fit_predict(model: str, params: Dict[str, object], seed: int) -> np.ndarray:
+    X, y, X_val = _DATA["X_train"], _DATA["y_train"], _DATA["X_val"]
+    # imported per model (once per worker process): an lgbm search never loads catboost
+    if model == "lgbm":
+        from lightgbm import LGBMRegressor
+
+        preds = []
+        for k in range(y.shape[1]):
+            est = LGBMRegressor(**params, random_state=seed, n_jobs=1, verbose=-1)
+            preds.append(est.fit(X, y[:, k]).predict(X_val))
+        return np.column_stack(preds)
+    from catboost import CatBoostRegressor
+
+    est = CatBoostRegressor(
+        **params,
+        loss_function="MultiRMSE" if y.shape[1] > 1 else "RMSE",
+        random_seed=seed,
+        thread_count=1,
+        verbose=0,
+        allow_writing_files=False,
+    )
+    est.fit(X, y if y.shape[1] > 1 else y[:, 0])
+    return np.asarray(est.predict(X_val)).reshape(len(X_val), -1)
+
+
+def run_trial(
+    model: str, params: Dict[str, object], resource: int, seed: int
+) -> Tuple[Dict[str, float], float]:
+    started = time.perf_counter()
+    pred = _fit_predict(model, {**params, RESOURCE_PARAM[model]: resource}, seed)
+    metrics = evaluate(_DATA["y_val"], pred, _DATA["last_close"])
+    return metrics, time.perf_counter() - started
+
+
+@dataclass
+class Asha:
+    """Asynchronous successive halving over ``resources`` (one rung each)."""
+
+    resources: List[int]
+    eta: int
+    max_trials: int
+    rungs: List[Dict[int, float]] = field(default_factory=list)
+    promoted: List[Set[int]] = field(default_factory=list)
+    started: int = 0
+
+    def __post_init__(self) -> None:
+        self.rungs = [{} for _ in self.resources]
+        self.promoted = [set() for _ in self.resources]
+
+    def next_job(self) -> Tuple[int, int] | None:
+        for rung in reversed(range(len(self.resources) - 1)):
+            ranked = sorted(self.rungs[rung], key=self.rungs[rung].get)
+            for trial_id in ranked[: len(ranked) // self.eta]:
+                if trial_id not in self.promoted[rung]:
+                    self.promoted[rung].add(trial_id)
+                    return trial_id, rung + 1
+        if self.started < self.max_trials:
+            self.started += 1
+            return self.started - 1, 0
+        return None
+
+    def report(self, trial_id: int, rung: int, score: float) -> None:
+        self.rungs[rung][trial_id] = score
+
+
+def resource_ladder(min_resource: int, max_resource: int, eta: int) -> List[int]:
+    ladder = [min_resource]
+    while ladder[-1] * eta <= max_resource:
+        ladder.append(ladder[-1] * eta)
+    return ladder
+
+
+def search(
+    args: argparse.Namespace, specs: Dict
+) -> Tuple[List[Dict[str, object]], Dict[str, object]]:
+    rng = random.Random(args.random_state)
+    resources = resource_ladder(args.min_resource, args.max_resource, args.eta)
+    asha = Asha(resources, args.eta, args.trials)
+    configs: Dict[int, Dict[str, object]] = {}
+    results: List[Dict[str, object]] = []
+    pending: Dict[Future, Tuple[int, int]] = {}
+
+    with ProcessPoolExecutor(
+        max_workers=args.workers, initializer=_attach, initargs=(specs,)
+    ) as pool:
+
+        def _fill() -> None:
+            while len(pending) < args.workers:
+                job = asha.next_job()
+                if job is None:
+                    return
+                trial_id, rung = job
+                if trial_id not in configs:
+                    configs[trial_id] = sample_params(args.model, rng)
+                future = pool.submit(
+                    run_trial, args.model, configs[trial_id], resources[rung], args.random_state
+                )
+                pending[future] = job
+
+        _fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                trial_id, rung = pending.pop(future)
+                try:
+                    metrics, seconds = future.result()
+                except Exception as exc:  # a bad config must not stop the search
+                    print(f"[search] trial {trial_id} rung {rung} failed: {exc}")
+                    asha.report(trial_id, rung, math.inf)
+                    continue
+                asha.report(trial_id, rung, metrics["mae_delta"])
+                results.append(
+                    {
+                        "trial": trial_id,
+                        "rung": rung,
+                        "resource": resources[rung],
+                        "params": configs[trial_id],
+                        "metrics": metrics,
+                        "seconds": round(seconds, 3),
+                    }
+                )
+                print(
+                    f"[search] trial {trial_id} rung {rung} "
+                    f"({RESOURCE_PARAM[args.model]}={resources[rung]}): "
+                    f"mae={metrics['mae_delta']:.4f} in {seconds:.2f}s"
+                )
+            _fill()
+
+    ok = [r for r in results if math.isfinite(r["metrics"]["mae_delta"])]
+    if not ok:
+        raise RuntimeError("every search trial failed")
+    # every run is a complete (params, rounds) config scored on val
+    best = min(ok, key=lambda r: r["metrics"]["mae_delta"])
+    return results, best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="ASHA hyperparameter search for the v1 forecast trainers."
+    )
+    parser.add_argument("--model", choices=sorted(RESOURCE_PARAM), default="lgbm")
+    parser.add_argument(
+        "--data-dirs",
+        default="data/features/v1/binance",
+        type=_parse_dirs,
+        help="Comma-separated feature directories.",
+    )
+    parser.add_argument(
+        "--targets",
+        default=None,
+        type=_parse_list,
+        help="Target columns scored during the search (default depends on --model).",
+    )
+    parser.add_argument("--max-rows", type=int, default=None)
+    add_split_filter_args(parser)
+    parser.add_argument("--trials", type=int, default=27)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--min-resource", type=int, default=50)
+    parser.add_argument("--max-resource", type=int, default=1350)
+    parser.add_argument("--random-state", type=int, default=7)
+    parser.add_argument("--out-dir", default=None)
+    parser.add_argument("--model-name", default=None)
+    args = parser.parse_args()
+
+    out_dir = Path(args.out_dir or f"data/models/v1/{args.model}")
+    model_name = args.model_name or f"forecast_{args.model}_v1"
+    targets = args.targets or _parse_list(DEFAULT_TARGETS[args.model])
+
+    read = {"target_columns": targets, **split_filters(args)}
+    train = load_split(args.data_dirs, "train", max_rows=args.max_rows, **read)
+    val = load_split(args.data_dirs, "val", max_rows=args.max_rows, **read)
+    stats = zscore_stats_from_meta(
+        args.data_dirs, "train", max_rows=args.max_rows, **split_filters(args)
+    )
+    mean, std = stats if stats is not None else zscore_stats(train.X)
+    zscore_apply(train.X, mean, std, out=train.X)
+    zscore_apply(val.X, mean, std, out=val.X)
+    print(
+        f"[search] {args.model}: train={len(train.X)} val={len(val.X)} "
+        f"targets={train.target_columns} workers={args.workers}"
+    )
+
+    splits = {"train": len(train.X), "val": len(val.X)}
+    segments, specs = _share(
+        {
+            "X_train": train.X,
+            "y_train": train.y,
+            "X_val": val.X,
+            "y_val": val.y,
+            "last_close": val.last_close,
+        }
+    )
+    del train  # workers read the shared copy
+    started = time.perf_counter()
+    try:
+        results, best = search(args, specs)
+    finally:
+        for shm in segments:
+            shm.close()
+            shm.unlink()
+    elapsed = time.perf_counter() - started
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    params = {
+        **best["params"],
+        RESOURCE_PARAM[args.model]: best["resource"],
+        "random_state": args.random_state,
+    }
+    meta = {
+        "model_name": model_name,
+        "features": FEATURE_COLUMNS,
+        "target_columns": val.target_columns,
+        "normalization": {"type": "zscore", "mean": mean.tolist(), "std": std.tolist()},
+        "metrics": best["metrics"],
+        "splits": splits,
+        "data_dirs": [str(p) for p in args.data_dirs],
+        "filters": split_filters(args),
+        "params": params,
+        "search": {
+            "method": "asha",
+            "eta": args.eta,
+            "resources": resource_ladder(args.min_resource, args.max_resource, args.eta),
+            "trials": args.trials,
+            "runs": len(results),
+            "workers": args.workers,
+            "elapsed_sec": round(elapsed, 3),
+            "best_trial": best["trial"],
+        },
+    }
+    meta_path = out_dir / f"{model_name}.search.meta.json"
+    meta_path.write_text(json.dumps(meta, ensure_ascii=True, indent=2))
+    trials_path = out_dir / f"{model_name}.search.trials.json"
+    trials_path.write_text(json.dumps(results, ensure_ascii=True, indent=2))
+
+    print(f"[search] best trial {best['trial']}: {params} mae={best['metrics']['mae_delta']:.4f}")
+    print(f"[search] best params -> {meta_path}")
+    print(f"[search] trials -> {trials_path}")
+
+
+if __name__ == "__main__":
+    main()
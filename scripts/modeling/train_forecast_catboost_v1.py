@@ -3,19 +3,48 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import tempfile
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
 
 import numpy as np
-from catboost import CatBoostRegressor
-from sklearn.metrics import mean_absolute_error
 
-from feature_dataset import FEATURE_COLUMNS, load_split, zscore_apply, zscore_stats
+from feature_dataset import (
+    DEFAULT_BATCH_ROWS,
+    FEATURE_COLUMNS,
+    DatasetSplit,
+    SplitFile,
+    add_split_filter_args,
+    iter_batches,
+    load_split,
+    open_split,
+    split_filters,
+    zscore_apply,
+    zscore_stats,
+    zscore_stats_batches,
+    zscore_stats_from_meta,
+)
+from training_control import (
+    TrainingControl,
+    add_training_control_args,
+    parse_args_with_params_from,
+    training_control,
+)
+from warm_start import (
+    WarmStart,
+    add_warm_start_args,
+    lineage_meta,
+    resolve_warm_start,
+)
+
+# catboost and sklearn load on first use, keeping --help fast
+if TYPE_CHECKING:
+    from catboost import CatBoostRegressor, Pool
 
 ROOT = Path(__file__).resolve().parents[2]
 MPL_DIR = ROOT / ".mplconfig"
-MPL_DIR.mkdir(parents=True, exist_ok=True)
-os.environ.setdefault("MPLCONFIGDIR", str(MPL_DIR))
 
 
 def _parse_dirs(value: str) -> List[Path]:
@@ -30,6 +59,8 @@ def _mape(y_true: np.ndarray, y_pred: np.ndarray) -> float:
 def evaluate(
     y_true: np.ndarray, y_pred: np.ndarray, last_close: np.ndarray
 ) -> dict:
+    from sklearn.metrics import mean_absolute_error
+
     if y_true.ndim == 1:
         p50_true = y_true + last_close
         p50_pred = y_pred + last_close
@@ -42,6 +73,291 @@ def evaluate(
     }
 
 
+def evaluate_batches(
+    model: CatBoostRegressor,
+    batches: Iterable[DatasetSplit],
+    target_idx: int | None,
+    mean: np.ndarray,
+    std: np.ndarray,
+) -> dict:
+    """Streaming equivalent of :func:`evaluate` over raw (unnormalized) batches."""
+    abs_sum = 0.0
+    ape_sum = 0.0
+    count = 0
+    for batch in batches:
+        pred = model.predict(zscore_apply(batch.X, mean, std, out=batch.X))
+        y = batch.y if target_idx is None else batch.y[:, target_idx]
+        last_close = batch.last_close if y.ndim == 1 else batch.last_close[:, None]
+        err = np.abs(y - pred)
+        denom = np.maximum(np.abs(y + last_close), 1e-6)
+        abs_sum += float(err.sum(dtype=np.float64))
+        ape_sum += float((err / denom).sum(dtype=np.float64))
+        count += err.size
+    return {"mae_delta": abs_sum / count, "mape_price": ape_sum / count}
+
+
+def evaluate_test(
+    args: argparse.Namespace,
+    model: CatBoostRegressor,
+    mean: np.ndarray,
+    std: np.ndarray,
+) -> dict | None:
+    """Scores on the held-out test split; val metrics are biased by early stopping."""
+    read = {"target_columns": _target_columns(args), **split_filters(args)}
+    try:
+        files = open_split(args.data_dirs, "test", max_rows=args.max_rows, **read)
+    except FileNotFoundError:
+        print("[catboost] no test split, test_metrics not recorded")
+        return None
+    target_idx = None if args.multi_target else 0
+    return evaluate_batches(model, iter_batches(files, args.batch_size), target_idx, mean, std)
+
+
+def _write_pool_tsv(
+    files: List[SplitFile],
+    dest: Path,
+    target_idx: int,
+    mean: np.ndarray,
+    std: np.ndarray,
+    batch_size: int,
+) -> None:
+    # label first, normalized features after: CatBoost's default column layout
+    with dest.open("w") as f:
+        for batch in iter_batches(files, batch_size):
+            X = zscore_apply(batch.X, mean, std, out=batch.X)
+            block = np.column_stack([batch.y[:, target_idx], X])
+            np.savetxt(f, block, delimiter="\t", fmt="%.9g")
+
+
+def build_quantized_pools(
+    train_files: List[SplitFile],
+    val_files: List[SplitFile],
+    work_dir: Path,
+    target_idx: int,
+    mean: np.ndarray,
+    std: np.ndarray,
+    batch_size: int = DEFAULT_BATCH_ROWS,
+    used_ram_limit: str | None = None,
+) -> Tuple[Pool, Pool]:
+    """Quantize train/val into CatBoost pool files without holding raw floats."""
+    from catboost import Pool
+    from catboost.utils import quantize
+
+    cd_path = work_dir / "pool.cd"
+    cd_path.write_text("0\tLabel\n")
+    borders_path = work_dir / "borders.tsv"
+    pools: List[Pool] = []
+    for name, files in (("train", train_files), ("val", val_files)):
+        tsv_path = work_dir / f"{name}.tsv"
+        _write_pool_tsv(files, tsv_path, target_idx, mean, std, batch_size)
+        pool = quantize(
+            data_path=str(tsv_path),
+            column_description=str(cd_path),
+            input_borders=str(borders_path) if name == "val" else None,
+            used_ram_limit=used_ram_limit,
+        )
+        tsv_path.unlink()
+        if name == "train":
+            pool.save_quantization_borders(str(borders_path))
+        pool_path = work_dir / f"{name}.qpool"
+        pool.save(str(pool_path))
+        del pool
+        pools.append(Pool(f"quantized://{pool_path}"))
+    return pools[0], pools[1]
+
+
+@dataclass
+class FitResult:
+    model: CatBoostRegressor
+    mean: np.ndarray
+    std: np.ndarray
+    target_columns: List[str]
+    metrics: dict
+    splits: Dict[str, int]
+    training: Dict[str, object]
+    parent_metrics: Dict[str, float] | None = None
+
+
+def _target_columns(args: argparse.Namespace) -> List[str] | None:
+    # None reads every target_* column (target_1..target_H in horizon order)
+    if args.multi_target:
+        return None
+    if args.target_index < 1:
+        raise ValueError(f"target-index {args.target_index} is out of range (must be >= 1)")
+    return [f"target_{args.target_index}"]
+
+
+class _Deadline:
+    """CatBoost callback that stops training once the time budget is spent."""
+
+    def __init__(self, deadline: float | None) -> None:
+        self.deadline = deadline
+        self.hit = False
+
+    def after_iteration(self, info) -> bool:
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.hit = True
+        return not self.hit
+
+
+def _fit_controlled(
+    model: CatBoostRegressor,
+    control: TrainingControl,
+    tag: str,
+    train: np.ndarray | Pool,
+    label: np.ndarray | None = None,
+    eval_set: Tuple[np.ndarray, np.ndarray] | Pool | None = None,
+    init_model: Path | None = None,
+) -> None:
+    """Fit under ``control`` and record the iterations actually kept."""
+    control.begin()
+    deadline = _Deadline(control.model_deadline())
+    model.set_params(**control.catboost_params(tag))
+    model.fit(
+        train,
+        label,
+        eval_set=eval_set,
+        callbacks=[deadline],
+        init_model=str(init_model) if init_model else None,
+    )
+    trained = len(next(iter(model.get_evals_result()["validation"].values())))
+    stopped_by = None
+    if deadline.hit:
+        stopped_by = "time_budget"
+    elif trained < model.get_params()["iterations"]:
+        stopped_by = "early_stopping"
+    from catboost import CatBoostRegressor
+
+    # count continued trees on top of the parent's, like lightgbm iterations
+    base = CatBoostRegressor().load_model(str(init_model)).tree_count_ if init_model else 0
+    control.record(tag, int(model.tree_count_), base + trained, stopped_by)
+
+
+def _new_model(args: argparse.Namespace) -> CatBoostRegressor:
+    from catboost import CatBoostRegressor
+
+    return CatBoostRegressor(
+        loss_function="MultiRMSE" if args.multi_target else "RMSE",
+        iterations=args.iterations,
+        depth=args.depth,
+        learning_rate=args.learning_rate,
+        random_seed=args.random_state,
+        verbose=200,
+        allow_writing_files=False,
+        used_ram_limit=args.ram_limit,
+    )
+
+
+def _fit_in_memory(args: argparse.Namespace, warm: WarmStart | None) -> FitResult:
+    # only the trained horizon(s) are parsed out of the target_* columns
+    target_columns = _target_columns(args)
+    train_filters = warm.train_filters(args) if warm else split_filters(args)
+    train = load_split(
+        args.data_dirs,
+        "train",
+        max_rows=args.max_rows,
+        target_columns=target_columns,
+        **train_filters,
+    )
+    val = load_split(
+        args.data_dirs,
+        "val",
+        max_rows=args.max_rows,
+        target_columns=target_columns,
+        **split_filters(args),
+    )
+    y_train = train.y if args.multi_target else train.y[:, 0]
+    y_val = val.y if args.multi_target else val.y[:, 0]
+
+    parent_metrics = None
+    if warm is not None:
+        if warm.meta.get("target_columns") != train.target_columns:
+            raise ValueError(f"{warm.model_path} was trained on different targets")
+        from catboost import CatBoostRegressor
+
+        parent = CatBoostRegressor()
+        parent.load_model(str(warm.model_path))
+        # the parent scores val with its own normalization, before ours is applied
+        parent_pred = parent.predict(zscore_apply(val.X, *warm.normalization()))
+        parent_metrics = evaluate(y_val, parent_pred, val.last_close)
+
+    if warm and warm.incremental:
+        # continued trees split on the parent's normalized feature scale
+        mean, std = warm.normalization()
+    else:
+        stats = zscore_stats_from_meta(
+            args.data_dirs, "train", max_rows=args.max_rows, **split_filters(args)
+        )
+        mean, std = stats if stats is not None else zscore_stats(train.X)
+    X_train = zscore_apply(train.X, mean, std, out=train.X)
+    X_val = zscore_apply(val.X, mean, std, out=val.X)
+
+    model = _new_model(args)
+    control = training_control(args)
+    init_model = None
+    if warm and warm.incremental:
+        print(f"[catboost] continuing {warm.model_path} on {len(X_train)} new rows")
+        model.set_params(iterations=args.warm_rounds)
+        init_model = warm.model_path
+    _fit_controlled(
+        model, control, args.model_name, X_train, y_train, (X_val, y_val), init_model
+    )
+
+    val_pred = model.predict(X_val)
+    metrics = evaluate(y_val, val_pred, val.last_close)
+    splits = {"train": len(train.X), "val": len(val.X)}
+    return FitResult(
+        model,
+        mean,
+        std,
+        train.target_columns,
+        metrics,
+        splits,
+        control.summary(),
+        parent_metrics,
+    )
+
+
+def _fit_out_of_core(args: argparse.Namespace) -> FitResult:
+    read = {"target_columns": _target_columns(args), **split_filters(args)}
+    train_files = open_split(args.data_dirs, "train", max_rows=args.max_rows, **read)
+    val_files = open_split(args.data_dirs, "val", max_rows=args.max_rows, **read)
+    target_columns = train_files[0].target_columns
+    target_idx = 0
+
+    stats = zscore_stats_from_meta(
+        args.data_dirs, "train", max_rows=args.max_rows, **split_filters(args)
+    )
+    if stats is None:
+        stats = zscore_stats_batches(iter_batches(train_files, args.batch_size))
+    mean, std = stats
+    model = _new_model(args)
+    control = training_control(args)
+    with tempfile.TemporaryDirectory(prefix="catboost-pool-") as work_dir:
+        train_pool, val_pool = build_quantized_pools(
+            train_files,
+            val_files,
+            Path(work_dir),
+            target_idx,
+            mean,
+            std,
+            batch_size=args.batch_size,
+            used_ram_limit=args.ram_limit,
+        )
+        _fit_controlled(model, control, args.model_name, train_pool, eval_set=val_pool)
+
+    metrics = evaluate_batches(
+        model, iter_batches(val_files, args.batch_size), target_idx, mean, std
+    )
+    splits = {
+        "train": sum(f.rows for f in train_files),
+        "val": sum(f.rows for f in val_files),
+    }
+    return FitResult(
+        model, mean, std, target_columns, metrics, splits, control.summary()
+    )
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Train CatBoost multi-horizon model.")
     parser.add_argument(
@@ -63,40 +379,45 @@ def main() -> None:
         default=1,
         help="1-based target column index (target_1 is 1).",
     )
-    args = parser.parse_args()
-
-    train = load_split(args.data_dirs, "train", max_rows=args.max_rows)
-    val = load_split(args.data_dirs, "val", max_rows=args.max_rows)
-
-    mean, std = zscore_stats(train.X)
-    X_train = zscore_apply(train.X, mean, std)
-    X_val = zscore_apply(val.X, mean, std)
-
-    if not train.target_columns:
-        raise ValueError("No target columns found in training data.")
-    if args.target_index < 1 or args.target_index > len(train.target_columns):
-        raise ValueError(
-            f"target-index {args.target_index} is out of range (1..{len(train.target_columns)})"
-        )
-
-    target_idx = args.target_index - 1
-    target_column = train.target_columns[target_idx]
-    y_train = train.y[:, target_idx]
-    y_val = val.y[:, target_idx]
-
-    model = CatBoostRegressor(
-        loss_function="RMSE",
-        iterations=args.iterations,
-        depth=args.depth,
-        learning_rate=args.learning_rate,
-        random_seed=args.random_state,
-        verbose=200,
-        allow_writing_files=False,
+    parser.add_argument(
+        "--multi-target",
+        action="store_true",
+        help="Train one MultiRMSE model over all target_* columns instead of --target-index.",
+    )
+    add_split_filter_args(parser)
+    add_training_control_args(parser)
+    add_warm_start_args(parser)
+    parser.add_argument(
+        "--out-of-core",
+        action="store_true",
+        help="Stream features from the .npy sidecars into quantized CatBoost pools.",
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_ROWS)
+    parser.add_argument(
+        "--ram-limit",
+        default=None,
+        help="CatBoost used_ram_limit for quantization/training, e.g. 8gb.",
     )
-    model.fit(X_train, y_train, eval_set=(X_val, y_val))
+    args = parse_args_with_params_from(parser)
+    if args.multi_target and args.out_of_core:
+        # CatBoost cannot serialize multi-dimensional labels into quantized pools
+        parser.error("--multi-target is not supported with --out-of-core")
 
-    val_pred = model.predict(X_val)
-    metrics = evaluate(y_val, val_pred, val.last_close)
+    if args.out_of_core and args.init_model:
+        parser.error("--init-model is not supported with --out-of-core")
+    # after argument parsing so --help has no side effects
+    MPL_DIR.mkdir(parents=True, exist_ok=True)
+    os.environ.setdefault("MPLCONFIGDIR", str(MPL_DIR))
+
+    warm = resolve_warm_start(args)
+    started = time.perf_counter()
+    if args.out_of_core:
+        result = _fit_out_of_core(args)
+    else:
+        result = _fit_in_memory(args, warm)
+    fit_sec = time.perf_counter() - started
+    model = result.model
+    test_metrics = evaluate_test(args, model, result.mean, result.std)
 
     out_dir = Path(args.out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -106,18 +427,35 @@ def main() -> None:
     meta = {
         "model_name": args.model_name,
         "features": FEATURE_COLUMNS,
-        "target_columns": [target_column],
-        "normalization": {"type": "zscore", "mean": mean.tolist(), "std": std.tolist()},
-        "metrics": metrics,
-        "splits": {"train": len(train.X), "val": len(val.X)},
+        "target_columns": result.target_columns,
+        "normalization": {
+            "type": "zscore",
+            "mean": result.mean.tolist(),
+            "std": result.std.tolist(),
+        },
+        "metrics": result.metrics,
+        "test_metrics": test_metrics,
+        "splits": result.splits,
         "data_dirs": [str(p) for p in args.data_dirs],
+        "filters": split_filters(args),
         "params": {
             "iterations": args.iterations,
             "depth": args.depth,
             "learning_rate": args.learning_rate,
             "random_state": args.random_state,
-            "target_index": args.target_index,
+            "loss_function": model.get_params()["loss_function"],
+            "target_index": None if args.multi_target else args.target_index,
+            "out_of_core": args.out_of_core,
         },
+        "training": result.training,
+        "lineage": lineage_meta(
+            args,
+            warm,
+            result.splits["train"],
+            fit_sec,
+            result.metrics,
+            result.parent_metrics,
+        ),
     }
     meta_path = out_dir / f"{args.model_name}.meta.json"
     meta_path.write_text(json.dumps(meta, ensure_ascii=True, indent=2))
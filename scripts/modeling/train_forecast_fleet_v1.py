@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+from feature_dataset import SeriesInfo, list_series
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ARTIFACT_SUFFIX = {"lgbm": ".joblib", "catboost": ".cbm"}
+# rough peak RSS per loaded float32 cell (raw, normalized, binned, predictions, slack)
+MEMORY_OVERHEAD = 8
+
+
+def _parse_dirs(value: str) -> List[Path]:
+    return [Path(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def _parse_list(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+@dataclass
+class FleetJob:
+    series: SeriesInfo
+    model_name: str
+    estimate_bytes: int
+
+
+def estimate_bytes(series: SeriesInfo) -> int:
+    header = (series.data_dir / f"{series.name}_train.csv").open().readline()
+    columns = len(header.split(","))
+    rows = series.rows.get("train", 0) + series.rows.get("val", 0)
+    return rows * columns * 4 * MEMORY_OVERHEAD
+
+
+def _limit_memory(limit_bytes: int | None):
+    if limit_bytes is None:
+        return None
+
+    def _apply() -> None:
+        import resource
+
+        resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, limit_bytes))
+
+    return _apply
+
+
+def run_job(
+    job: FleetJob,
+    args: argparse.Namespace,
+    trainer_args: List[str],
+    threads: int,
+) -> Dict[str, object]:
+    """Train one series in its own process; never raises for a failed trainer."""
+    out_dir = Path(args.out_dir)
+    log_path = out_dir / "logs" / f"{job.series.name}.log"
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    cmd = [
+        sys.executable,
+        str(SCRIPT_DIR / f"train_forecast_{args.model}_v1.py"),
+        "--data-dirs",
+        str(job.series.data_dir),
+        "--symbols",
+        job.series.name,
+        "--out-dir",
+        str(out_dir),
+        "--model-name",
+        job.model_name,
+    ]
+    if args.model == "lgbm" and "--n-jobs" not in trainer_args:
+        cmd += ["--n-jobs", str(threads)]
+    cmd += trainer_args
+    env = {**os.environ, "OMP_NUM_THREADS": str(threads)}
+    limit = int(args.max_model_memory_gb * 2**30) if args.max_model_memory_gb else None
+
+    started = time.perf_counter()
+    with log_path.open("w") as log:
+        proc = subprocess.run(
+            cmd,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            env=env,
+            preexec_fn=_limit_memory(limit),
+        )
+    seconds = time.perf_counter() - started
+
+    entry: Dict[str, object] = {
+        "status": "ok" if proc.returncode == 0 else "failed",
+        "data_dir": str(job.series.data_dir),
+        "rows": job.series.rows,
+        "seconds": round(seconds, 3),
+        "log": str(log_path),
+    }
+    if proc.returncode != 0:
+        lines = log_path.read_text().strip().splitlines()
+        entry["error"] = f"exit {proc.returncode}: {lines[-1] if lines else ''}"
+        return entry
+    meta_path = out_dir / f"{job.model_name}.meta.json"
+    entry["model"] = str(out_dir / f"{job.model_name}{ARTIFACT_SUFFIX[args.model]}")
+    entry["meta"] = str(meta_path)
+    entry["metrics"] = json.loads(meta_path.read_text()).get("metrics")
+    return entry
+
+
+def run_fleet(
+    jobs: List[FleetJob], args: argparse.Namespace, trainer_args: List[str]
+) -> Dict[str, Dict[str, object]]:
+    """Run ``jobs`` with at most ``args.workers`` at once and, if a memory
+    budget is set, only while their summed estimates fit in it (one job
+    always runs, so an oversized series still gets its turn).
+    """
+    budget = int(args.memory_budget_gb * 2**30) if args.memory_budget_gb else None
+    threads = max(1, (os.cpu_count() or 1) // args.workers)
+    # largest first, so big series do not end up running alone at the tail
+    queue = sorted(jobs, key=lambda j: j.estimate_bytes, reverse=True)
+    results: Dict[str, Dict[str, object]] = {}
+    running: Dict[Future, FleetJob] = {}
+    in_use = 0
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        while queue or running:
+            while queue and len(running) < args.workers:
+                job = next(
+                    (
+                        j
+                        for j in queue
+                        if budget is None or not running or in_use + j.estimate_bytes <= budget
+                    ),
+                    None,
+                )
+                if job is None:
+                    break
+                queue.remove(job)
+                in_use += job.estimate_bytes
+                running[pool.submit(run_job, job, args, trainer_args, threads)] = job
+                print(
+                    f"[fleet] start {job.series.name} "
+                    f"(~{job.estimate_bytes / 2**20:.0f} MiB, {len(running)} running)"
+                )
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                in_use -= job.estimate_bytes
+                entry = future.result()
+                results[job.series.name] = entry
+                status = entry["status"]
+                detail = (
+                    f"mae_delta={entry['metrics']['mae_delta']:.4f}"
+                    if status == "ok" and entry.get("metrics")
+                    else entry.get("error", "")
+                )
+                print(
+                    f"[fleet] [{len(results)}/{len(jobs)}] {job.series.name} {status} "
+                    f"in {entry['seconds']:.1f}s {detail}"
+                )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Train one model per series. Unrecognized flags are passed to "
+            "every trainer run (e.g. --n-estimators 200)."
+        )
+    )
+    parser.add_argument("--model", choices=sorted(ARTIFACT_SUFFIX), default="lgbm")
+    parser.add_argument(
+        "--data-dirs",
+        default="data/features/v1/binance",
+        type=_parse_dirs,
+        help="Comma-separated feature directories to discover series in.",
+    )
+    parser.add_argument(
+        "--series",
+        default=None,
+        type=_parse_list,
+        help="Only these symbols/series (BTCUSDT or BTCUSDT_1h).",
+    )
+    parser.add_argument("--out-dir", default=None)
+    parser.add_argument("--model-name", default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--memory-budget-gb",
+        type=float,
+        default=None,
+        help="Start series only while their estimated memory fits in this budget.",
+    )
+    parser.add_argument(
+        "--max-model-memory-gb",
+        type=float,
+        default=None,
+        help="Hard address-space limit per trainer process (it fails instead of swapping).",
+    )
+    args, trainer_args = parser.parse_known_args()
+    args.out_dir = args.out_dir or f"data/models/v1/fleet/{args.model}"
+    base_name = args.model_name or f"forecast_{args.model}_v1"
+
+    series = list_series(args.data_dirs, args.series)
+    if not series:
+        raise FileNotFoundError(f"No series with a train split under {args.data_dirs}")
+    jobs = [FleetJob(s, f"{base_name}_{s.name}", estimate_bytes(s)) for s in series]
+    print(f"[fleet] {len(jobs)} series, model={args.model}, workers={args.workers}")
+
+    started = time.perf_counter()
+    results = run_fleet(jobs, args, trainer_args)
+    elapsed = time.perf_counter() - started
+
+    failed = sorted(name for name, entry in results.items() if entry["status"] != "ok")
+    index = {
+        "model": args.model,
+        "model_name": base_name,
+        "data_dirs": [str(p) for p in args.data_dirs],
+        "trainer_args": trainer_args,
+        "summary": {
+            "series": len(results),
+            "ok": len(results) - len(failed),
+            "failed": failed,
+            "elapsed_sec": round(elapsed, 3),
+            "model_sec": round(sum(e["seconds"] for e in results.values()), 3),
+        },
+        "series": {name: results[name] for name in sorted(results)},
+    }
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    index_path = out_dir / f"{base_name}.fleet.json"
+    index_path.write_text(json.dumps(index, ensure_ascii=True, indent=2))
+
+    print(f"[fleet] {len(results) - len(failed)}/{len(results)} ok in {elapsed:.1f}s")
+    if failed:
+        print(f"[fleet] failed: {', '.join(failed)} (see {out_dir / 'logs'})")
+    print(f"[fleet] index -> {index_path}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
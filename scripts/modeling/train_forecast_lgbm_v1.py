@@ -1,29 +1,109 @@
 from __future__ import annotations
 
 import argparse
+import functools
+import hashlib
 import json
+import math
 import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Tuple
 
 import numpy as np
-from lightgbm import LGBMRegressor
-from sklearn.metrics import mean_absolute_error
-from sklearn.multioutput import MultiOutputRegressor
-from joblib import dump
 
-from feature_dataset import FEATURE_COLUMNS, load_split, zscore_apply, zscore_stats
+from feature_dataset import (
+    DEFAULT_BATCH_ROWS,
+    FEATURE_COLUMNS,
+    DatasetSplit,
+    SplitFile,
+    add_split_filter_args,
+    iter_batches,
+    load_split,
+    open_split,
+    split_filters,
+    zscore_apply,
+    zscore_stats,
+    zscore_stats_batches,
+    zscore_stats_from_meta,
+)
+from lgbm_model import HorizonBoosters, load_lgbm
+from training_control import (
+    TrainingControl,
+    add_training_control_args,
+    parse_args_with_params_from,
+    training_control,
+)
+from warm_start import (
+    WarmStart,
+    add_warm_start_args,
+    lineage_meta,
+    resolve_warm_start,
+)
+
+# lightgbm, sklearn and joblib load on first use, keeping --help and importers fast
+if TYPE_CHECKING:
+    import lightgbm as lgb
 
 ROOT = Path(__file__).resolve().parents[2]
 MPL_DIR = ROOT / ".mplconfig"
-MPL_DIR.mkdir(parents=True, exist_ok=True)
-os.environ.setdefault("MPLCONFIGDIR", str(MPL_DIR))
 
 
 def _parse_dirs(value: str) -> List[Path]:
     return [Path(v.strip()) for v in value.split(",") if v.strip()]
 
 
+# rows per thread below which extra LightGBM threads stop paying off (10 features)
+ROWS_PER_THREAD = 100_000
+
+
+@dataclass
+class ThreadPlan:
+    workers: int
+    threads_per_model: int
+
+
+def plan_threads(
+    n_rows: int,
+    n_models: int,
+    budget: int | None = None,
+    threads_per_model: int | None = None,
+) -> ThreadPlan:
+    """Split a core budget between concurrent horizon models and their threads."""
+    budget = max(1, budget or os.cpu_count() or 1)
+    if threads_per_model is None:
+        threads_per_model = math.ceil(n_rows / ROWS_PER_THREAD)
+    threads_per_model = min(max(1, threads_per_model), budget)
+    workers = max(1, min(n_models, budget // threads_per_model))
+    return ThreadPlan(workers=workers, threads_per_model=threads_per_model)
+
+
+def train_horizons(
+    fit_one: Callable[[int, int], lgb.Booster],
+    target_columns: List[str],
+    plan: ThreadPlan,
+) -> Tuple[List[lgb.Booster], List[float]]:
+    """Run ``fit_one(target_idx, num_threads)`` for every target under ``plan``."""
+
+    def _timed(target_idx: int) -> Tuple[lgb.Booster, float]:
+        started = time.perf_counter()
+        est = fit_one(target_idx, plan.threads_per_model)
+        elapsed = time.perf_counter() - started
+        print(
+            f"[lgbm] {target_columns[target_idx]}: {elapsed:.2f}s "
+            f"({plan.threads_per_model} threads)"
+        )
+        return est, elapsed
+
+    with ThreadPoolExecutor(max_workers=plan.workers) as pool:
+        done = list(pool.map(_timed, range(len(target_columns))))
+    return [est for est, _ in done], [elapsed for _, elapsed in done]
+
+
 def _mape(y_true: np.ndarray, y_pred: np.ndarray) -> float:
     denom = np.maximum(np.abs(y_true), 1e-6)
     return float(np.mean(np.abs((y_true - y_pred) / denom)))
@@ -32,6 +112,8 @@ def _mape(y_true: np.ndarray, y_pred: np.ndarray) -> float:
 def evaluate(
     y_true: np.ndarray, y_pred: np.ndarray, last_close: np.ndarray
 ) -> dict:
+    from sklearn.metrics import mean_absolute_error
+
     p50_true = y_true + last_close[:, None]
     p50_pred = y_pred + last_close[:, None]
     return {
@@ -40,6 +122,437 @@ def evaluate(
     }
 
 
+def evaluate_batches(
+    model: HorizonBoosters,
+    batches: Iterable[DatasetSplit],
+    mean: np.ndarray,
+    std: np.ndarray,
+) -> dict:
+    """Streaming equivalent of :func:`evaluate` over raw (unnormalized) batches."""
+    abs_sum = 0.0
+    ape_sum = 0.0
+    count = 0
+    for batch in batches:
+        pred = model.predict(zscore_apply(batch.X, mean, std, out=batch.X))
+        err = np.abs(batch.y - pred)
+        denom = np.maximum(np.abs(batch.y + batch.last_close[:, None]), 1e-6)
+        abs_sum += float(err.sum(dtype=np.float64))
+        ape_sum += float((err / denom).sum(dtype=np.float64))
+        count += err.size
+    return {"mae_delta": abs_sum / count, "mape_price": ape_sum / count}
+
+
+def evaluate_test(
+    args: argparse.Namespace,
+    model: HorizonBoosters,
+    mean: np.ndarray,
+    std: np.ndarray,
+) -> dict | None:
+    """Scores on the held-out test split; val metrics are biased by early stopping."""
+    try:
+        files = open_split(args.data_dirs, "test", max_rows=args.max_rows, **split_filters(args))
+    except FileNotFoundError:
+        print("[lgbm] no test split, test_metrics not recorded")
+        return None
+    return evaluate_batches(model, iter_batches(files, args.batch_size), mean, std)
+
+
+@functools.lru_cache(maxsize=None)
+def _normalized_sequence_type() -> type:
+    """``lgb.Sequence`` subclass, defined on first use so lightgbm loads lazily."""
+    import lightgbm as lgb
+
+    class _NormalizedSequence(lgb.Sequence):
+        """Feeds one sidecar-backed feature file to ``lgb.Dataset`` batch by batch."""
+
+        def __init__(
+            self, split_file: SplitFile, mean: np.ndarray, std: np.ndarray, batch_size: int
+        ) -> None:
+            self.split_file = split_file
+            self.mean = mean
+            self.std = std
+            self.batch_size = batch_size
+
+        def __len__(self) -> int:
+            return self.split_file.rows
+
+        def __getitem__(self, idx: int | slice) -> np.ndarray:
+            X = self.split_file.features(idx)
+            # lightgbm samples bins from float64 rows; normalize in float32 like load_split
+            return zscore_apply(X, self.mean, self.std, out=X).astype(np.float64)
+
+    return _NormalizedSequence
+
+
+# Boosting-only params; everything else may change how lightgbm bins features.
+_BOOSTING_PARAMS = ("n_estimators", "learning_rate", "num_threads", "n_jobs")
+
+
+def dataset_key(chunks: Iterable[np.ndarray], params: Dict[str, object]) -> str:
+    """Hash the normalized feature rows and binning params of a training set."""
+    import lightgbm as lgb
+
+    hasher = hashlib.blake2b(digest_size=16)
+    binning = {k: v for k, v in params.items() if k not in _BOOSTING_PARAMS}
+    hasher.update(json.dumps([lgb.__version__, binning], sort_keys=True).encode())
+    for chunk in chunks:
+        chunk = np.ascontiguousarray(chunk, dtype=np.float32)
+        hasher.update(str(chunk.shape).encode())
+        hasher.update(memoryview(chunk).cast("B"))
+    return hasher.hexdigest()
+
+
+def _dataset_params(params: Dict[str, object]) -> Dict[str, object]:
+    train_params = {**params, "objective": "regression", "verbose": -1}
+    train_params.pop("n_estimators", None)
+    return train_params
+
+
+def build_binned_dataset(
+    data: np.ndarray | List[lgb.Sequence],
+    n_rows: int,
+    key: str,
+    params: Dict[str, object],
+    cache_dir: Path,
+) -> Path:
+    """Bin ``data`` once and save it as a LightGBM binary named after ``key``."""
+    import lightgbm as lgb
+
+    path = cache_dir / f"lgb_{key}.bin"
+    if path.exists():
+        print(f"[lgbm] reusing binned dataset {path}")
+        return path
+    started = time.perf_counter()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    dataset = lgb.Dataset(
+        data,
+        label=np.zeros(n_rows, dtype=np.float32),
+        params=_dataset_params(params),
+    )
+    dataset.construct()
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    dataset.save_binary(str(tmp))
+    os.replace(tmp, path)
+    print(f"[lgbm] binned {n_rows} rows in {time.perf_counter() - started:.2f}s -> {path}")
+    return path
+
+
+def train_binned(
+    binary_path: Path,
+    label: Callable[[int], np.ndarray],
+    valid: np.ndarray | List[lgb.Sequence],
+    valid_label: Callable[[int], np.ndarray],
+    target_columns: List[str],
+    params: Dict[str, object],
+    plan: ThreadPlan,
+    control: TrainingControl,
+) -> Tuple[HorizonBoosters, List[float]]:
+    """Train one booster per target on the binned dataset at ``binary_path``."""
+    import lightgbm as lgb
+
+    train_params = _dataset_params(params)
+    n_estimators = int(params["n_estimators"])
+    local = threading.local()
+    control.begin(len(target_columns), plan.workers)
+
+    def _fit_one(target_idx: int, num_threads: int) -> lgb.Booster:
+        model_params = {**train_params, "num_threads": num_threads}
+        dataset = getattr(local, "dataset", None)
+        if dataset is None:
+            dataset = lgb.Dataset(str(binary_path), params=model_params)
+            dataset.construct()
+            local.dataset = dataset
+            local.valid_set = lgb.Dataset(
+                valid,
+                label=valid_label(target_idx),
+                reference=dataset,
+                params=model_params,
+            ).construct()
+        dataset.set_label(label(target_idx))
+        local.valid_set.set_label(valid_label(target_idx))
+        booster = lgb.train(
+            model_params,
+            dataset,
+            num_boost_round=n_estimators,
+            valid_sets=[local.valid_set],
+            valid_names=["val"],
+            callbacks=[control.lgb_callback(target_columns[target_idx])],
+        )
+        booster.free_dataset()
+        if booster.best_iteration > 0:
+            # drop trees past the best iteration so joblib/ONNX only carry used ones
+            booster = lgb.Booster(model_str=booster.model_to_string())
+        return booster
+
+    boosters, seconds = train_horizons(_fit_one, target_columns, plan)
+    return HorizonBoosters(boosters), seconds
+
+
+def train_in_memory(
+    X: np.ndarray,
+    y: np.ndarray,
+    X_val: np.ndarray,
+    y_val: np.ndarray,
+    target_columns: List[str],
+    params: Dict[str, object],
+    plan: ThreadPlan,
+    control: TrainingControl,
+    cache_dir: Path | None = None,
+) -> Tuple[HorizonBoosters, List[float]]:
+    key = dataset_key([X], params)
+    with tempfile.TemporaryDirectory(prefix="lgb_bins_") as tmp:
+        binary_path = build_binned_dataset(
+            X, len(X), key, params, cache_dir or Path(tmp)
+        )
+        return train_binned(
+            binary_path,
+            lambda i: np.ascontiguousarray(y[:, i]),
+            X_val,
+            lambda i: np.ascontiguousarray(y_val[:, i]),
+            target_columns,
+            params,
+            plan,
+            control,
+        )
+
+
+def train_warm(
+    X: np.ndarray,
+    y: np.ndarray,
+    X_val: np.ndarray,
+    y_val: np.ndarray,
+    target_columns: List[str],
+    params: Dict[str, object],
+    plan: ThreadPlan,
+    control: TrainingControl,
+    init_boosters: List[lgb.Booster],
+) -> Tuple[HorizonBoosters, List[float]]:
+    """Continue each horizon's booster for ``params["n_estimators"]`` rounds on new rows."""
+    import lightgbm as lgb
+
+    if len(init_boosters) != len(target_columns):
+        raise ValueError(
+            f"init model has {len(init_boosters)} horizons, data has {len(target_columns)}"
+        )
+    train_params = _dataset_params(params)
+    n_estimators = int(params["n_estimators"])
+    control.begin(len(target_columns), plan.workers)
+
+    def _fit_one(target_idx: int, num_threads: int) -> lgb.Booster:
+        model_params = {**train_params, "num_threads": num_threads}
+        dataset = lgb.Dataset(
+            X,
+            label=np.ascontiguousarray(y[:, target_idx]),
+            params=model_params,
+            free_raw_data=False,
+        )
+        valid_set = lgb.Dataset(
+            X_val,
+            label=np.ascontiguousarray(y_val[:, target_idx]),
+            reference=dataset,
+            free_raw_data=False,
+        )
+        booster = lgb.train(
+            model_params,
+            dataset,
+            num_boost_round=n_estimators,
+            init_model=init_boosters[target_idx],
+            valid_sets=[valid_set],
+            valid_names=["val"],
+            callbacks=[control.lgb_callback(target_columns[target_idx])],
+        )
+        booster.free_dataset()
+        if booster.best_iteration > 0:
+            booster = lgb.Booster(model_str=booster.model_to_string())
+        return booster
+
+    boosters, seconds = train_horizons(_fit_one, target_columns, plan)
+    return HorizonBoosters(boosters), seconds
+
+
+def train_out_of_core(
+    files: List[SplitFile],
+    val_files: List[SplitFile],
+    params: Dict[str, object],
+    mean: np.ndarray,
+    std: np.ndarray,
+    plan: ThreadPlan,
+    control: TrainingControl,
+    batch_size: int = DEFAULT_BATCH_ROWS,
+    cache_dir: Path | None = None,
+) -> Tuple[HorizonBoosters, List[float]]:
+    """Train one booster per target without materializing X."""
+    sequence = _normalized_sequence_type()
+    seqs = [sequence(f, mean, std, batch_size) for f in files]
+    n_rows = sum(len(seq) for seq in seqs)
+    key = dataset_key(
+        (seq[i : i + batch_size] for seq in seqs for i in range(0, len(seq), batch_size)),
+        params,
+    )
+
+    val_seqs = [sequence(f, mean, std, batch_size) for f in val_files]
+
+    def _label(target_idx: int) -> np.ndarray:
+        return np.concatenate([f.target(target_idx) for f in files])
+
+    def _val_label(target_idx: int) -> np.ndarray:
+        return np.concatenate([f.target(target_idx) for f in val_files])
+
+    with tempfile.TemporaryDirectory(prefix="lgb_bins_") as tmp:
+        binary_path = build_binned_dataset(
+            seqs, n_rows, key, params, cache_dir or Path(tmp)
+        )
+        return train_binned(
+            binary_path,
+            _label,
+            val_seqs,
+            _val_label,
+            files[0].target_columns,
+            params,
+            plan,
+            control,
+        )
+
+
+@dataclass
+class FitResult:
+    model: HorizonBoosters
+    mean: np.ndarray
+    std: np.ndarray
+    target_columns: List[str]
+    metrics: dict
+    splits: Dict[str, int]
+    plan: ThreadPlan
+    horizon_seconds: List[float]
+    training: Dict[str, object]
+    parent_metrics: Dict[str, float] | None = None
+
+
+def _fit_in_memory(
+    args: argparse.Namespace, params: Dict[str, object], warm: WarmStart | None
+) -> FitResult:
+    train_filters = warm.train_filters(args) if warm else split_filters(args)
+    train = load_split(args.data_dirs, "train", max_rows=args.max_rows, **train_filters)
+    val = load_split(
+        args.data_dirs, "val", max_rows=args.max_rows, **split_filters(args)
+    )
+
+    parent = None
+    parent_metrics = None
+    if warm:
+        parent = load_lgbm(warm.model_path)
+        # the parent scores val with its own normalization, before ours is applied
+        parent_pred = parent.predict(zscore_apply(val.X, *warm.normalization()))
+        parent_metrics = evaluate(val.y, parent_pred, val.last_close)
+
+    if warm and warm.incremental:
+        # continued trees split on the parent's normalized feature scale
+        mean, std = warm.normalization()
+    else:
+        stats = zscore_stats_from_meta(
+            args.data_dirs, "train", max_rows=args.max_rows, **split_filters(args)
+        )
+        mean, std = stats if stats is not None else zscore_stats(train.X)
+    X_train = zscore_apply(train.X, mean, std, out=train.X)
+    X_val = zscore_apply(val.X, mean, std, out=val.X)
+
+    plan = plan_threads(
+        len(X_train), len(train.target_columns), args.n_jobs, args.threads_per_model
+    )
+    control = training_control(args)
+    if warm and warm.incremental:
+        print(f"[lgbm] continuing {warm.model_path} on {len(X_train)} new rows")
+        model, seconds = train_warm(
+            X_train,
+            train.y,
+            X_val,
+            val.y,
+            train.target_columns,
+            {**params, "n_estimators": args.warm_rounds},
+            plan,
+            control,
+            parent.boosters,
+        )
+    else:
+        model, seconds = train_in_memory(
+            X_train,
+            train.y,
+            X_val,
+            val.y,
+            train.target_columns,
+            params,
+            plan,
+            control,
+            args.dataset_cache,
+        )
+
+    val_pred = model.predict(X_val)
+    metrics = evaluate(val.y, val_pred, val.last_close)
+    splits = {"train": len(train.X), "val": len(val.X)}
+    return FitResult(
+        model,
+        mean,
+        std,
+        train.target_columns,
+        metrics,
+        splits,
+        plan,
+        seconds,
+        control.summary(),
+        parent_metrics,
+    )
+
+
+def _fit_out_of_core(
+    args: argparse.Namespace, params: Dict[str, object]
+) -> FitResult:
+    train_files = open_split(
+        args.data_dirs, "train", max_rows=args.max_rows, **split_filters(args)
+    )
+    val_files = open_split(
+        args.data_dirs, "val", max_rows=args.max_rows, **split_filters(args)
+    )
+
+    stats = zscore_stats_from_meta(
+        args.data_dirs, "train", max_rows=args.max_rows, **split_filters(args)
+    )
+    if stats is None:
+        stats = zscore_stats_batches(iter_batches(train_files, args.batch_size))
+    mean, std = stats
+    target_columns = train_files[0].target_columns
+    splits = {
+        "train": sum(f.rows for f in train_files),
+        "val": sum(f.rows for f in val_files),
+    }
+    plan = plan_threads(
+        splits["train"], len(target_columns), args.n_jobs, args.threads_per_model
+    )
+    control = training_control(args)
+    model, seconds = train_out_of_core(
+        train_files,
+        val_files,
+        params,
+        mean,
+        std,
+        plan,
+        control,
+        args.batch_size,
+        args.dataset_cache,
+    )
+    metrics = evaluate_batches(model, iter_batches(val_files, args.batch_size), mean, std)
+    return FitResult(
+        model,
+        mean,
+        std,
+        target_columns,
+        metrics,
+        splits,
+        plan,
+        seconds,
+        control.summary(),
+    )
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Train LGBM multi-horizon model.")
     parser.add_argument(
@@ -56,49 +569,103 @@ def main() -> None:
     parser.add_argument("--max-depth", type=int, default=7)
     parser.add_argument("--num-leaves", type=int, default=63)
     parser.add_argument("--max-rows", type=int, default=None)
-    args = parser.parse_args()
-
-    train = load_split(args.data_dirs, "train", max_rows=args.max_rows)
-    val = load_split(args.data_dirs, "val", max_rows=args.max_rows)
+    add_split_filter_args(parser)
+    add_training_control_args(parser)
+    add_warm_start_args(parser)
+    parser.add_argument(
+        "--out-of-core",
+        action="store_true",
+        help="Stream features from the .npy sidecars instead of loading splits into RAM.",
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_ROWS)
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        default=None,
+        help="Core budget shared by concurrent horizon models (default: all cores).",
+    )
+    parser.add_argument(
+        "--threads-per-model",
+        type=int,
+        default=None,
+        help="Override the LightGBM threads per horizon model picked from dataset size.",
+    )
+    parser.add_argument(
+        "--dataset-cache",
+        type=Path,
+        default=None,
+        help="Keep binned LightGBM datasets here, keyed by data hash, to skip binning on reruns.",
+    )
+    args = parse_args_with_params_from(parser)
+    # after argument parsing so --help has no side effects
+    MPL_DIR.mkdir(parents=True, exist_ok=True)
+    os.environ.setdefault("MPLCONFIGDIR", str(MPL_DIR))
 
-    mean, std = zscore_stats(train.X)
-    X_train = zscore_apply(train.X, mean, std)
-    X_val = zscore_apply(val.X, mean, std)
+    params: Dict[str, object] = {
+        "n_estimators": args.n_estimators,
+        "learning_rate": args.learning_rate,
+        "max_depth": args.max_depth,
+        "num_leaves": args.num_leaves,
+        "objective": "regression",
+        "random_state": args.random_state,
+    }
+    if args.out_of_core and args.init_model:
+        # init_model scores the new rows with the parent trees from raw data
+        parser.error("--init-model is not supported with --out-of-core")
 
-    base = LGBMRegressor(
-        n_estimators=args.n_estimators,
-        learning_rate=args.learning_rate,
-        max_depth=args.max_depth,
-        num_leaves=args.num_leaves,
-        objective="regression",
-        random_state=args.random_state,
-    )
-    model = MultiOutputRegressor(base, n_jobs=1)
-    model.fit(X_train, train.y)
+    warm = resolve_warm_start(args)
+    started = time.perf_counter()
+    if args.out_of_core:
+        result = _fit_out_of_core(args, params)
+    else:
+        result = _fit_in_memory(args, params, warm)
+    fit_sec = time.perf_counter() - started
+    test_metrics = evaluate_test(args, result.model, result.mean, result.std)
 
-    val_pred = model.predict(X_val)
-    metrics = evaluate(val.y, val_pred, val.last_close)
+    from joblib import dump
 
     out_dir = Path(args.out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
     model_path = out_dir / f"{args.model_name}.joblib"
-    dump(model, model_path)
+    dump(result.model, model_path)
 
     meta = {
         "model_name": args.model_name,
         "features": FEATURE_COLUMNS,
-        "target_columns": train.target_columns,
-        "normalization": {"type": "zscore", "mean": mean.tolist(), "std": std.tolist()},
-        "metrics": metrics,
-        "splits": {"train": len(train.X), "val": len(val.X)},
+        "target_columns": result.target_columns,
+        "normalization": {
+            "type": "zscore",
+            "mean": result.mean.tolist(),
+            "std": result.std.tolist(),
+        },
+        "metrics": result.metrics,
+        "test_metrics": test_metrics,
+        "splits": result.splits,
         "data_dirs": [str(p) for p in args.data_dirs],
+        "filters": split_filters(args),
         "params": {
             "n_estimators": args.n_estimators,
             "learning_rate": args.learning_rate,
             "max_depth": args.max_depth,
             "num_leaves": args.num_leaves,
             "random_state": args.random_state,
+            "out_of_core": args.out_of_core,
+        },
+        "timings": {
+            "workers": result.plan.workers,
+            "threads_per_model": result.plan.threads_per_model,
+            "horizon_sec": [round(t, 3) for t in result.horizon_seconds],
+            "total_horizon_sec": round(sum(result.horizon_seconds), 3),
         },
+        "training": result.training,
+        "lineage": lineage_meta(
+            args,
+            warm,
+            result.splits["train"],
+            fit_sec,
+            result.metrics,
+            result.parent_metrics,
+        ),
     }
     meta_path = out_dir / f"{args.model_name}.meta.json"
     meta_path.write_text(json.dumps(meta, ensure_ascii=True, indent=2))
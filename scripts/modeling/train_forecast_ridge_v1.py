@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from export_forecast_models_v1 import _write_sha
+from feature_dataset import (
+    DEFAULT_BATCH_ROWS,
+    FEATURE_COLUMNS,
+    add_split_filter_args,
+    iter_batches,
+    open_split,
+    split_filters,
+)
+from ridge_stats import RidgeStats, accumulate, load_stats, save_stats, to_linear_regression
+from train_forecast_lgbm_v1 import evaluate_batches
+
+# the minimal model's exporter lives one level up, in scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from train_forecast_minimal import export_onnx
+
+DEFAULT_ALPHAS = "0,0.01,0.1,1,10,100,1000"
+
+
+def _parse_dirs(value: str) -> List[Path]:
+    return [Path(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def _parse_alphas(value: str) -> List[float]:
+    return [float(v) for v in value.split(",") if v.strip()]
+
+
+def select_alpha(
+    stats: Dict[str, RidgeStats], alphas: List[float], mean: np.ndarray, std: np.ndarray
+) -> Tuple[float, Dict[str, float]]:
+    """Closed-form solve for every alpha, scored by val MSE straight from the val stats."""
+    scores: Dict[str, float] = {}
+    for alpha in alphas:
+        coef, intercept = stats["train"].solve(alpha, mean, std)
+        scores[repr(alpha)] = float(stats["val"].mse(coef, intercept, mean, std).mean())
+    best = min(alphas, key=lambda a: scores[repr(a)])
+    return best, scores
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Streaming closed-form ridge/OLS forecaster: one pass accumulates "
+            "sufficient statistics, every alpha is then solved without data."
+        )
+    )
+    parser.add_argument(
+        "--data-dirs",
+        default="data/features/v1/binance",
+        type=_parse_dirs,
+        help="Comma-separated feature directories.",
+    )
+    parser.add_argument("--out-dir", default="data/models/v1/ridge")
+    parser.add_argument("--model-name", default="forecast_ridge_v1")
+    parser.add_argument(
+        "--alphas",
+        default=DEFAULT_ALPHAS,
+        type=_parse_alphas,
+        help="Ridge strengths to solve for; the best on val is kept (0 is OLS).",
+    )
+    parser.add_argument(
+        "--from-stats",
+        type=Path,
+        default=None,
+        help="Refit from a saved .stats.npz instead of reading the feature store.",
+    )
+    parser.add_argument("--max-rows", type=int, default=None)
+    add_split_filter_args(parser)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_ROWS)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Chunks reduced concurrently during the statistics pass.",
+    )
+    parser.add_argument(
+        "--skip-metrics",
+        action="store_true",
+        help="Do not stream val for MAE/MAPE (val MSE comes from the stats either way).",
+    )
+    args = parser.parse_args()
+
+    out_dir = Path(args.out_dir)
+    stats_path = out_dir / f"{args.model_name}.stats.npz"
+    started = time.perf_counter()
+    if args.from_stats is not None:
+        stats, source = load_stats(args.from_stats, ("train", "val"))
+        target_columns = source["target_columns"]
+        print(f"[ridge] loaded stats ({stats['train'].count} train rows) from {args.from_stats}")
+    else:
+        read = {"max_rows": args.max_rows, **split_filters(args)}
+        stats = {}
+        for split in ("train", "val"):
+            files = open_split(args.data_dirs, split, **read)
+            stats[split] = accumulate(files, args.workers, args.batch_size)
+        target_columns = files[0].target_columns
+        source = {
+            "target_columns": target_columns,
+            "data_dirs": [str(p) for p in args.data_dirs],
+            "filters": split_filters(args),
+            "max_rows": args.max_rows,
+        }
+        out_dir.mkdir(parents=True, exist_ok=True)
+        save_stats(stats_path, stats, source)
+        print(
+            f"[ridge] stats pass: train={stats['train'].count} val={stats['val'].count} "
+            f"in {time.perf_counter() - started:.2f}s ({args.workers} workers) -> {stats_path}"
+        )
+    stats_sec = time.perf_counter() - started
+
+    started = time.perf_counter()
+    mean, std = stats["train"].normalization()
+    alpha, val_mse = select_alpha(stats, args.alphas, mean, std)
+    coef, intercept = stats["train"].solve(alpha, mean, std)
+    model = to_linear_regression(coef, intercept)
+    solve_sec = time.perf_counter() - started
+    print(f"[ridge] alpha={alpha} val_mse={val_mse[repr(alpha)]:.4f} (solved in {solve_sec:.4f}s)")
+
+    metrics: Dict[str, float] = {"mse_delta": val_mse[repr(alpha)]}
+    if not args.skip_metrics and args.from_stats is None:
+        val_files = open_split(
+            args.data_dirs, "val", max_rows=args.max_rows, **split_filters(args)
+        )
+        metrics.update(evaluate_batches(model, iter_batches(val_files, args.batch_size), mean, std))
+
+    from joblib import dump
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    model_path = out_dir / f"{args.model_name}.joblib"
+    dump(model, model_path)
+    onnx_path = out_dir / f"{args.model_name}.onnx"
+    export_onnx(model, model.n_features_in_, onnx_path)
+    _write_sha(onnx_path)
+
+    meta = {
+        "model_name": args.model_name,
+        "features": FEATURE_COLUMNS,
+        "target_columns": target_columns,
+        "normalization": {"type": "zscore", "mean": mean.tolist(), "std": std.tolist()},
+        "metrics": metrics,
+        "splits": {"train": stats["train"].count, "val": stats["val"].count},
+        "data_dirs": source["data_dirs"],
+        "filters": source["filters"],
+        "params": {"alpha": alpha, "alphas": args.alphas},
+        "timings": {"stats_sec": round(stats_sec, 3), "solve_sec": round(solve_sec, 4)},
+        "alpha_val_mse": val_mse,
+        "stats": str(args.from_stats or stats_path),
+    }
+    meta_path = out_dir / f"{args.model_name}.meta.json"
+    meta_path.write_text(json.dumps(meta, ensure_ascii=True, indent=2))
+
+    print(f"[ridge] saved model -> {model_path}")
+    print(f"[ridge] onnx -> {onnx_path}")
+    print(f"[ridge] metrics -> {meta_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:
+    import lightgbm as lgb
+
+DEFAULT_EARLY_STOPPING_ROUNDS = 50
+DEFAULT_CHECKPOINT_INTERVAL = 300.0
+
+
+@dataclass
+class TrainingControl:
+    """Early stopping, a wall-clock budget and checkpoints for one training run."""
+
+    early_stopping_rounds: int | None = DEFAULT_EARLY_STOPPING_ROUNDS
+    time_budget: float | None = None
+    checkpoint_dir: Path | None = None
+    checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL
+    models: Dict[str, Dict[str, object]] = field(default_factory=dict)
+    _deadline: float | None = None
+    _models_left: int = 1
+    _workers: int = 1
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def begin(self, n_models: int = 1, workers: int = 1) -> None:
+        self._models_left = max(1, n_models)
+        self._workers = max(1, workers)
+        if self.time_budget is not None:
+            self._deadline = time.monotonic() + self.time_budget
+
+    def model_deadline(self) -> float | None:
+        """Claim the next model's share of the remaining budget (monotonic time)."""
+        with self._lock:
+            if self._deadline is None:
+                return None
+            rounds = math.ceil(self._models_left / self._workers)
+            self._models_left = max(1, self._models_left - 1)
+            now = time.monotonic()
+            return now + max(0.0, self._deadline - now) / rounds
+
+    def checkpoint_path(self, tag: str, suffix: str) -> Path | None:
+        if self.checkpoint_dir is None:
+            return None
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        return self.checkpoint_dir / f"{tag}{suffix}"
+
+    def record(
+        self, tag: str, iterations: int, trained_iterations: int, stopped_by: str | None
+    ) -> None:
+        with self._lock:
+            self.models[tag] = {
+                "iterations": iterations,
+                "trained_iterations": trained_iterations,
+                "stopped_by": stopped_by,
+            }
+
+    def lgb_callback(self, tag: str) -> "LgbMonitor":
+        return LgbMonitor(self, tag, self.model_deadline())
+
+    def catboost_params(self, tag: str) -> Dict[str, object]:
+        params: Dict[str, object] = {}
+        if self.early_stopping_rounds:
+            params["early_stopping_rounds"] = self.early_stopping_rounds
+            params["use_best_model"] = True
+        snapshot = self.checkpoint_path(tag, ".cbsnapshot")
+        if snapshot is not None:
+            # snapshots need file output; it lands next to them
+            params["save_snapshot"] = True
+            params["snapshot_file"] = str(snapshot.resolve())
+            params["snapshot_interval"] = self.checkpoint_interval
+            params["allow_writing_files"] = True
+            params["train_dir"] = str(snapshot.parent)
+        return params
+
+    def summary(self) -> Dict[str, object]:
+        iterations = [m["iterations"] for m in self.models.values()]
+        return {
+            "early_stopping_rounds": self.early_stopping_rounds,
+            "early_stopping_split": "val" if self.early_stopping_rounds else None,
+            "time_budget_sec": self.time_budget,
+            "checkpoint_dir": str(self.checkpoint_dir) if self.checkpoint_dir else None,
+            "iterations_total": sum(iterations),
+            "models": self.models,
+        }
+
+
+class LgbMonitor:
+    """LightGBM callback tracking the best val iteration of one booster."""
+
+    order = 30
+
+    def __init__(self, control: TrainingControl, tag: str, deadline: float | None) -> None:
+        self.control = control
+        self.tag = tag
+        self.deadline = deadline
+        self.best_score = math.inf
+        self.best_iteration = -1
+        self.best_results: List[tuple] = []
+        self.checkpoint = control.checkpoint_path(tag, ".lgb.txt")
+        self.last_checkpoint = time.monotonic()
+
+    def __call__(self, env: lgb.callback.CallbackEnv) -> None:
+        if env.evaluation_result_list:
+            _, _, score, higher_better = env.evaluation_result_list[0]
+            score = -score if higher_better else score
+            if score < self.best_score:
+                self.best_score = score
+                self.best_iteration = env.iteration
+                self.best_results = list(env.evaluation_result_list)
+        else:
+            self.best_iteration = env.iteration
+
+        rounds = self.control.early_stopping_rounds
+        stopped_by = None
+        if rounds and env.iteration - self.best_iteration >= rounds:
+            stopped_by = "early_stopping"
+        elif self.deadline is not None and time.monotonic() >= self.deadline:
+            stopped_by = "time_budget"
+        last = env.iteration == env.end_iteration - 1
+
+        now = time.monotonic()
+        if self.checkpoint is not None and (
+            stopped_by or last or now - self.last_checkpoint >= self.control.checkpoint_interval
+        ):
+            env.model.save_model(str(self.checkpoint), num_iteration=self.best_iteration + 1)
+            self.last_checkpoint = now
+
+        keep_best = bool(stopped_by or (last and rounds))
+        if stopped_by or last:
+            kept = self.best_iteration + 1 if keep_best else env.iteration + 1
+            self.control.record(self.tag, kept, env.iteration + 1, stopped_by)
+        if keep_best:
+            import lightgbm as lgb
+
+            raise lgb.callback.EarlyStopException(self.best_iteration, self.best_results)
+
+
+def add_training_control_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--early-stopping-rounds",
+        type=int,
+        default=DEFAULT_EARLY_STOPPING_ROUNDS,
+        help="Stop after this many iterations without val improvement (0 disables).",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=None,
+        help="Wall-clock seconds for all models of the run; each keeps its best iteration.",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        type=Path,
+        default=None,
+        help="Periodically save best-iteration checkpoints here.",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=DEFAULT_CHECKPOINT_INTERVAL,
+        help="Seconds between checkpoints.",
+    )
+
+
+# Trainer flags a --params-from meta may preset; run-mode flags stay explicit.
+HYPERPARAMS = (
+    "n_estimators",
+    "learning_rate",
+    "max_depth",
+    "num_leaves",
+    "iterations",
+    "depth",
+    "random_state",
+)
+
+
+def parse_args_with_params_from(parser: argparse.ArgumentParser) -> argparse.Namespace:
+    """Parse trainer args, taking hyperparameter defaults from ``--params-from``."""
+    parser.add_argument(
+        "--params-from",
+        type=Path,
+        default=None,
+        help="Take hyperparameter defaults from a .meta.json 'params' block.",
+    )
+    args, _ = parser.parse_known_args()
+    if args.params_from is not None:
+        params = json.loads(args.params_from.read_text())["params"]
+        parser.set_defaults(**{k: params[k] for k in HYPERPARAMS if k in params})
+    return parser.parse_args()
+
+
+def training_control(args: argparse.Namespace) -> TrainingControl:
+    return TrainingControl(
+        early_stopping_rounds=args.early_stopping_rounds or None,
+        time_budget=args.time_budget,
+        checkpoint_dir=args.checkpoint_dir,
+        checkpoint_interval=args.checkpoint_interval,
+    )
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import json
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Sequence, Tuple
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper
+
+if TYPE_CHECKING:
+    from catboost import CatBoostRegressor
+    from lightgbm import Booster
+
+# Same opsets the exporters target for skl2onnx/CatBoost graphs.
+ONNX_OPSET = 17
+ONNX_ML_OPSET = 3
+ONNX_IR_VERSION = 8
+
+
+@dataclass
+class TreeEnsemble:
+    """Flat node/leaf arrays of an ONNX ``TreeEnsembleRegressor``."""
+
+    n_features: int
+    n_targets: int
+    base_values: List[float] = field(default_factory=list)
+    nodes_treeids: List[int] = field(default_factory=list)
+    nodes_nodeids: List[int] = field(default_factory=list)
+    nodes_featureids: List[int] = field(default_factory=list)
+    nodes_modes: List[str] = field(default_factory=list)
+    nodes_values: List[float] = field(default_factory=list)
+    nodes_truenodeids: List[int] = field(default_factory=list)
+    nodes_falsenodeids: List[int] = field(default_factory=list)
+    nodes_missing_value_tracks_true: List[int] = field(default_factory=list)
+    target_treeids: List[int] = field(default_factory=list)
+    target_nodeids: List[int] = field(default_factory=list)
+    target_ids: List[int] = field(default_factory=list)
+    target_weights: List[float] = field(default_factory=list)
+    n_trees: int = 0
+
+    def add_node(
+        self,
+        tree_id: int,
+        node_id: int,
+        feature: int = 0,
+        threshold: float = 0.0,
+        true_id: int = 0,
+        false_id: int = 0,
+        missing_true: bool = False,
+    ) -> None:
+        self.nodes_treeids.append(tree_id)
+        self.nodes_nodeids.append(node_id)
+        self.nodes_featureids.append(feature)
+        self.nodes_modes.append("BRANCH_LEQ")
+        self.nodes_values.append(threshold)
+        self.nodes_truenodeids.append(true_id)
+        self.nodes_falsenodeids.append(false_id)
+        self.nodes_missing_value_tracks_true.append(int(missing_true))
+
+    def add_leaf(
+        self, tree_id: int, node_id: int, weights: Sequence[float], targets: Sequence[int]
+    ) -> None:
+        self.add_node(tree_id, node_id)
+        self.nodes_modes[-1] = "LEAF"
+        for target, weight in zip(targets, weights):
+            self.target_treeids.append(tree_id)
+            self.target_nodeids.append(node_id)
+            self.target_ids.append(target)
+            self.target_weights.append(float(weight))
+
+    def add_oblivious_tree(
+        self,
+        splits: Sequence[Tuple[int, float]],
+        leaf_values: np.ndarray,
+        targets: Sequence[int],
+    ) -> None:
+        """Append a symmetric tree: level ``j`` tests ``splits[j]``."""
+        # CatBoost leaf k has bit j set when x[feature_j] > border_j
+        tree_id = self.n_trees
+        depth = len(splits)
+        for level, (feature, border) in enumerate(splits):
+            first = (1 << level) - 1
+            child_first = (1 << (level + 1)) - 1
+            for k in range(1 << level):
+                self.add_node(
+                    tree_id,
+                    first + k,
+                    feature,
+                    border,
+                    true_id=child_first + k,
+                    false_id=child_first + (k | (1 << level)),
+                )
+        first_leaf = (1 << depth) - 1
+        for k, weights in enumerate(leaf_values):
+            self.add_leaf(tree_id, first_leaf + k, weights, targets)
+        self.n_trees += 1
+
+    def to_onnx(
+        self, input_name: str = "features", output_name: str = "predictions"
+    ) -> onnx.ModelProto:
+        extra = {}
+        if any(self.nodes_missing_value_tracks_true):
+            extra["nodes_missing_value_tracks_true"] = self.nodes_missing_value_tracks_true
+        node = helper.make_node(
+            "TreeEnsembleRegressor",
+            inputs=[input_name],
+            outputs=[output_name],
+            domain="ai.onnx.ml",
+            n_targets=self.n_targets,
+            aggregate_function="SUM",
+            post_transform="NONE",
+            base_values=self.base_values or [0.0] * self.n_targets,
+            nodes_treeids=self.nodes_treeids,
+            nodes_nodeids=self.nodes_nodeids,
+            nodes_featureids=self.nodes_featureids,
+            nodes_modes=self.nodes_modes,
+            nodes_values=self.nodes_values,
+            nodes_truenodeids=self.nodes_truenodeids,
+            nodes_falsenodeids=self.nodes_falsenodeids,
+            target_treeids=self.target_treeids,
+            target_nodeids=self.target_nodeids,
+            target_ids=self.target_ids,
+            target_weights=self.target_weights,
+            **extra,
+        )
+        graph = helper.make_graph(
+            [node],
+            "tree_ensemble",
+            [helper.make_tensor_value_info(input_name, TensorProto.FLOAT, ["N", self.n_features])],
+            [helper.make_tensor_value_info(output_name, TensorProto.FLOAT, ["N", self.n_targets])],
+        )
+        model = helper.make_model(
+            graph,
+            opset_imports=[
+                helper.make_opsetid("", ONNX_OPSET),
+                helper.make_opsetid("ai.onnx.ml", ONNX_ML_OPSET),
+            ],
+        )
+        model.ir_version = ONNX_IR_VERSION
+        onnx.checker.check_model(model)
+        return model
+
+
+def catboost_to_onnx(model: CatBoostRegressor) -> onnx.ModelProto:
+    """Convert a float-feature CatBoost regressor (incl. MultiRMSE) to ONNX."""
+    with tempfile.TemporaryDirectory(prefix="catboost-json-") as tmp:
+        dump_path = Path(tmp) / "model.json"
+        model.save_model(str(dump_path), format="json")
+        dump = json.loads(dump_path.read_text())
+
+    scale, bias = dump["scale_and_bias"]
+    bias = bias if isinstance(bias, list) else [bias]
+    n_features = len(dump["features_info"]["float_features"])
+    ensemble = TreeEnsemble(n_features=n_features, n_targets=len(bias))
+    ensemble.base_values = [float(b) for b in bias]
+    targets = list(range(len(bias)))
+    for tree in dump["oblivious_trees"]:
+        splits = [(s["float_feature_index"], s["border"]) for s in tree["splits"]]
+        leaves = np.asarray(tree["leaf_values"], dtype=np.float64) * scale
+        ensemble.add_oblivious_tree(splits, leaves.reshape(1 << len(splits), -1), targets)
+    return ensemble.to_onnx()
+
+
+def _threshold_f32(threshold: float) -> float:
+    # ONNX stores float32 thresholds; rounding up would send inputs in
+    # (threshold, rounded] left, unlike LightGBM's double comparison
+    t32 = np.float32(threshold)
+    if float(t32) > threshold:
+        t32 = np.nextafter(t32, np.float32(-np.inf))
+    return float(t32)
+
+
+def add_lgbm_tree(ensemble: TreeEnsemble, tree: dict, target: int) -> None:
+    """Append one ``Booster.dump_model()`` tree, contributing to ``target``."""
+    tree_id = ensemble.n_trees
+    next_id = 0
+
+    def _visit(node: dict) -> int:
+        nonlocal next_id
+        node_id = next_id
+        next_id += 1
+        if "leaf_value" in node:
+            ensemble.add_leaf(tree_id, node_id, [node["leaf_value"]], [target])
+            return node_id
+        if node["decision_type"] != "<=" or node["missing_type"] == "Zero":
+            raise ValueError(
+                f"unsupported LightGBM split ({node['decision_type']}, missing={node['missing_type']})"
+            )
+        pos = len(ensemble.nodes_nodeids)
+        ensemble.add_node(
+            tree_id,
+            node_id,
+            node["split_feature"],
+            _threshold_f32(node["threshold"]),
+            missing_true=node["missing_type"] == "NaN" and node["default_left"],
+        )
+        # children get their ids in pre-order, after the parent is placed
+        ensemble.nodes_truenodeids[pos] = _visit(node["left_child"])
+        ensemble.nodes_falsenodeids[pos] = _visit(node["right_child"])
+        return node_id
+
+    _visit(tree["tree_structure"])
+    ensemble.n_trees += 1
+
+
+def lgbm_to_onnx(
+    boosters: Sequence[Booster], input_name: str = "input", output_name: str = "delta"
+) -> onnx.ModelProto:
+    """Fuse one single-output LightGBM booster per target into one ONNX node."""
+    ensemble = TreeEnsemble(n_features=boosters[0].num_feature(), n_targets=len(boosters))
+    for target, booster in enumerate(boosters):
+        # dump_model() keeps only the best iteration when one is set, like predict()
+        for tree in booster.dump_model()["tree_info"]:
+            add_lgbm_tree(ensemble, tree, target)
+    return ensemble.to_onnx(input_name, output_name)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List
+
+import numpy as np
+
+from check_onnx_batch import has_dynamic_batch
+
+# onnxruntime loads where sessions are made; --help and importers stay fast
+if TYPE_CHECKING:
+    import onnxruntime as ort
+
+ROOT = Path(__file__).resolve().parents[2]
+PUBLIC_DIR = ROOT / "apps" / "web" / "public"
+
+# onnxruntime-web SessionOptions values -> ort enum member names
+OPT_LEVELS = {
+    "disabled": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+MODES = {
+    "sequential": "ORT_SEQUENTIAL",
+    "parallel": "ORT_PARALLEL",
+}
+DEFAULT_CONFIG = {
+    "intraOpNumThreads": 0,
+    "interOpNumThreads": 0,
+    "executionMode": "sequential",
+    "graphOptimizationLevel": "all",
+    "enableCpuMemArena": True,
+    "enableMemPattern": True,
+}
+
+
+def _parse_ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def session_options(config: Dict[str, object]) -> ort.SessionOptions:
+    """``ort.SessionOptions`` for a manifest ``sessionOptions`` entry (0 threads = ORT default)."""
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.log_severity_level = 3
+    options.intra_op_num_threads = int(config["intraOpNumThreads"])
+    options.inter_op_num_threads = int(config["interOpNumThreads"])
+    options.execution_mode = getattr(ort.ExecutionMode, MODES[config["executionMode"]])
+    options.graph_optimization_level = getattr(
+        ort.GraphOptimizationLevel, OPT_LEVELS[config["graphOptimizationLevel"]]
+    )
+    options.enable_cpu_mem_arena = bool(config["enableCpuMemArena"])
+    options.enable_mem_pattern = bool(config["enableMemPattern"])
+    return options
+
+
+def tuned_config(tuned: Dict[str, Dict[str, object]] | None, batch: int = 1) -> Dict[str, object]:
+    """A manifest's ``sessionOptions`` entry for ``batch``."""
+    if not tuned:
+        return dict(DEFAULT_CONFIG)
+    sizes = sorted(int(k) for k in tuned)
+    fitting = [n for n in sizes if n <= batch]
+    return {**DEFAULT_CONFIG, **tuned[str(fitting[-1] if fitting else sizes[0])]}
+
+
+def create_session(
+    path: Path, tuned: Dict[str, Dict[str, object]] | None = None, batch: int = 1
+) -> ort.InferenceSession:
+    """CPU session for a shipped artifact with the manifest's tuned options."""
+    import onnxruntime as ort
+
+    return ort.InferenceSession(
+        Path(path).as_posix(),
+        sess_options=session_options(tuned_config(tuned, batch)),
+        providers=["CPUExecutionProvider"],
+    )
+
+
+def candidate_configs(cores: int) -> List[Dict[str, object]]:
+    """Grid over threads, execution mode, optimization level and memory options."""
+    intra = [0] + [n for n in (1, 2, 4, 8, 16) if n <= cores]
+    modes = [("sequential", 0)] + [("parallel", n) for n in (1, 2) if n <= cores]
+    configs = []
+    for threads, (mode, inter), level, arena, pattern in itertools.product(
+        intra, modes, OPT_LEVELS, (True, False), (True, False)
+    ):
+        configs.append(
+            {
+                "intraOpNumThreads": threads,
+                "interOpNumThreads": inter,
+                "executionMode": mode,
+                "graphOptimizationLevel": level,
+                "enableCpuMemArena": arena,
+                "enableMemPattern": pattern,
+            }
+        )
+    return configs
+
+
+def measure(path: Path, config: Dict[str, object], X: np.ndarray, min_sec: float) -> float:
+    """Median ms per ``run`` on ``X`` (session creation and warm-up excluded)."""
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(
+        path.as_posix(), sess_options=session_options(config), providers=["CPUExecutionProvider"]
+    )
+    feed = {session.get_inputs()[0].name: X}
+    for _ in range(3):
+        session.run(None, feed)
+    timings: List[float] = []
+    deadline = time.perf_counter() + min_sec
+    while len(timings) < 20 or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        session.run(None, feed)
+        timings.append((time.perf_counter() - started) * 1000)
+    return float(np.median(timings))
+
+
+def tune(
+    path: Path,
+    batch: int,
+    configs: List[Dict[str, object]],
+    min_sec: float,
+    min_gain: float = 0.05,
+    finalists: int = 3,
+) -> Dict[str, object]:
+    """Screen every config briefly, then re-time the best few and the default longer."""
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(path.as_posix(), providers=["CPUExecutionProvider"])
+    X = np.random.default_rng(0).standard_normal((batch, session.get_inputs()[0].shape[1])).astype(np.float32)
+    screened = sorted(configs, key=lambda c: measure(path, c, X, min_sec))
+    finals = screened[:finalists] + [DEFAULT_CONFIG]
+    timed = [(measure(path, c, X, min_sec * 10), c) for c in finals]
+    best_ms, best = min(timed, key=lambda t: t[0])
+    default_ms = timed[-1][0]
+    if best_ms > default_ms * (1 - min_gain):
+        best_ms, best = default_ms, DEFAULT_CONFIG
+    return {
+        "options": best,
+        "p50_ms": best_ms,
+        "default_p50_ms": default_ms,
+        "speedup": default_ms / best_ms if best_ms > 0 else 1.0,
+        "screened": len(configs),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Search ORT session options per artifact and batch size; store the best in the manifest."
+    )
+    parser.add_argument("--manifest", default="apps/web/src/config/ml.manifest.json")
+    parser.add_argument(
+        "--model",
+        default=None,
+        help="ONNX file (default: the artifact the worker loads first, quantPath before path).",
+    )
+    parser.add_argument("--batches", default="1,1024", type=_parse_ints)
+    parser.add_argument("--min-sec", type=float, default=0.05, help="Screening time per config.")
+    parser.add_argument(
+        "--min-gain",
+        type=float,
+        default=0.05,
+        help="Relative speedup needed to replace the default options.",
+    )
+    parser.add_argument("--report", default=None, help="Optional JSON with timings of the winners.")
+    args = parser.parse_args()
+
+    import onnxruntime as ort
+
+    manifest_path = Path(args.manifest)
+    manifest = json.loads(manifest_path.read_text())
+    if args.model:
+        model_path = Path(args.model)
+    else:
+        candidates = [manifest[k] for k in ("quantPath", "path") if k in manifest]
+        model_path = next(
+            (PUBLIC_DIR / c.lstrip("/") for c in candidates if (PUBLIC_DIR / c.lstrip("/")).exists()),
+            PUBLIC_DIR / manifest["path"].lstrip("/"),
+        )
+    session = ort.InferenceSession(model_path.as_posix(), providers=["CPUExecutionProvider"])
+    # a fixed batch axis only runs batch 1
+    batches = args.batches if has_dynamic_batch(session) else [1]
+    configs = candidate_configs(os.cpu_count() or 1)
+
+    results: Dict[str, Dict[str, object]] = {}
+    for batch in batches:
+        result = tune(model_path, batch, configs, args.min_sec, args.min_gain)
+        results[str(batch)] = result
+        print(
+            f"[tune] {model_path.name} batch={batch}: {result['p50_ms']:.4f}ms "
+            f"(default {result['default_p50_ms']:.4f}ms, x{result['speedup']:.2f}) {result['options']}"
+        )
+
+    manifest["sessionOptions"] = {batch: r["options"] for batch, r in results.items()}
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=True, indent=2) + "\n")
+    print(f"[tune] manifest -> {manifest_path}")
+    if args.report:
+        report = {"model": model_path.name, "cpu_count": os.cpu_count(), "ort": ort.__version__, "batches": results}
+        Path(args.report).write_text(json.dumps(report, ensure_ascii=True, indent=2))
+        print(f"[tune] report -> {args.report}")
+
+
+if __name__ == "__main__":
+    main()
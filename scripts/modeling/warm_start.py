@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from feature_dataset import FEATURE_COLUMNS, split_filters, split_ts_end
+
+DEFAULT_WARM_ROUNDS = 100
+DEFAULT_FULL_REFIT_EVERY = 7
+HISTORY_LIMIT = 30
+
+
+def meta_path_for(model_path: Path) -> Path:
+    # forecast_lgbm_v1.joblib -> forecast_lgbm_v1.meta.json
+    return model_path.with_suffix(".meta.json")
+
+
+@dataclass
+class WarmStart:
+    """The previous model of a retrain and whether this run continues it."""
+
+    model_path: Path
+    meta: Dict[str, object]
+    incremental: bool
+
+    @property
+    def lineage(self) -> Dict[str, object]:
+        return self.meta.get("lineage") or {}
+
+    @property
+    def increments(self) -> int:
+        return int(self.lineage.get("increments", 0))
+
+    def normalization(self) -> Tuple[np.ndarray, np.ndarray]:
+        norm = self.meta["normalization"]
+        return (
+            np.asarray(norm["mean"], dtype=np.float32),
+            np.asarray(norm["std"], dtype=np.float32),
+        )
+
+    def train_filters(self, args: argparse.Namespace) -> Dict[str, object]:
+        """Split filters for the train rows of this run: only unseen ones when incremental."""
+        filters = split_filters(args)
+        if not self.incremental:
+            return filters
+        start = int(self.lineage["ts_till"])
+        if args.ts_from is not None:
+            start = max(start, args.ts_from)
+        return {**filters, "ts_range": (start, args.ts_till)}
+
+
+def add_warm_start_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--init-model",
+        type=Path,
+        default=None,
+        help="Previous model (with its .meta.json beside it) to continue boosting from.",
+    )
+    parser.add_argument(
+        "--warm-rounds",
+        type=int,
+        default=DEFAULT_WARM_ROUNDS,
+        help="Boosting rounds added per incremental retrain.",
+    )
+    parser.add_argument(
+        "--full-refit-every",
+        type=int,
+        default=DEFAULT_FULL_REFIT_EVERY,
+        help="Refit from scratch after this many incremental retrains (0 never forces one).",
+    )
+
+
+def resolve_warm_start(args: argparse.Namespace) -> WarmStart | None:
+    if args.init_model is None:
+        return None
+    meta = json.loads(meta_path_for(args.init_model).read_text())
+    if meta.get("features") != FEATURE_COLUMNS:
+        raise ValueError(f"{args.init_model} was trained on different features")
+    warm = WarmStart(args.init_model, meta, incremental=True)
+    if warm.lineage.get("ts_till") is None:
+        print(f"[warm] {args.init_model} has no lineage ts_till; refitting from scratch")
+        warm.incremental = False
+    elif args.full_refit_every and warm.increments >= args.full_refit_every:
+        print(
+            f"[warm] {warm.increments} incremental retrains since the last full fit; "
+            "refitting from scratch"
+        )
+        warm.incremental = False
+    if warm.incremental:
+        ts_till = int(warm.lineage["ts_till"])
+        end = split_ts_end(args.data_dirs, "train", (None, args.ts_till), args.symbols)
+        if end is not None and end <= ts_till:
+            print(f"[warm] no train rows newer than ts_till={ts_till} in {args.init_model}; nothing new to train on")
+            raise SystemExit(0)
+    return warm
+
+
+def lineage_meta(
+    args: argparse.Namespace,
+    warm: WarmStart | None,
+    rows: int,
+    fit_sec: float,
+    metrics: Dict[str, float],
+    parent_metrics: Dict[str, float] | None,
+) -> Dict[str, object]:
+    """Lineage block for the ``.meta.json``."""
+    incremental = warm is not None and warm.incremental
+    filters = warm.train_filters(args) if warm is not None else split_filters(args)
+    ts_range = filters["ts_range"] or (None, None)
+    entry: Dict[str, object] = {
+        "mode": "incremental" if incremental else "full",
+        "parent": str(warm.model_path) if warm is not None else None,
+        "increments": warm.increments + 1 if incremental else 0,
+        "ts_from": ts_range[0],
+        "ts_till": split_ts_end(args.data_dirs, "train", filters["ts_range"], args.symbols),
+        "rows": rows,
+        "warm_rounds": args.warm_rounds if incremental else None,
+        "fit_sec": round(fit_sec, 3),
+        "metrics": metrics,
+        "parent_metrics": parent_metrics,
+        "drift": (
+            {k: metrics[k] - parent_metrics[k] for k in metrics if k in parent_metrics}
+            if parent_metrics
+            else None
+        ),
+    }
+    history: List[Dict[str, object]] = list(warm.lineage.get("history") or []) if warm else []
+    history.append(
+        {k: entry[k] for k in ("mode", "ts_till", "rows", "fit_sec", "metrics", "drift")}
+    )
+    return {**entry, "full_refit_every": args.full_refit_every, "history": history[-HISTORY_LIMIT:]}
@@ -1,19 +1,18 @@
 from __future__ import annotations
 
+import argparse
 import hashlib
 import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Sequence, Tuple
+from typing import TYPE_CHECKING, Iterable, List, Sequence, Tuple
 
 import numpy as np
-import onnx
-import onnxruntime as ort
-from onnxruntime.quantization import QuantType, quantize_dynamic
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_absolute_percentage_error
-from skl2onnx import convert_sklearn
-from skl2onnx.common.data_types import FloatTensorType
+
+# onnx, onnxruntime, sklearn and skl2onnx are imported where they are used
+if TYPE_CHECKING:
+    import onnxruntime as ort
+    from sklearn.linear_model import LinearRegression
 
 ROOT = Path(__file__).resolve().parents[1]
 MODEL_DIR = ROOT / "apps" / "web" / "public" / "models"
@@ -43,13 +42,13 @@ EPS = 1e-6
 def generate_synthetic_series(
     steps: int = 6000, start: float = 120.0, seed: int = 7
 ) -> np.ndarray:
+    # multi-asset, OHLCV and production-sized series: scripts/data/generate_synthetic_market.py
     rng = np.random.default_rng(seed)
-    closes = [start]
-    for t in range(1, steps):
-        drift = 0.04 * np.sin(t / 25) + 0.004 * (t / steps)
-        shock = rng.normal(scale=0.6)
-        closes.append(closes[-1] + drift + shock)
-    return np.asarray(closes, dtype=np.float32)
+    t = np.arange(1, steps)
+    drift = 0.04 * np.sin(t / 25) + 0.004 * (t / steps)
+    shocks = rng.normal(scale=0.6, size=steps - 1)
+    closes = np.concatenate([[start], start + np.cumsum(drift + shocks)])
+    return closes.astype(np.float32)
 
 
 def _ema(arr: np.ndarray, span: int) -> float:
@@ -77,39 +76,79 @@ def featurize(window: Sequence[float]) -> np.ndarray:
     return np.asarray(feats, dtype=np.float32)
 
 
+class TailRanges(Sequence[np.ndarray]):
+    """Tails of the samples as ``[end - TAIL_SIZE, end)`` ranges into the series."""
+
+    def __init__(self, series: np.ndarray, ends: np.ndarray) -> None:
+        self.series = series
+        self.ends = ends
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return TailRanges(self.series, self.ends[idx])
+        end = int(self.ends[idx])
+        return self.series[max(0, end - TAIL_SIZE) : end].copy()
+
+
 @dataclass
 class Dataset:
     X: np.ndarray
     y_delta: np.ndarray
     last_closes: np.ndarray
-    tails: List[np.ndarray]
+    tails: TailRanges
+
+
+def _ema_weights(span: int) -> np.ndarray:
+    # _ema over `span` points unrolled: alpha * (1 - alpha)^k per point, the
+    # first point carrying the remaining (1 - alpha)^(span - 1)
+    alpha = 2.0 / (span + 1.0)
+    weights = alpha * (1 - alpha) ** np.arange(span - 1, -1, -1, dtype=np.float64)
+    weights[0] = (1 - alpha) ** (span - 1)
+    return weights.astype(np.float32)
 
 
 def build_dataset(series: np.ndarray) -> Dataset:
-    X: List[np.ndarray] = []
-    y_delta: List[np.ndarray] = []
-    last_closes: List[float] = []
-    tails: List[np.ndarray] = []
-    for idx in range(WINDOW, len(series) - HORIZON):
-        window = series[idx - WINDOW : idx]
-        target = series[idx : idx + HORIZON]
-        last_close = window[-1]
-        features = featurize(window)
-        delta = target - last_close
-
-        tail_start = max(0, idx - TAIL_SIZE)
-        tail_slice = series[tail_start:idx]
-
-        X.append(features)
-        y_delta.append(delta)
-        last_closes.append(last_close)
-        tails.append(tail_slice.copy())
+    """Vectorized equivalent of calling :func:`featurize` on every window."""
+    series = np.asarray(series, dtype=np.float32)
+    n = len(series) - HORIZON - WINDOW
+    if n <= 0:
+        raise ValueError(f"series of {len(series)} points is shorter than WINDOW + HORIZON")
+    idx = np.arange(WINDOW, WINDOW + n)
+    windows = np.lib.stride_tricks.sliding_window_view
+
+    def _rolling(values: np.ndarray, size: int, end: np.ndarray) -> np.ndarray:
+        # windows of `size` points ending right before each `end`
+        return windows(values, size)[end - size]
+
+    last_close = series[idx - 1]
+    last_20 = _rolling(series, 20, idx)
+    # returns[j] = (series[j + 1] - series[j]) / series[j]; the window's last
+    # return is returns[idx - 2]
+    returns = np.diff(series) / series[:-1]
+    X = np.column_stack(
+        [
+            last_close,
+            _rolling(series, 5, idx).mean(axis=1),
+            last_20.mean(axis=1),
+            last_20.std(axis=1),
+            last_close - series[idx - 3],
+            last_close - series[idx - 8],
+            _rolling(series, 5, idx) @ _ema_weights(5),
+            _rolling(series, 10, idx) @ _ema_weights(10),
+            _rolling(returns, 5, idx - 1).mean(axis=1),
+            _rolling(returns, 20, idx - 1).std(axis=1),
+        ]
+    ).astype(np.float32)
+    y_delta = windows(series, HORIZON)[idx] - last_close[:, None]
 
     return Dataset(
-        X=np.stack(X),
-        y_delta=np.stack(y_delta),
-        last_closes=np.asarray(last_closes, dtype=np.float32),
-        tails=tails,
+        X=X,
+        y_delta=y_delta.astype(np.float32),
+        last_closes=last_close,
+        tails=TailRanges(series, idx),
     )
 
 
@@ -136,12 +175,17 @@ def zscore_normalize(X: np.ndarray, mean: np.ndarray, std: np.ndarray) -> np.nda
 
 
 def export_onnx(model: LinearRegression, feature_count: int, dest: Path) -> None:
-    initial_type = [("input", FloatTensorType([1, feature_count]))]
+    import onnx
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+
+    # symbolic batch axis, so callers can score many windows per run
+    initial_type = [("input", FloatTensorType([None, feature_count]))]
     onnx_model = convert_sklearn(
         model,
         initial_types=initial_type,
         target_opset=17,
-        final_types=[("delta", FloatTensorType([1, HORIZON]))],
+        final_types=[("delta", FloatTensorType([None, HORIZON]))],
     )
     onnx.checker.check_model(onnx_model)
     dest.parent.mkdir(parents=True, exist_ok=True)
@@ -206,6 +250,18 @@ def build_test_vectors(
 
 
 def main() -> None:
+    argparse.ArgumentParser(
+        description=(
+            "Train the minimal linear forecaster on a synthetic series and write its ONNX "
+            "artifacts, test vectors and ml.manifest.json."
+        )
+    ).parse_args()
+
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sklearn.linear_model import LinearRegression
+    from sklearn.metrics import mean_absolute_percentage_error
+
     print("Building synthetic dataset...")
     series = generate_synthetic_series()
     dataset = build_dataset(series)
@@ -258,6 +314,7 @@ def main() -> None:
                 "horizon": HORIZON,
                 "window": WINDOW,
                 "feature_count": len(FEATURE_NAMES),
+                "dynamic_batch": True,
                 "rtol": 1e-3,
                 "atol": 1e-4,
                 "cases": test_vectors,
@@ -275,6 +332,7 @@ def main() -> None:
         "onnxSha256": onnx_digest,
         "quantSha256": quant_digest,
         "inputShape": [1, len(FEATURE_NAMES)],
+        "dynamicBatch": True,
         "horizonSteps": HORIZON,
         "featureWindow": WINDOW,
         "tailSize": TAIL_SIZE,